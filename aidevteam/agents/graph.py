@@ -0,0 +1,169 @@
+"""
+Dependency-aware phase graph for SprintState workflows.
+
+Phases declare which SprintState keys they read (inputs) and write
+(outputs). Dependencies are derived from those declarations, independent
+phases run concurrently, and each update is merged back using the reducers
+declared on the state type (e.g. Annotated[List, operator.add]), the same
+way LangGraph merges node outputs.
+"""
+import asyncio
+import inspect
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Optional, get_origin, get_type_hints
+
+from aidevteam.agents.state import SprintState
+
+
+def get_reducers(state_type: type = SprintState) -> Dict[str, Callable[[Any, Any], Any]]:
+    """Extract the reducer of every Annotated[..., reducer] field of a TypedDict."""
+    reducers = {}
+    for key, hint in get_type_hints(state_type, include_extras=True).items():
+        if get_origin(hint) is Annotated:
+            for meta in hint.__metadata__:
+                if callable(meta):
+                    reducers[key] = meta
+                    break
+    return reducers
+
+
+def apply_update(state: Dict, update: Dict, reducers: Dict[str, Callable[[Any, Any], Any]]) -> Dict:
+    """Merge a partial state update, applying reducers where declared."""
+    merged = dict(state)
+    for key, value in update.items():
+        if key in reducers and merged.get(key) is not None:
+            merged[key] = reducers[key](merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class Phase:
+    """A node of the sprint graph."""
+
+    def __init__(self, name: str, fn: Callable[[Dict], Any], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), after: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.inputs = frozenset(inputs)
+        self.outputs = frozenset(outputs)
+        self.after = frozenset(after)
+
+    async def run(self, state: Dict) -> Dict:
+        if inspect.iscoroutinefunction(self.fn):
+            update = await self.fn(state)
+        else:
+            update = await asyncio.to_thread(self.fn, state)
+        update = update or {}
+        undeclared = set(update) - self.outputs
+        if undeclared:
+            raise ValueError(f"Phase '{self.name}' wrote undeclared keys: {sorted(undeclared)}")
+        return update
+
+
+class PhaseGraph:
+    """
+    Schedules phases in dependency order, running independent ones concurrently.
+
+    A phase depends on every earlier phase that writes one of its inputs, and
+    on every earlier phase writing the same non-reducer key (so last-writer-wins
+    stays deterministic). Explicit ordering can be added with `after`.
+    """
+
+    def __init__(self, state_type: type = SprintState, max_concurrency: Optional[int] = None):
+        self.reducers = get_reducers(state_type)
+        self.max_concurrency = max_concurrency
+        self.phases: Dict[str, Phase] = {}
+        self.dependencies: Dict[str, set] = {}
+
+    def add_phase(self, name: str, fn: Callable[[Dict], Any], inputs: Iterable[str] = (),
+                  outputs: Iterable[str] = (), after: Iterable[str] = ()) -> "PhaseGraph":
+        if name in self.phases:
+            raise ValueError(f"Phase '{name}' is already defined")
+        phase = Phase(name, fn, inputs, outputs, after)
+        unknown = phase.after - set(self.phases)
+        if unknown:
+            raise ValueError(f"Phase '{name}' runs after undefined phases: {sorted(unknown)}")
+
+        deps = set(phase.after)
+        for other in self.phases.values():
+            if other.outputs & phase.inputs:
+                deps.add(other.name)
+            if {k for k in other.outputs & phase.outputs if k not in self.reducers}:
+                deps.add(other.name)
+        self.phases[name] = phase
+        self.dependencies[name] = deps
+        return self
+
+    async def arun(self, state: Dict) -> Dict:
+        """Execute the graph and return the merged final state."""
+        state = dict(state)
+        pending = list(self.phases)
+        done: set = set()
+        running: Dict[asyncio.Task, str] = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+
+        async def run_phase(phase: Phase, snapshot: Dict) -> Dict:
+            if semaphore is None:
+                return await phase.run(snapshot)
+            async with semaphore:
+                return await phase.run(snapshot)
+
+        try:
+            while pending or running:
+                for name in [n for n in pending if self.dependencies[n] <= done]:
+                    pending.remove(name)
+                    task = asyncio.create_task(run_phase(self.phases[name], dict(state)))
+                    running[task] = name
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    state = apply_update(state, task.result(), self.reducers)
+                    done.add(name)
+        finally:
+            for task in running:
+                task.cancel()
+
+        return state
+
+    def run(self, state: Dict) -> Dict:
+        """Synchronous entry point for scripts and tests."""
+        return asyncio.run(self.arun(state))
+
+    def to_langgraph(self, state_type: type = SprintState):
+        """Build an equivalent (uncompiled) LangGraph StateGraph."""
+        from langgraph.graph import StateGraph, START, END
+
+        graph = StateGraph(state_type)
+        for name, phase in self.phases.items():
+            graph.add_node(name, phase.fn)
+
+        has_dependents = set()
+        for name, deps in self.dependencies.items():
+            if not deps:
+                graph.add_edge(START, name)
+            elif len(deps) == 1:
+                graph.add_edge(next(iter(deps)), name)
+            else:
+                graph.add_edge(sorted(deps), name)
+            has_dependents |= deps
+
+        for name in self.phases:
+            if name not in has_dependents:
+                graph.add_edge(name, END)
+        return graph
+
+    def layers(self) -> List[List[str]]:
+        """Group phases into waves that can run concurrently (for inspection)."""
+        remaining = dict(self.dependencies)
+        done: set = set()
+        waves = []
+        while remaining:
+            wave = [n for n, deps in remaining.items() if deps <= done]
+            if not wave:
+                raise ValueError("Phase graph contains a cycle")
+            waves.append(wave)
+            done.update(wave)
+            for name in wave:
+                del remaining[name]
+        return waves
@@ -0,0 +1,349 @@
+"""
+Incremental code index over a sprint workspace.
+
+The index keeps the file tree, a symbol table of every Python module (from
+`ast`), a BM25 index over code chunks (a top-level function or class, or a
+window of lines) and a trigram index that answers literal substring queries
+without scanning every file. Files are re-indexed one at a time: when they
+are written through a `Workspace` (or its file tools) and when their
+mtime or size changes between refreshes. Agents search it for the few
+relevant snippets instead of reading whole files into their prompts.
+"""
+import ast
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from aidevteam.agents.scripts.workspace import Workspace
+
+# Lines per chunk outside of Python functions and classes
+WINDOW_LINES = 40
+# Lines of a chunk shown in a search result
+SNIPPET_LINES = 30
+# Larger files are not indexed
+MAX_FILE_BYTES = 1 << 20
+# Directories never indexed (hidden ones are skipped by the workspace)
+SKIP_DIRS = {"__pycache__", "node_modules", "venv", "env", "build", "dist"}
+# Minimum seconds between two directory walks looking for changed files
+REFRESH_INTERVAL = 1.0
+# Indexes kept by get_code_index; the least recently used is dropped beyond this
+CACHE_SIZE = int(os.getenv("CODE_INDEX_CACHE_SIZE", "16"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased identifiers plus their snake_case and camelCase parts."""
+    tokens = []
+    for word in _IDENTIFIER.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Chunk:
+    __slots__ = ("path", "start", "end", "text", "symbol", "length", "terms")
+
+    def __init__(self, path: str, start: int, end: int, text: str, symbol: Optional[str] = None):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.text = text
+        self.symbol = symbol
+        self.terms = Counter(tokenize(text))
+        self.length = sum(self.terms.values())
+
+
+def python_symbols(source: str, path: str) -> List[dict]:
+    """Functions, classes and methods defined in a module (empty on syntax errors)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    symbols = []
+
+    def visit(nodes, parent: Optional[str]):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                kind = "class" if isinstance(node, ast.ClassDef) else ("method" if parent else "function")
+                name = f"{parent}.{node.name}" if parent else node.name
+                if isinstance(node, ast.ClassDef):
+                    signature = f"class {node.name}"
+                else:
+                    signature = f"def {node.name}({ast.unparse(node.args)})"
+                symbols.append({"name": name, "kind": kind, "path": path, "line": node.lineno,
+                                "end_line": node.end_lineno or node.lineno, "signature": signature,
+                                "doc": (ast.get_docstring(node) or "").split("\n", 1)[0]})
+                if isinstance(node, ast.ClassDef) and parent is None:
+                    visit(node.body, node.name)
+
+    visit(tree.body, None)
+    return symbols
+
+
+def split_chunks(path: str, source: str, symbols: List[dict]) -> List[Chunk]:
+    """Top-level functions and classes become one chunk each; other lines go in windows."""
+    lines = source.splitlines()
+    spans = sorted((s["line"], s["end_line"], s["name"]) for s in symbols if s["kind"] != "method")
+    chunks, line = [], 1
+
+    def windows(start: int, end: int):
+        for first in range(start, end + 1, WINDOW_LINES):
+            last = min(end, first + WINDOW_LINES - 1)
+            text = "\n".join(lines[first - 1:last])
+            if text.strip():
+                chunks.append(Chunk(path, first, last, text))
+
+    for start, end, name in spans:
+        if start > line:
+            windows(line, start - 1)
+        chunks.append(Chunk(path, start, end, "\n".join(lines[start - 1:end]), name))
+        line = end + 1
+    windows(line, len(lines))
+    return chunks
+
+
+class CodeIndex:
+    """
+    Searchable index of the text files in a workspace.
+
+    Thread-safe: tools call it from worker threads while writes made through
+    the workspace update it from others.
+    """
+
+    def __init__(self, workspace: Workspace, refresh_interval: float = REFRESH_INTERVAL):
+        self.workspace = workspace
+        self.refresh_interval = refresh_interval
+        self.files: Dict[str, Tuple[int, int]] = {}  # path -> (mtime_ns, size)
+        self.chunks: Dict[int, Chunk] = {}
+        self.file_chunks: Dict[str, List[int]] = {}
+        self.symbols: Dict[str, List[dict]] = {}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.grams: Dict[str, Set[int]] = defaultdict(set)
+        self.total_length = 0
+        self.indexed = 0
+        self._next_id = 0
+        self._refreshed_at: Optional[float] = None
+        self._watched: "weakref.WeakSet[Workspace]" = weakref.WeakSet()
+        self._lock = threading.RLock()
+        self.watch(workspace)
+
+    def watch(self, workspace: Workspace) -> None:
+        """Re-index files as soon as they are written through `workspace`."""
+        if workspace not in self._watched:
+            self._watched.add(workspace)
+            workspace.on_write(self.update)
+
+    def _indexable(self, path: str) -> bool:
+        return not SKIP_DIRS.intersection(path.split(os.sep)[:-1])
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Re-index the files whose mtime or size changed and drop deleted ones.
+        Returns the number of files (re-)indexed.
+        """
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return 0
+        self._refreshed_at = now
+        seen, changed = set(), 0
+        for path in self.workspace.list_files(skip_dirs=SKIP_DIRS):
+            seen.add(path)
+            try:
+                stat = os.stat(os.path.join(self.workspace.root, path))
+            except OSError:
+                continue
+            if self.files.get(path) != (stat.st_mtime_ns, stat.st_size):
+                changed += self._index_file(path, stat)
+        with self._lock:
+            for path in set(self.files) - seen:
+                self._remove(path)
+        return changed
+
+    def update(self, path: str) -> None:
+        """Re-index one file (relative to the workspace root), e.g. right after a write."""
+        if not self._indexable(path):
+            return
+        try:
+            stat = os.stat(self.workspace.resolve(path))
+        except OSError:
+            with self._lock:
+                self._remove(path)
+            return
+        self._index_file(path, stat)
+
+    def _index_file(self, path: str, stat: os.stat_result) -> int:
+        source = None
+        if stat.st_size <= MAX_FILE_BYTES:
+            try:
+                with open(os.path.join(self.workspace.root, path), "rb") as f:
+                    source = f.read().decode("utf-8")
+            except (OSError, UnicodeDecodeError):
+                source = None  # unreadable or binary
+        symbols = python_symbols(source, path) if source is not None and path.endswith(".py") else []
+        chunks = split_chunks(path, source, symbols) if source is not None else []
+        with self._lock:
+            self._remove(path)
+            self.files[path] = (stat.st_mtime_ns, stat.st_size)
+            if source is None:
+                return 0
+            ids = []
+            for chunk in chunks:
+                chunk_id, self._next_id = self._next_id, self._next_id + 1
+                self.chunks[chunk_id] = chunk
+                ids.append(chunk_id)
+                self.total_length += chunk.length
+                for term, count in chunk.terms.items():
+                    self.postings[term][chunk_id] = count
+                for gram in trigrams(chunk.text):
+                    self.grams[gram].add(chunk_id)
+            self.file_chunks[path] = ids
+            self.symbols[path] = symbols
+            self.indexed += 1
+        return 1
+
+    def _remove(self, path: str) -> None:
+        self.files.pop(path, None)
+        self.symbols.pop(path, None)
+        for chunk_id in self.file_chunks.pop(path, []):
+            chunk = self.chunks.pop(chunk_id)
+            self.total_length -= chunk.length
+            for term in chunk.terms:
+                postings = self.postings[term]
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+            for gram in trigrams(chunk.text):
+                ids = self.grams[gram]
+                ids.discard(chunk_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def _containing(self, literal: str) -> Set[int]:
+        """Chunks containing `literal` (case-insensitive), narrowed down by trigrams first."""
+        literal = literal.lower()
+        grams = trigrams(literal)
+        if not grams:
+            return set()
+        candidates = set.intersection(*(self.grams.get(gram, set()) for gram in grams))
+        return {i for i in candidates if literal in self.chunks[i].text.lower()}
+
+    def search(self, query: str, k: int = 5) -> List[dict]:
+        """
+        The `k` chunks most relevant to `query`: BM25 over identifiers, boosted
+        for chunks that contain the query literally or define a matching symbol.
+        """
+        self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self.chunks)
+            if not count:
+                return []
+            average = self.total_length / count
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    length = self.chunks[chunk_id].length
+                    scores[chunk_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average))
+            for chunk_id in self._containing(query.strip()):
+                scores[chunk_id] += 5.0
+            for chunk_id, score in list(scores.items()):
+                symbol = self.chunks[chunk_id].symbol
+                if symbol and symbol.lower() in terms:
+                    scores[chunk_id] = score + 3.0
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [self._hit(self.chunks[chunk_id], score) for chunk_id, score in best]
+
+    def _hit(self, chunk: Chunk, score: float) -> dict:
+        lines = chunk.text.split("\n")
+        snippet = "\n".join(lines[:SNIPPET_LINES])
+        if len(lines) > SNIPPET_LINES:
+            snippet += f"\n# ... {len(lines) - SNIPPET_LINES} more lines"
+        return {"path": chunk.path, "start_line": chunk.start, "end_line": chunk.end, "symbol": chunk.symbol,
+                "score": round(score, 3), "snippet": snippet}
+
+    def find_symbol(self, name: str) -> List[dict]:
+        """Symbols named `name` (or `Class.name`) across the workspace."""
+        self.refresh()
+        with self._lock:
+            return [s for symbols in self.symbols.values() for s in symbols
+                    if s["name"] == name or s["name"].endswith("." + name)]
+
+    def tree(self) -> str:
+        """The indexed files, each with the symbols it defines."""
+        self.refresh()
+        with self._lock:
+            lines = []
+            for path in sorted(self.files):
+                names = [s["name"] for s in self.symbols.get(path, []) if s["kind"] != "method"]
+                lines.append(f"{path}" + (f": {', '.join(names)}" if names else ""))
+            return "\n".join(lines)
+
+    def context_for(self, query: str, k: int = 5, max_chars: int = 4000) -> str:
+        """The top `k` snippets for a prompt, within `max_chars`."""
+        sections, used = [], 0
+        for hit in self.search(query, k):
+            label = f"{hit['path']}:{hit['start_line']}-{hit['end_line']}"
+            if hit["symbol"]:
+                label += f" ({hit['symbol']})"
+            section = f"### {label}\n```\n{hit['snippet']}\n```"
+            if used + len(section) > max_chars:
+                break
+            sections.append(section)
+            used += len(section)
+        return "\n\n".join(sections)
+
+    def stats(self) -> dict:
+        return {"files": len(self.files), "chunks": len(self.chunks), "terms": len(self.postings),
+                "indexed": self.indexed}
+
+
+_indexes: "OrderedDict[str, CodeIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root) -> CodeIndex:
+    """
+    The shared index of a workspace root (a path or a Workspace). At most
+    CACHE_SIZE indexes are kept; close_code_index drops one explicitly.
+    """
+    workspace = root if isinstance(root, Workspace) else Workspace(root)
+    with _indexes_lock:
+        index = _indexes.get(workspace.root)
+        if index is None:
+            index = _indexes[workspace.root] = CodeIndex(workspace)
+            while len(_indexes) > CACHE_SIZE:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(workspace.root)
+    index.watch(workspace)
+    return index
+
+
+def close_code_index(root) -> bool:
+    """Forget the index of a workspace root (e.g. when its sprint ends); False if there was none."""
+    path = root.root if isinstance(root, Workspace) else os.path.realpath(root)
+    with _indexes_lock:
+        return _indexes.pop(path, None) is not None
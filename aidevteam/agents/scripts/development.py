@@ -1,6 +1,57 @@
-from typing import Dict, List
+import asyncio
+import inspect
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from aidevteam.agents.state import SprintState, UserStory
+from aidevteam.agents.structures import Backlog
+from aidevteam.agents.scripts.sandbox import TestRun, get_qa_sandbox
+from aidevteam.api.metrics import instrument_phase
 
+def select_next_story(state: SprintState) -> Dict:
+    """
+    Picks the first TODO story of the backlog as the current story.
+    """
+    for story in state.get("backlog", []):
+        if story.status == "TODO":
+            return {"current_story_id": story.id}
+    return {"current_story_id": state.get("current_story_id", "")}
+
+def index_backlog(backlog: Union[Backlog, List[UserStory]]) -> Backlog:
+    """
+    Indexes the backlog by story id for O(1) lookups (no copy if it already is one).
+    """
+    return Backlog.coerce(backlog)
+
+def run_story(story: UserStory) -> Tuple[Dict[str, str], Optional[TestRun]]:
+    """
+    Implements and QA's a single story, returning its artifacts and the test
+    run (None when the QA sandbox is disabled).
+    """
+    # 1. Simulate Developer coding
+    code_artifact = f"def health_check():\n    return {{'status': 'healthy'}}"
+    tests = "from main import health_check\n\n\ndef test_health_check():\n    assert health_check() == {'status': 'healthy'}\n"
+    
+    # 2. QA runs the tests in the sandbox (cached while code and tests are unchanged)
+    sandbox = get_qa_sandbox()
+    result = sandbox.run({"main.py": code_artifact, "test_main.py": tests}) if sandbox is not None else None
+    if result is None:
+        test_report = f"Tests for {story.id}: not executed (QA sandbox disabled)"
+    else:
+        test_report = f"Tests for {story.id}: {result.summary()}\n" + "\n".join(
+            f"- {test['id']}: {test['outcome'].upper()}" for test in result.tests
+        )
+    
+    return {
+        "source_code": code_artifact,
+        "test_report": test_report
+    }, result
+
+def implement_story(story: UserStory, state: SprintState) -> Dict[str, str]:
+    """
+    Implements and QA's a single story, returning its artifacts.
+    """
+    return run_story(story)[0]
+
+@instrument_phase("development")
 def development_workflow(state: SprintState) -> Dict:
     """
     Orchestrates the Development and QA phase.
@@ -12,28 +63,81 @@ def development_workflow(state: SprintState) -> Dict:
     story_id = state.get("current_story_id", "STORY-001")
     print(f"[Scrum Master] Starting Development for Story: {story_id}")
     
-    # 1. Simulate Developer coding
-    code_artifact = f"def health_check():\n    return {{'status': 'healthy'}}"
+    backlog = index_backlog(state.get("backlog", []))
+    story = backlog.get(story_id)
+    artifacts, result = run_story(story or UserStory(id=story_id, title="", description=""))
     
-    # 2. Simulate QA testing
-    test_report = f"Tests for {story_id}: 100% PASS\n- Unit test: OK\n- Integration test: OK"
+    blockers = list(state.get("blockers", []))
+    if result is None:
+        message = f"Development completed for {story_id}; tests were not executed (QA sandbox disabled)."
+    elif result.passed:
+        message = f"Development and QA completed for {story_id}. Tests: {result.summary()}."
+    else:
+        message = f"Development completed for {story_id}, but QA failed. Tests: {result.summary()}."
+        blockers.append(f"{story_id}: tests failed ({result.summary()})")
     
-    # Update artifacts and story status
-    updated_backlog = []
-    for story in state.get("backlog", []):
-        if story.id == story_id:
-            story.status = "DONE"
-        updated_backlog.append(story)
+    # Update story status on a copy; the backlog shares every other story.
+    # A story whose tests fail stays open.
+    if story is not None and (result is None or result.passed):
+        backlog = backlog.merge([story.model_copy(update={"status": "DONE"})])
         
     return {
-        "backlog": updated_backlog,
-        "artifacts": {
-            "source_code": code_artifact,
-            "test_report": test_report
-        },
+        "backlog": backlog,
+        "artifacts": artifacts,
+        "blockers": blockers,
+        "messages": [{
+            "author": "Scrum Master",
+            "content": message
+        }]
+    }
+
+@instrument_phase("development")
+async def development_batch_workflow(
+    state: SprintState,
+    max_concurrency: int = 4,
+    implement: Optional[Callable[[UserStory, SprintState], Union[Dict[str, str], Awaitable[Dict[str, str]]]]] = None
+) -> Dict:
+    """
+    Orchestrates Development and QA for every TODO story of the backlog at once.
+    Logic:
+    1. Stories are implemented concurrently, at most `max_concurrency` at a time.
+    2. Artifacts are namespaced per story (e.g. "source_code:STORY-001").
+    3. Failed stories keep their status and are reported as blockers; the
+       artifacts of the stories that succeeded are still merged.
+    """
+    implement = implement or implement_story
+    stories = index_backlog(state.get("backlog", []))
+    todo = [story for story in stories if story.status == "TODO"]
+    print(f"[Scrum Master] Starting Development for {len(todo)} stories (concurrency {max_concurrency})")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_story(story: UserStory) -> Dict[str, str]:
+        async with semaphore:
+            if inspect.iscoroutinefunction(implement):
+                return await implement(story, state)
+            return await asyncio.to_thread(implement, story, state)
+    
+    results = await asyncio.gather(*(run_story(story) for story in todo), return_exceptions=True)
+    
+    artifacts: Dict[str, str] = {}
+    blockers: List[str] = []
+    completed: List[UserStory] = []
+    for story, result in zip(todo, results):
+        if isinstance(result, Exception):
+            blockers.append(f"{story.id}: {result}")
+            continue
+        completed.append(story.model_copy(update={"status": "DONE"}))
+        for name, content in result.items():
+            artifacts[f"{name}:{story.id}"] = content
+    
+    return {
+        "backlog": stories.merge(completed),
+        "artifacts": artifacts,
+        "blockers": list(state.get("blockers", [])) + blockers,
         "messages": [{
             "author": "Scrum Master",
-            "content": f"Development and QA completed for {story_id}. 100% test pass."
+            "content": f"Development and QA completed for {len(completed)}/{len(todo)} stories."
         }]
     }
 
@@ -52,5 +156,5 @@ if __name__ == "__main__":
         "is_complete": False
     }
     result = development_workflow(test_state)
-    print(f"Story Status: {result['backlog'][0].status}")
+    print(f"Story Status: {result['backlog'].get('STORY-001').status}")
     print(f"Artifacts: {list(result['artifacts'].keys())}")
@@ -1,17 +1,65 @@
-from typing import List, Union
+import asyncio
+from typing import List, Optional, Union
 from aidevteam.agents.state import SprintState
 from aidevteam.agents.scripts.utils import load_persona
+from aidevteam.agents.scripts.scheduling import AgentScheduler, get_agent_scheduler
 
-def create_agent_node(role_name: str, persona_name: str = None):
+# Number of recent messages included in an agent's prompt
+HISTORY_WINDOW = 10
+
+def build_agent_prompt(role_name: str, state: SprintState, code_context: str = "") -> str:
+    """
+    Renders the parts of the shared state an agent needs as its user prompt.
+    `code_context` holds the repository snippets relevant to the current turn.
+    """
+    history = []
+    for message in state.get("messages", [])[-HISTORY_WINDOW:]:
+        if isinstance(message, dict):
+            history.append(f"- {message.get('author', 'Unknown')}: {message.get('content', '')}")
+        else:
+            history.append(f"- {message}")
+    artifacts = ", ".join(state.get("artifacts", {}).keys()) or "None"
+    
+    return f"""Sprint Goal: {state.get('sprint_goal', 'N/A')}
+Current Story: {state.get('current_story_id') or 'None'}
+Artifacts Available: {artifacts}
+
+Recent Team Messages:
+{chr(10).join(history) or "No previous messages."}
+{f"{chr(10)}Relevant Code:{chr(10)}{code_context}{chr(10)}" if code_context else ""}
+As the {role_name}, respond with your contribution to the sprint."""
+
+def find_code_context(state: SprintState, k: int) -> str:
+    """
+    The `k` snippets of the sprint workspace (`repo_path`) most relevant to
+    the goal, the current story and the latest message.
+    """
+    from aidevteam.agents.scripts.code_index import get_code_index
+    from aidevteam.agents.scripts.workspace import Workspace
+
+    messages = state.get("messages", [])
+    latest = messages[-1] if messages else ""
+    query = " ".join([
+        state.get("sprint_goal", ""),
+        state.get("current_story_id") or "",
+        latest.get("content", "") if isinstance(latest, dict) else str(latest),
+    ])
+    return get_code_index(Workspace.for_state(state)).context_for(query, k)
+
+def create_agent_node(role_name: str, persona_name: str = None, scheduler: Optional[AgentScheduler] = None,
+                      max_tokens: int = 2000, code_context: int = 0):
     """
     Creates a LangGraph-compatible node function for a specific AI role.
     
     Args:
         role_name: The display name of the role for message tracking.
         persona_name: The name of the markdown file to load (defaults to role_name).
+        scheduler: Caps concurrent LLM calls across nodes (defaults to the shared scheduler).
+        max_tokens: Response size limit for the role.
+        code_context: Snippets of the sprint repository added to the prompt (0 disables the search).
         
     Returns:
-        A function that takes SprintState and returns partial state update.
+        An async function that takes SprintState and returns partial state update.
     """
     persona_name = persona_name or role_name
     
@@ -21,32 +69,46 @@ def create_agent_node(role_name: str, persona_name: str = None):
     except FileNotFoundError:
         system_prompt = f"You are the {role_name} of the Scrum team."
         
-    def agent_node(state: SprintState):
+    async def agent_node(state: SprintState):
         """
         The actual node function executed by LangGraph.
+        Role nodes that run in the same graph step share the scheduler's concurrency cap.
         """
-        # This is a placeholder for the actual LLM call logic
-        # In a real implementation, we would call an LLM with the system_prompt
-        # and the messages from the state.
-        
-        last_message = state["messages"][-1] if state["messages"] else "No previous messages."
+        code = ""
+        if code_context and state.get("repo_path"):
+            code = await asyncio.to_thread(find_code_context, state, code_context)
+        content = await (scheduler or get_agent_scheduler()).submit(
+            system_prompt, build_agent_prompt(role_name, state, code), max_tokens, role=persona_name
+        )
         
-        # Example of agent "thinking" and responding
         response = {
             "author": role_name,
-            "content": f"[Placeholder Response from {role_name}] I have reviewed the state and I am ready to perform my task."
+            "content": content
         }
         
-        # Update messages in state (using Annotated[List, operator.add])
+        # Update messages in state (appended by the append_messages reducer)
         return {
             "messages": [response]
         }
         
     return agent_node
 
-# Example: Initializing nodes for the Scrum team
-PO_NODE = create_agent_node("Product Owner")
-ARCHITECT_NODE = create_agent_node("Software Architect")
-DEV_NODE = create_agent_node("Senior Backend Developer")
-QA_NODE = create_agent_node("QA Engineer")
-SM_NODE = create_agent_node("Scrum Master")
+# Example: Nodes for the Scrum team.
+# They are built lazily on first access (PEP 562) so importing this module
+# does not touch the skills directory.
+_TEAM_NODES = {
+    "PO_NODE": "Product Owner",
+    "ARCHITECT_NODE": "Software Architect",
+    "DEV_NODE": "Senior Backend Developer",
+    "QA_NODE": "QA Engineer",
+    "SM_NODE": "Scrum Master",
+}
+# Roles that work on the code get the most relevant repository snippets
+_CODE_CONTEXT = {"DEV_NODE": 5, "QA_NODE": 5}
+
+def __getattr__(name: str):
+    if name in _TEAM_NODES:
+        node = create_agent_node(_TEAM_NODES[name], code_context=_CODE_CONTEXT.get(name, 0))
+        globals()[name] = node
+        return node
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
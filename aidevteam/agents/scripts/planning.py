@@ -1,6 +1,8 @@
 from typing import Dict, List
 from aidevteam.agents.state import SprintState, UserStory
+from aidevteam.api.metrics import instrument_phase
 
+@instrument_phase("planning")
 def planning_workflow(state: SprintState) -> Dict:
     """
     Orchestrates the Sprint Planning phase.
@@ -1,6 +1,8 @@
 from typing import Dict
 from aidevteam.agents.state import SprintState
+from aidevteam.api.metrics import instrument_phase
 
+@instrument_phase("retro")
 def retro_workflow(state: SprintState) -> Dict:
     """
     Orchestrates the Sprint Retrospective and reporting.
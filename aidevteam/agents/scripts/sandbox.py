@@ -0,0 +1,476 @@
+"""
+Sandboxed test execution for the QA stage.
+
+Generated code and tests are written to a scratch workspace and run with
+pytest in child processes:
+
+- `run_shell` is the process runner behind the `execute_shell` tool: a
+  fresh process group with CPU, memory, file size and open file limits
+  (POSIX), a scrubbed environment (no API keys), and the whole group
+  killed on timeout.
+- Tests are found with `ast` and split into shards that run in parallel,
+  each its own pytest process. A pytest plugin fails any single test
+  that runs past `test_timeout`; the shard as a whole is also killed
+  if it exceeds the budget of all its tests.
+- Results are cached by a hash of the files (and the timeout), so
+  unchanged code and tests are never re-run. Identical runs already in
+  flight are joined rather than started again.
+
+Process limits and a scrubbed environment are NOT an isolation boundary:
+the child can still read any file the server can (its `.env`, other
+processes' /proc entries) and open network connections. Executing
+LLM-generated code is therefore opt-in (QA_SANDBOX=1) and only enabled on
+top of a real isolation layer (QA_SANDBOX_ISOLATION):
+
+- "namespaces" (default): each pytest process runs in fresh user, network,
+  PID, mount, IPC and UTS namespaces (util-linux `unshare`). It has no
+  network, sees only its own processes, and the server's working directory
+  and home (plus QA_SANDBOX_HIDE) are hidden under empty tmpfs mounts.
+- "container": the server itself runs in a disposable container without
+  secrets or network access; nothing is added.
+
+When the layer is unavailable, `get_qa_sandbox` returns None and generated
+tests are not executed.
+"""
+import ast
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from aidevteam.api.cache import ResponseCache
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Environment variables passed through to sandboxed processes
+SAFE_ENV = ("PATH", "LANG", "LC_ALL", "TMPDIR", "SYSTEMROOT")
+
+# Isolation layers generated code may run in (QA_SANDBOX_ISOLATION)
+ISOLATION_MODES = ("namespaces", "container")
+
+# Runs inside the new namespaces: hide the first $1 paths under empty tmpfs mounts, then exec the command
+_HIDE_AND_EXEC = 'n=$1; shift; while [ "$n" -gt 0 ]; do mount -t tmpfs none "$1" || exit 97; shift; n=$((n-1)); done; exec "$@"'
+
+TIMEOUT_PLUGIN = '''
+import os
+import signal
+
+import pytest
+
+TIMEOUT = float(os.environ.get("SANDBOX_TEST_TIMEOUT", "10"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    def expire(signum, frame):
+        pytest.fail(f"Test exceeded the {TIMEOUT:g}s timeout", pytrace=False)
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, TIMEOUT)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+'''
+
+
+class ShellResult:
+    """Exit status and output of one sandboxed command."""
+
+    def __init__(self, returncode: Optional[int], stdout: str, stderr: str, duration: float,
+                 timed_out: bool = False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+
+
+def _limit_resources(cpu_seconds: int, memory_mb: int, file_mb: int = 64, open_files: int = 256):
+    def apply():
+        os.setsid()
+        if resource is None:
+            return
+        for limit, value in ((resource.RLIMIT_CPU, cpu_seconds),
+                             (resource.RLIMIT_AS, memory_mb * 1024 * 1024),
+                             (resource.RLIMIT_FSIZE, file_mb * 1024 * 1024),
+                             (resource.RLIMIT_NOFILE, open_files)):
+            soft, hard = resource.getrlimit(limit)
+            value = value if hard == resource.RLIM_INFINITY else min(value, hard)
+            resource.setrlimit(limit, (value, hard))
+    return apply
+
+
+def _runtime_paths() -> List[str]:
+    """Directories the Python running pytest needs; they cannot be hidden."""
+    import pytest
+    return [os.path.realpath(p) for p in (sys.prefix, sys.base_prefix, sys.executable,
+                                          os.path.dirname(os.path.dirname(pytest.__file__)))]
+
+
+def hidden_paths(keep: Optional[List[str]] = None) -> List[str]:
+    """
+    Directories hidden from namespaced processes: the server's working
+    directory, the home directory and QA_SANDBOX_HIDE (os.pathsep-separated),
+    except those containing the Python runtime or a path in `keep`.
+    """
+    candidates = [os.getcwd(), os.path.expanduser("~")]
+    candidates += [p for p in os.getenv("QA_SANDBOX_HIDE", "").split(os.pathsep) if p]
+    needed = _runtime_paths() + [os.path.realpath(p) for p in keep or []]
+    hidden = []
+    for path in dict.fromkeys(os.path.realpath(p) for p in candidates):
+        if not os.path.isdir(path) or path == "/":
+            continue
+        blocking = [n for n in needed if n == path or n.startswith(path + os.sep)]
+        if blocking:
+            logger.warning("QA sandbox cannot hide %s: it contains %s", path, blocking[0])
+            continue
+        hidden.append(path)
+    return hidden
+
+
+def isolate(command, isolation: Optional[str], keep: Optional[List[str]] = None):
+    """Wrap a command (shell string or argv list) in the given isolation layer."""
+    if isolation in (None, "container"):
+        return command
+    if isolation != "namespaces":
+        raise ValueError(f"Unknown isolation {isolation!r} (expected one of {ISOLATION_MODES})")
+    argv = ["sh", "-c", command] if isinstance(command, str) else list(command)
+    hidden = hidden_paths(keep)
+    return ["unshare", "--user", "--map-root-user", "--net", "--pid", "--fork", "--mount", "--mount-proc",
+            "--ipc", "--uts", "sh", "-c", _HIDE_AND_EXEC, "sh", str(len(hidden)), *hidden, *argv]
+
+
+_namespaces_available: Optional[bool] = None
+
+
+def namespaces_available() -> bool:
+    """Whether unprivileged user and network namespaces can be created here (probed once)."""
+    global _namespaces_available
+    if _namespaces_available is None:
+        try:
+            probe = subprocess.run(isolate(["true"], "namespaces"), capture_output=True, timeout=10)
+            _namespaces_available = probe.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            _namespaces_available = False
+    return _namespaces_available
+
+
+def run_shell(command, cwd: Optional[str] = None, timeout: float = 30.0, memory_mb: int = 2048,
+              env: Optional[Dict[str, str]] = None, isolation: Optional[str] = None) -> ShellResult:
+    """
+    Run a command (a shell string or an argv list) with resource limits.
+
+    The child gets its own process group, which is killed as a whole when
+    `timeout` expires, and only SAFE_ENV plus `env` as its environment.
+    The limits do not isolate it; pass `isolation` ("namespaces") for that.
+    """
+    child_env = {key: os.environ[key] for key in SAFE_ENV if key in os.environ}
+    child_env.update(env or {})
+    command = isolate(command, isolation, keep=[cwd] if cwd else None)
+    start = time.monotonic()
+    process = subprocess.Popen(
+        command, shell=isinstance(command, str), cwd=cwd, env=child_env, text=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+        preexec_fn=_limit_resources(int(timeout) + 1, memory_mb) if os.name == "posix" else None
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+        return ShellResult(process.returncode, stdout, stderr, time.monotonic() - start)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            process.kill()
+        stdout, stderr = process.communicate()
+        return ShellResult(None, stdout, stderr, time.monotonic() - start, timed_out=True)
+
+
+def collect_tests(files: Dict[str, str]) -> List[str]:
+    """pytest node ids of the test functions (and Test* class methods) in test files."""
+    node_ids = []
+    for path, source in sorted(files.items()):
+        name = os.path.basename(path)
+        if not (name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))):
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            node_ids.append(path)  # let pytest report the collection error
+            continue
+        functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+        for node in tree.body:
+            if isinstance(node, functions) and node.name.startswith("test"):
+                node_ids.append(f"{path}::{node.name}")
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                node_ids.extend(
+                    f"{path}::{node.name}::{item.name}" for item in node.body
+                    if isinstance(item, functions) and item.name.startswith("test")
+                )
+    return node_ids
+
+
+class TestRun:
+    """Outcome of running a test suite: per-test results plus totals."""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, tests: Optional[List[dict]] = None, duration: float = 0.0, cached: bool = False,
+                 error: Optional[str] = None):
+        self.tests = tests or []  # {"id", "outcome": passed/failed/error/skipped, "message"}
+        self.duration = duration
+        self.cached = cached
+        self.error = error
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for test in self.tests if test["outcome"] == outcome)
+
+    @property
+    def passed(self) -> bool:
+        return bool(self.tests) and self.error is None and all(
+            test["outcome"] in ("passed", "skipped") for test in self.tests
+        )
+
+    def summary(self) -> str:
+        if self.error and not self.tests:
+            return self.error
+        total = len(self.tests) - self.count("skipped")
+        return f"{self.count('passed')}/{total} passed"
+
+    def to_markdown(self) -> str:
+        lines = ["## Executed Test Results", "",
+                 f"**{self.summary()}** in {self.duration:.2f}s" + (" (cached)" if self.cached else ""), ""]
+        if self.error:
+            lines += [f"Error: {self.error}", ""]
+        for test in self.tests:
+            mark = {"passed": "PASS", "skipped": "SKIP"}.get(test["outcome"], "FAIL")
+            lines.append(f"- {mark} `{test['id']}`" + (f": {test['message']}" if test.get("message") else ""))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {"tests": self.tests, "duration": self.duration, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict, cached: bool = False) -> "TestRun":
+        return cls(data["tests"], data["duration"], cached=cached, error=data.get("error"))
+
+
+def _parse_junit(path: str, node_ids: List[str]) -> List[dict]:
+    # JUnit names a test "dir.test_x.TestY" + "test_z"; map them back to node ids
+    known = {}
+    for node_id in node_ids:
+        path_part, _, rest = node_id.partition("::")
+        names = rest.split("::")
+        classname = ".".join([path_part[:-3].replace("/", ".")] + names[:-1])
+        known[(classname, names[-1])] = node_id
+    tests = []
+    for case in ElementTree.parse(path).getroot().iter("testcase"):
+        classname, name = case.get("classname") or "", case.get("name") or ""
+        if not classname:
+            test_id = f"{name.replace('.', '/')}.py"  # a module that could not be collected
+        else:
+            test_id = known.get((classname, name.split("[")[0]), f"{classname}::{name}")
+        if "[" in name:
+            test_id += name[name.index("["):]
+        outcome, message = "passed", ""
+        for child in case:
+            if child.tag in ("failure", "error", "skipped"):
+                outcome = {"failure": "failed"}.get(child.tag, child.tag)
+                lines = (child.get("message") or "").strip().splitlines()
+                message = lines[0][:200] if lines else ""
+                if message == "collection failure":
+                    # The exception is the last "E " line of the traceback
+                    errors = [l[1:].strip() for l in (child.text or "").splitlines() if l.startswith("E ")]
+                    message = f"{message}: {errors[-1][:200]}" if errors else message
+                break
+        tests.append({"id": test_id, "outcome": outcome, "message": message})
+    return tests
+
+
+class TestSandbox:
+    """Runs pytest suites in parallel shards with limits and a result cache."""
+
+    __test__ = False
+
+    def __init__(self, workers: int = 4, test_timeout: float = 10.0, memory_mb: int = 2048,
+                 cache: Optional[ResponseCache] = None, root: Optional[str] = None,
+                 isolation: Optional[str] = None):
+        self.workers = max(1, workers)
+        self.isolation = isolation
+        self.test_timeout = test_timeout
+        self.memory_mb = memory_mb
+        self.cache = cache if cache is not None else ResponseCache(max_entries=256)
+        self.root = root
+        self.runs = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qa-sandbox")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, files: Dict[str, str]) -> str:
+        payload = json.dumps([sorted(files.items()), self.test_timeout, sys.version_info[:2]])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def run(self, files: Dict[str, str]) -> TestRun:
+        """Run the tests among `files` (path -> source), or return the cached result."""
+        key = self.cache_key(files)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return TestRun.from_dict(json.loads(cached), cached=True)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return TestRun.from_dict(future.result().to_dict(), cached=True)
+        try:
+            result = self._execute(files)
+            if result.error is None or result.tests:
+                self.cache.set(key, json.dumps(result.to_dict()))
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def arun(self, files: Dict[str, str]) -> TestRun:
+        """`run` off the event loop."""
+        return await asyncio.to_thread(self.run, files)
+
+    def _execute(self, files: Dict[str, str]) -> TestRun:
+        node_ids = collect_tests(files)
+        if not node_ids:
+            return TestRun(error="No tests found")
+        self.runs += 1
+        workspace = tempfile.mkdtemp(prefix="qa-sandbox-", dir=self.root)
+        start = time.monotonic()
+        try:
+            for path, source in files.items():
+                target = os.path.realpath(os.path.join(workspace, path))
+                if not target.startswith(os.path.realpath(workspace) + os.sep):
+                    return TestRun(error=f"Refusing to write outside the workspace: {path}")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "w", encoding="utf-8") as f:
+                    f.write(source)
+            with open(os.path.join(workspace, "_sandbox_timeout.py"), "w", encoding="utf-8") as f:
+                f.write(TIMEOUT_PLUGIN)
+
+            shards = [node_ids[i::self.workers] for i in range(min(self.workers, len(node_ids)))]
+            futures = [self._pool.submit(self._run_shard, workspace, i, shard) for i, shard in enumerate(shards)]
+            tests, errors = [], []
+            for shard, future in zip(shards, futures):
+                shard_tests, error = future.result()
+                tests += shard_tests
+                if error:
+                    errors.append(error)
+            return TestRun(tests, time.monotonic() - start, error="; ".join(errors) or None)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    def _run_shard(self, workspace: str, index: int, node_ids: List[str]):
+        report = os.path.join(workspace, f".shard-{index}.xml")
+        command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "_sandbox_timeout",
+                   f"--junitxml={report}", *node_ids]
+        result = run_shell(
+            command, cwd=workspace, timeout=self.test_timeout * len(node_ids) + 10, memory_mb=self.memory_mb,
+            isolation=self.isolation,
+            # Installed pytest plugins are not loaded: they slow startup and do not belong in the sandbox
+            env={"PYTHONPATH": workspace, "HOME": workspace, "PYTHONDONTWRITEBYTECODE": "1",
+                 "PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1", "SANDBOX_TEST_TIMEOUT": str(self.test_timeout)}
+        )
+        if result.timed_out:
+            return ([{"id": node_id, "outcome": "error", "message": "shard timed out"} for node_id in node_ids],
+                    f"shard {index} timed out after {result.duration:.0f}s")
+        if not os.path.exists(report):
+            output = (result.stderr or result.stdout).strip().splitlines()
+            return [], f"pytest exited with {result.returncode}: {output[-1] if output else 'no output'}"
+        return _parse_junit(report, node_ids), None
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "cache": self.cache.stats()}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def extract_python(markdown: str, tests: bool = False) -> str:
+    """
+    Python source from an LLM answer: the ```python blocks (only those
+    defining tests if `tests`, otherwise those that do not), or the whole
+    text if it has no fences and parses as Python.
+    """
+    blocks, inside, current = [], False, []
+    for line in markdown.splitlines():
+        if line.strip().startswith("```"):
+            if inside:
+                blocks.append("\n".join(current))
+                current = []
+            inside = not inside
+            continue
+        if inside:
+            current.append(line)
+    if not blocks:
+        try:
+            ast.parse(markdown)
+            blocks = [markdown]
+        except SyntaxError:
+            return ""
+    chosen = [block for block in blocks if ("def test" in block) == tests]
+    return "\n\n".join(chosen).strip()
+
+
+_qa_sandbox: Optional[TestSandbox] = None
+
+
+def get_qa_sandbox() -> Optional[TestSandbox]:
+    """
+    Process-wide sandbox for generated code, or None unless QA_SANDBOX=1 and
+    the QA_SANDBOX_ISOLATION layer is available (see the module docstring).
+    Configured from the environment: QA_SANDBOX_WORKERS (parallel shards),
+    QA_TEST_TIMEOUT (seconds per test), QA_SANDBOX_MEMORY_MB, QA_CACHE_SIZE
+    and QA_CACHE_PATH (optional SQLite file for the result cache).
+    """
+    global _qa_sandbox
+    if os.getenv("QA_SANDBOX", "0") != "1":
+        return None
+    if _qa_sandbox is None:
+        isolation = os.getenv("QA_SANDBOX_ISOLATION", "namespaces")
+        if isolation not in ISOLATION_MODES:
+            logger.warning("QA sandbox disabled: unknown QA_SANDBOX_ISOLATION=%r", isolation)
+            return None
+        if isolation == "namespaces" and not namespaces_available():
+            logger.warning("QA sandbox disabled: user/network namespaces are unavailable; "
+                           "set QA_SANDBOX_ISOLATION=container only inside a disposable container")
+            return None
+        _qa_sandbox = TestSandbox(
+            isolation=isolation,
+            workers=int(os.getenv("QA_SANDBOX_WORKERS") or min(4, os.cpu_count() or 1)),
+            test_timeout=float(os.getenv("QA_TEST_TIMEOUT", "10")),
+            memory_mb=int(os.getenv("QA_SANDBOX_MEMORY_MB", "2048")),
+            cache=ResponseCache(max_entries=int(os.getenv("QA_CACHE_SIZE", "256")),
+                                path=os.getenv("QA_CACHE_PATH") or None)
+        )
+    return _qa_sandbox
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import weakref
+from typing import Dict, Optional
+
+class AgentScheduler:
+    """
+    Caps how many LLM requests from agent nodes run at once.
+    
+    Role nodes that LangGraph runs in the same superstep submit their
+    requests together; each request is still its own LLM call (a chat
+    completion takes a single conversation), the scheduler only keeps at
+    most `max_concurrency` of them in flight across the process. Rate
+    limits are left to the LLM client's provider-level limiter.
+    
+    The scheduler is shared by the whole process, so its semaphore is
+    created lazily for each event loop that uses it.
+    """
+    
+    def __init__(self, llm=None, max_concurrency: int = 8):
+        self._llm = llm
+        self.max_concurrency = max_concurrency
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+    
+    @property
+    def llm(self):
+        """The LLM client, resolved lazily so constructing nodes needs no API key."""
+        if self._llm is None:
+            from aidevteam.api.llm_client import get_async_llm_client
+            self._llm = get_async_llm_client()
+        return self._llm
+    
+    async def submit(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                     role: Optional[str] = None) -> str:
+        """Run a request once a concurrency slot is free and return its response; `role` picks the model route."""
+        self.requests += 1
+        async with self._semaphore():
+            self.in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+            try:
+                return await self.llm.agenerate(system_prompt, user_prompt, max_tokens, role=role)
+            finally:
+                self.in_flight -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "in_flight": self.in_flight, "peak_concurrency": self.peak_concurrency}
+
+_default_scheduler: Optional[AgentScheduler] = None
+
+def get_agent_scheduler() -> AgentScheduler:
+    """
+    Returns the process-wide scheduler shared by all agent nodes.
+    Configured via AGENT_MAX_CONCURRENCY; request rates are limited by the
+    LLM client (LLM_RPM / LLM_TPM).
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = AgentScheduler(max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", "8")))
+    return _default_scheduler
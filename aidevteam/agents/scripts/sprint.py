@@ -0,0 +1,63 @@
+from functools import partial
+from typing import Optional
+from aidevteam.agents.graph import PhaseGraph
+from aidevteam.agents.state import SprintState
+from aidevteam.agents.scripts.planning import planning_workflow
+from aidevteam.agents.scripts.development import development_workflow, development_batch_workflow, select_next_story
+from aidevteam.agents.scripts.retro import retro_workflow
+
+def build_sprint_graph(max_concurrency: Optional[int] = None, batch: bool = False,
+                       story_concurrency: int = 4) -> PhaseGraph:
+    """
+    Wires the Scrum workflows into a dependency graph.
+    Each phase declares the SprintState keys it reads and writes; the graph
+    derives the ordering and merges updates through the state reducers.
+    With batch=True every TODO story is developed concurrently instead of
+    only the current one.
+    """
+    graph = PhaseGraph(SprintState, max_concurrency=max_concurrency)
+    graph.add_phase(
+        "planning", planning_workflow,
+        inputs=["sprint_goal"],
+        outputs=["backlog", "artifacts", "messages"]
+    )
+    if batch:
+        graph.add_phase(
+            "development", partial(development_batch_workflow, max_concurrency=story_concurrency),
+            inputs=["backlog", "blockers"],
+            outputs=["backlog", "artifacts", "blockers", "messages"]
+        )
+    else:
+        graph.add_phase(
+            "select_story", select_next_story,
+            inputs=["backlog", "current_story_id"],
+            outputs=["current_story_id"]
+        )
+        graph.add_phase(
+            "development", development_workflow,
+            inputs=["current_story_id", "backlog", "blockers"],
+            outputs=["backlog", "artifacts", "blockers", "messages"]
+        )
+    graph.add_phase(
+        "retro", retro_workflow,
+        inputs=["sprint_goal", "backlog", "artifacts"],
+        outputs=["artifacts", "is_complete", "messages"]
+    )
+    return graph
+
+if __name__ == "__main__":
+    graph = build_sprint_graph()
+    print(f"Execution waves: {graph.layers()}")
+    test_state: SprintState = {
+        "sprint_goal": "A health check API",
+        "backlog": [],
+        "artifacts": {},
+        "messages": [],
+        "current_story_id": "",
+        "repo_path": "./",
+        "blockers": [],
+        "is_complete": False
+    }
+    result = graph.run(test_state)
+    print(f"Is Complete: {result['is_complete']}")
+    print(f"Artifacts: {list(result['artifacts'].keys())}")
@@ -1,43 +1,119 @@
-from typing import Any, Dict
-from langchain_core.tools import tool
-
-@tool
-def read_file(path: str) -> str:
-    """Reads the content of a file at the given path."""
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        return f"Error reading file: {str(e)}"
-
-@tool
-def write_file(path: str, content: str) -> str:
-    """Writes the content to a file at the given path."""
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
-        return f"Successfully wrote to {path}"
-    except Exception as e:
-        return f"Error writing file: {str(e)}"
+from typing import Any, Dict, List, Optional
+from langchain_core.tools import BaseTool, StructuredTool, tool
+from aidevteam.agents.scripts.code_index import get_code_index
+from aidevteam.agents.scripts.workspace import Workspace
 
 @tool
 def execute_shell(command: str) -> str:
     """
     Executes a shell command and returns the output.
-    USE WITH CAUTION.
+    USE WITH CAUTION. Runs with CPU/memory limits, without secrets in the
+    environment, and is killed after 30 seconds.
     """
-    import subprocess
+    from aidevteam.agents.scripts.sandbox import run_shell
     try:
-        result = subprocess.run(
-            command, 
-            shell=True, 
-            capture_output=True, 
-            text=True, 
-            timeout=30
-        )
+        result = run_shell(command, timeout=30)
+        if result.timed_out:
+            return f"Error executing command: timed out after 30 seconds\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
         return f"STDOUT: {result.stdout}\nSTDERR: {result.stderr}"
     except Exception as e:
         return f"Error executing command: {str(e)}"
 
-# Collection of tools for agents
-CORE_TOOLS = [read_file, write_file, execute_shell]
+def _format_hits(hits: List[dict]) -> str:
+    if not hits:
+        return "No matches."
+    return "\n\n".join(
+        f"{hit['path']}:{hit['start_line']}-{hit['end_line']}" + (f" ({hit['symbol']})" if hit["symbol"] else "")
+        + f"\n{hit['snippet']}" for hit in hits
+    )
+
+def _format_batch(done: List[str], errors: Dict[str, str], verb: str) -> str:
+    lines = [f"{verb} {path}" for path in done]
+    lines += [f"Error with {path}: {error}" for path, error in errors.items()]
+    return "\n".join(lines) or "No files given."
+
+def workspace_tools(workspace: Workspace) -> List[BaseTool]:
+    """
+    File tools confined to a sprint workspace.
+    Each tool runs in a worker thread when awaited (`ainvoke`), so agents
+    can call them from the event loop; the batch tools move many files per call.
+    """
+    def read_file(path: str, offset: int = 0, length: Optional[int] = None) -> str:
+        try:
+            return workspace.read(path, offset, length)
+        except Exception as e:
+            return f"Error reading file: {str(e)}"
+
+    async def aread_file(path: str, offset: int = 0, length: Optional[int] = None) -> str:
+        try:
+            return await workspace.aread(path, offset, length)
+        except Exception as e:
+            return f"Error reading file: {str(e)}"
+
+    def write_file(path: str, content: str) -> str:
+        try:
+            return f"Successfully wrote to {workspace.write(path, content)}"
+        except Exception as e:
+            return f"Error writing file: {str(e)}"
+
+    async def awrite_file(path: str, content: str) -> str:
+        try:
+            return f"Successfully wrote to {await workspace.awrite(path, content)}"
+        except Exception as e:
+            return f"Error writing file: {str(e)}"
+
+    def format_contents(contents: Dict[str, str], errors: Dict[str, str]) -> str:
+        sections = [f"=== {path} ===\n{content}" for path, content in contents.items()]
+        sections += [f"=== {path} ===\nError reading file: {error}" for path, error in errors.items()]
+        return "\n\n".join(sections) or "No files given."
+
+    def read_files(paths: List[str]) -> str:
+        return format_contents(*workspace.read_many(paths))
+
+    async def aread_files(paths: List[str]) -> str:
+        return format_contents(*await workspace.aread_many(paths))
+
+    def write_files(files: Dict[str, str]) -> str:
+        return _format_batch(*workspace.write_many(files), "Successfully wrote to")
+
+    async def awrite_files(files: Dict[str, str]) -> str:
+        return _format_batch(*await workspace.awrite_many(files), "Successfully wrote to")
+
+    index = get_code_index(workspace)
+
+    def search_code(query: str, k: int = 5) -> str:
+        try:
+            return _format_hits(index.search(query, k))
+        except Exception as e:
+            return f"Error searching code: {str(e)}"
+
+    def list_files(path: str = ".") -> str:
+        try:
+            return "\n".join(workspace.list_files(path)) or "No files."
+        except Exception as e:
+            return f"Error listing files: {str(e)}"
+
+    return [
+        StructuredTool.from_function(
+            read_file, coroutine=aread_file, name="read_file",
+            description="Reads a file in the workspace. Pass offset/length (in bytes) to read part of a large file."),
+        StructuredTool.from_function(
+            write_file, coroutine=awrite_file, name="write_file",
+            description="Writes the content to a file in the workspace, replacing it atomically."),
+        StructuredTool.from_function(
+            read_files, coroutine=aread_files, name="read_files",
+            description="Reads several files in the workspace in one call."),
+        StructuredTool.from_function(
+            write_files, coroutine=awrite_files, name="write_files",
+            description="Writes several files in the workspace in one call (a mapping of path to content)."),
+        StructuredTool.from_function(
+            list_files, name="list_files",
+            description="Lists the files under a directory of the workspace."),
+        StructuredTool.from_function(
+            search_code, name="search_code",
+            description="Searches the workspace code and returns the most relevant snippets with their line ranges."),
+    ]
+
+def core_tools(workspace: Workspace) -> List[BaseTool]:
+    """Collection of tools for an agent working in a sprint workspace: its file tools and the shell."""
+    return workspace_tools(workspace) + [execute_shell]
@@ -1,5 +1,81 @@
 import os
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+SKILLS_DIR = Path(__file__).parent.parent / "skills"
+
+def _normalize(role_name: str) -> str:
+    return role_name.replace(' ', '_').lower()
+
+class PersonaRegistry:
+    """
+    Caches persona files from the skills directory.
+    
+    The directory is scanned once and file contents are cached. With
+    hot_reload enabled (PERSONA_HOT_RELOAD=1, the default) each lookup does a
+    single stat and re-reads the file only when its mtime changed, so edits
+    to a persona are picked up without a restart; with it disabled, cached
+    personas are served without touching the filesystem.
+    """
+    
+    def __init__(self, skills_dir: Optional[Path] = None, hot_reload: Optional[bool] = None):
+        self.skills_dir = Path(skills_dir) if skills_dir else SKILLS_DIR
+        if hot_reload is None:
+            hot_reload = os.getenv("PERSONA_HOT_RELOAD", "1").lower() in ("1", "true", "yes")
+        self.hot_reload = hot_reload
+        self._index: Optional[Dict[str, Path]] = None
+        self._cache: Dict[Path, Tuple[int, str]] = {}
+    
+    def scan(self) -> Dict[str, Path]:
+        """(Re)builds the name -> path index with a single directory listing."""
+        index: Dict[str, Path] = {}
+        if self.skills_dir.is_dir():
+            with os.scandir(self.skills_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(".md"):
+                        stem = entry.name[:-3]
+                        index[stem] = Path(entry.path)
+                        index.setdefault(_normalize(stem), Path(entry.path))
+        self._index = index
+        return index
+    
+    def _find(self, role_name: str) -> Optional[Path]:
+        index = self._index if self._index is not None else self.scan()
+        return index.get(role_name) or index.get(_normalize(role_name))
+    
+    def get(self, role_name: str) -> str:
+        """
+        Returns the persona for a role, reading the file only when needed.
+        
+        Raises:
+            FileNotFoundError: If the persona file does not exist.
+        """
+        path = self._find(role_name)
+        if path is None and self.hot_reload:
+            # A persona may have been added since the last scan
+            self.scan()
+            path = self._find(role_name)
+        if path is None:
+            raise FileNotFoundError(f"Persona file for role '{role_name}' not found in {self.skills_dir}")
+        
+        cached = self._cache.get(path)
+        if cached is not None and not self.hot_reload:
+            return cached[1]
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._cache.pop(path, None)
+            self.scan()
+            raise FileNotFoundError(f"Persona file for role '{role_name}' not found in {self.skills_dir}")
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self._cache[path] = (mtime, content)
+        return content
+
+persona_registry = PersonaRegistry()
 
 def load_persona(role_name: str) -> str:
     """
@@ -14,23 +90,7 @@ def load_persona(role_name: str) -> str:
     Raises:
         FileNotFoundError: If the persona file does not exist.
     """
-    # Assuming the script is run from the project root or aidevteam dir
-    # we use an absolute-friendly path logic
-    base_dir = Path(__file__).parent.parent
-    skills_dir = base_dir / "skills"
-    
-    # Try different naming conventions
-    possible_files = [
-        skills_dir / f"{role_name}.md",
-        skills_dir / f"{role_name.replace(' ', '_').lower()}.md"
-    ]
-    
-    for file_path in possible_files:
-        if file_path.exists():
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-                
-    raise FileNotFoundError(f"Persona file for role '{role_name}' not found in {skills_dir}")
+    return persona_registry.get(role_name)
 
 if __name__ == "__main__":
     # Quick test
@@ -0,0 +1,188 @@
+"""
+Sprint workspaces: the files an agent may read and write during a sprint.
+
+A `Workspace` confines every path to one root directory (the sprint's
+`repo_path`), writes files atomically and reads them whole, by byte range
+or as a stream of chunks; large files are read through mmap so a ranged
+read only touches the pages it returns. Every blocking call has an async
+twin that runs in a worker thread, and the batch calls (`read_many`,
+`write_many`) move a whole set of files in a single thread hop, so tool-heavy
+developer turns never block the event loop.
+"""
+import asyncio
+import mmap
+import os
+import tempfile
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# Files at least this large are read through mmap
+MMAP_THRESHOLD = 1 << 20
+# Default chunk size of streamed reads
+CHUNK_SIZE = 64 * 1024
+
+
+def workspaces_root() -> str:
+    """Directory holding the per-sprint workspaces (SPRINT_WORKSPACE_ROOT)."""
+    return os.getenv("SPRINT_WORKSPACE_ROOT", "workspaces")
+
+
+class Workspace:
+    """
+    A directory that sprint tools operate in.
+
+    Paths are relative to `root`; anything resolving outside it (absolute
+    paths, `..`, symlinks pointing elsewhere) raises PermissionError.
+    Callbacks registered with `on_write` receive the relative path of every
+    file written through the workspace.
+    """
+
+    def __init__(self, root: str, mmap_threshold: int = MMAP_THRESHOLD):
+        os.makedirs(root, exist_ok=True)
+        self.root = os.path.realpath(root)
+        self.mmap_threshold = mmap_threshold
+        self._listeners: List[Callable[[str], None]] = []
+
+    @classmethod
+    def for_state(cls, state: Mapping) -> "Workspace":
+        """The workspace of a sprint, rooted at its `repo_path`."""
+        return cls(state.get("repo_path") or ".")
+
+    @classmethod
+    def for_sprint(cls, sprint_id: str, base: Optional[str] = None) -> "Workspace":
+        """A fresh workspace for one sprint under SPRINT_WORKSPACE_ROOT."""
+        return cls(os.path.join(base or workspaces_root(), sprint_id))
+
+    def resolve(self, path: str) -> str:
+        """Absolute path of `path` inside the workspace."""
+        full = os.path.realpath(os.path.join(self.root, path))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            raise PermissionError(f"{path} is outside the workspace")
+        return full
+
+    def relative(self, path: str) -> str:
+        return os.path.relpath(self.resolve(path), self.root)
+
+    def on_write(self, callback: Callable[[str], None]) -> None:
+        self._listeners.append(callback)
+
+    # Blocking calls
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(self.resolve(path))
+
+    def read_bytes(self, path: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Read `length` bytes from `offset` (to the end of the file when None)."""
+        full = self.resolve(path)
+        with open(full, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if length is None else min(size, offset + length)
+            if offset >= end:
+                return b""
+            if size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[offset:end]
+            f.seek(offset)
+            return f.read(end - offset)
+
+    def read(self, path: str, offset: int = 0, length: Optional[int] = None) -> str:
+        """Read a file (or a byte range of it) as text; a range may split a character."""
+        return self.read_bytes(path, offset, length).decode("utf-8", errors="replace")
+
+    def iter_chunks(self, path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the file in chunks of at most `chunk_size` bytes, from one handle (and mapping)."""
+        with open(self.resolve(path), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size and size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset in range(0, size, chunk_size):
+                        yield mapped[offset:offset + chunk_size]
+                return
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def write(self, path: str, content: str) -> str:
+        """
+        Atomically replace a file: readers see the old or the new content,
+        never a partial write. Returns the relative path written.
+        """
+        full = self.resolve(path)
+        directory = os.path.dirname(full)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(full)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            if os.path.exists(full):
+                os.chmod(tmp, os.stat(full).st_mode & 0o777)
+            else:
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, full)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        relative = os.path.relpath(full, self.root)
+        for callback in self._listeners:
+            callback(relative)
+        return relative
+
+    def read_many(self, paths: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Read several files; returns (contents, errors), both keyed by the requested path."""
+        contents, errors = {}, {}
+        for path in paths:
+            try:
+                contents[path] = self.read(path)
+            except (OSError, ValueError) as e:
+                errors[path] = str(e)
+        return contents, errors
+
+    def write_many(self, files: Mapping[str, str]) -> Tuple[List[str], Dict[str, str]]:
+        """Write several files (each atomically); returns (written, errors)."""
+        written, errors = [], {}
+        for path, content in files.items():
+            try:
+                written.append(self.write(path, content))
+            except (OSError, ValueError) as e:
+                errors[path] = str(e)
+        return written, errors
+
+    def list_files(self, path: str = ".", skip_dirs: Iterable[str] = ()) -> List[str]:
+        """Relative paths of the files under `path`, skipping hidden entries and `skip_dirs` (not walked)."""
+        start = self.resolve(path)
+        skip = set(skip_dirs)
+        found = []
+        for directory, dirs, files in os.walk(start):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in skip)
+            for name in sorted(files):
+                if not name.startswith("."):
+                    found.append(os.path.relpath(os.path.join(directory, name), self.root))
+        return found
+
+    # Async twins (run in a worker thread)
+
+    async def aread(self, path: str, offset: int = 0, length: Optional[int] = None) -> str:
+        return await asyncio.to_thread(self.read, path, offset, length)
+
+    async def awrite(self, path: str, content: str) -> str:
+        return await asyncio.to_thread(self.write, path, content)
+
+    async def aread_many(self, paths: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        return await asyncio.to_thread(self.read_many, list(paths))
+
+    async def awrite_many(self, files: Mapping[str, str]) -> Tuple[List[str], Dict[str, str]]:
+        return await asyncio.to_thread(self.write_many, dict(files))
+
+    async def astream(self, path: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Stream a file chunk by chunk without holding it in memory."""
+        chunks = self.iter_chunks(path, chunk_size)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
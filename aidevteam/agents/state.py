@@ -1,6 +1,8 @@
-import operator
-from typing import Annotated, List, TypedDict, Union
+from typing import Annotated, List, TypedDict
 from pydantic import BaseModel, Field
+from aidevteam.agents.structures import (
+    ArtifactMap, Backlog, MessageLog, append_messages, merge_artifacts, merge_backlog
+)
 
 class UserStory(BaseModel):
     id: str = Field(description="Unique identifier for the user story")
@@ -14,11 +16,11 @@ class SprintState(TypedDict):
     """
     The shared state for the AI Scrum Team orchestration.
     """
-    # Messaging history between agents
-    messages: Annotated[List[Union[str, dict]], operator.add]
+    # Messaging history between agents (str or dict entries; updates append)
+    messages: Annotated[MessageLog, append_messages]
     
-    # The sprint backlog (list of user stories)
-    backlog: List[UserStory]
+    # The sprint backlog (user stories keyed by id; updates upsert by id)
+    backlog: Annotated[Backlog, merge_backlog]
     
     # Current active story ID
     current_story_id: str
@@ -27,8 +29,8 @@ class SprintState(TypedDict):
     repo_path: str
     
     # Shared artifacts (Design docs, test reports, etc.)
-    # Mapping of artifact_name -> artifact_content (or path)
-    artifacts: Annotated[dict, operator.ior]
+    # Mapping of artifact_name -> artifact_content (or path); updates merge
+    artifacts: Annotated[ArtifactMap, merge_artifacts]
     
     # The current goal of the sprint
     sprint_goal: str
@@ -0,0 +1,292 @@
+"""
+Structurally shared containers for SprintState.
+
+Merging a phase's update used to copy the whole value every step:
+`operator.add` concatenates the message list and workflows rebuilt the
+backlog list, so long sprints were quadratic. These containers are
+immutable views over shared, append-only storage instead:
+
+- MessageLog: chunked append-only log. Appending to the newest view writes
+  into the shared chunks; older views keep their own length.
+- ArtifactMap: copy-on-write mapping. Each key keeps its (version, value)
+  history, so an older view still sees the values it was created with.
+- Backlog: stories keyed by id on the same versioned storage, iterated in
+  insertion order like the list it replaces.
+
+Updating the newest view costs O(size of the update). Updating an older
+view (a branch, e.g. two phases merging from the same snapshot) first
+copies its live entries, so every view stays valid. The reducers at the
+bottom plug the containers into SprintState.
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class _LogBuffer:
+    """Chunks shared by every view of a MessageLog; all but the last are full."""
+
+    __slots__ = ("chunks", "length")
+
+    def __init__(self):
+        self.chunks: List[list] = []
+        self.length = 0
+
+
+class MessageLog(Sequence):
+    """Append-only message history with O(k) appends and O(1) indexing."""
+
+    __slots__ = ("_buffer", "_length")
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, items: Iterable = ()):
+        self._buffer = _LogBuffer()
+        self._length = self._push(self._buffer, items)
+
+    @classmethod
+    def _view(cls, buffer: _LogBuffer, length: int) -> "MessageLog":
+        log = cls.__new__(cls)
+        log._buffer = buffer
+        log._length = length
+        return log
+
+    @classmethod
+    def coerce(cls, value: Optional[Iterable]) -> "MessageLog":
+        return value if isinstance(value, cls) else cls(value or ())
+
+    def _push(self, buffer: _LogBuffer, items: Iterable) -> int:
+        chunks = buffer.chunks
+        for item in items:
+            if not chunks or len(chunks[-1]) >= self.CHUNK_SIZE:
+                chunks.append([])
+            chunks[-1].append(item)
+            buffer.length += 1
+        return buffer.length
+
+    def extend(self, items: Iterable) -> "MessageLog":
+        """A new log with `items` appended; this one is unchanged."""
+        buffer = self._buffer
+        if self._length != buffer.length:
+            # Branching from an older view: share its full chunks, copy the partial one
+            full, rest = divmod(self._length, self.CHUNK_SIZE)
+            branch = _LogBuffer()
+            branch.chunks = buffer.chunks[:full] + ([buffer.chunks[full][:rest]] if rest else [])
+            branch.length = self._length
+            buffer = branch
+        return self._view(buffer, self._push(buffer, items))
+
+    def __add__(self, items: Iterable) -> "MessageLog":
+        return self.extend(items)
+
+    def __radd__(self, items: Iterable) -> "MessageLog":
+        return MessageLog(items).extend(self)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MessageLog index out of range")
+        chunk, offset = divmod(index, self.CHUNK_SIZE)
+        return self._buffer.chunks[chunk][offset]
+
+    def __iter__(self) -> Iterator:
+        remaining = self._length
+        for chunk in self._buffer.chunks:
+            if remaining <= 0:
+                return
+            if len(chunk) <= remaining:
+                yield from chunk
+            else:
+                yield from chunk[:remaining]
+            remaining -= len(chunk)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+
+class _VersionedEntries:
+    """Storage shared by the views of one ArtifactMap/Backlog lineage."""
+
+    __slots__ = ("history", "version")
+
+    def __init__(self):
+        # key -> [(version, value), ...] in increasing version order
+        self.history: dict = {}
+        self.version = 0
+
+
+class _VersionedView:
+    """A read-only snapshot of versioned entries at one version."""
+
+    __slots__ = ("_entries", "_version", "_len")
+
+    def _reset(self) -> None:
+        self._entries = _VersionedEntries()
+        self._version = 0
+        self._len = 0
+
+    @classmethod
+    def _make(cls, entries: _VersionedEntries, version: int, length: int):
+        view = cls.__new__(cls)
+        view._entries = entries
+        view._version = version
+        view._len = length
+        return view
+
+    def _lookup(self, key: Any) -> Any:
+        history = self._entries.history.get(key)
+        if history is not None:
+            for version, value in reversed(history):
+                if version <= self._version:
+                    return value
+        return _MISSING
+
+    def _live_items(self) -> Iterator[Tuple[Any, Any]]:
+        for key, history in self._entries.history.items():
+            if history[0][0] > self._version:
+                continue
+            if history[-1][0] <= self._version:
+                yield key, history[-1][1]
+            else:
+                yield key, self._lookup(key)
+
+    def _with(self, pairs: Iterable[Tuple[Any, Any]]):
+        entries, length = self._entries, self._len
+        if self._version != entries.version:
+            branch = _VersionedEntries()
+            branch.history = {key: [(0, value)] for key, value in self._live_items()}
+            entries = branch
+        entries.version += 1
+        version = entries.version
+        for key, value in pairs:
+            history = entries.history.get(key)
+            if history is None:
+                entries.history[key] = [(version, value)]
+                length += 1
+            elif history[-1][0] == version:
+                history[-1] = (version, value)
+            else:
+                history.append((version, value))
+        return self._make(entries, version, length)
+
+    def descends_from(self, other: "_VersionedView") -> bool:
+        """True if this view was derived from `other` by updates alone."""
+        return self._entries is other._entries and self._version >= other._version
+
+    def __len__(self) -> int:
+        return self._len
+
+
+class ArtifactMap(_VersionedView, Mapping):
+    """Copy-on-write artifact name -> content mapping; `|` returns a new map."""
+
+    __slots__ = ()
+
+    def __init__(self, items: Any = ()):
+        self._reset()
+        if items:
+            merged = self.merge(items)
+            self._entries, self._version, self._len = merged._entries, merged._version, merged._len
+
+    @classmethod
+    def coerce(cls, value: Any) -> "ArtifactMap":
+        return value if isinstance(value, cls) else cls(value or ())
+
+    def merge(self, other: Any) -> "ArtifactMap":
+        """A new map with `other`'s entries added or replaced; this one is unchanged."""
+        return self._with(other.items() if isinstance(other, Mapping) else other)
+
+    def __or__(self, other: Any) -> "ArtifactMap":
+        return self.merge(other)
+
+    def __ror__(self, other: Any) -> "ArtifactMap":
+        return ArtifactMap(other).merge(self)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def __iter__(self) -> Iterator:
+        for key, _ in self._live_items():
+            yield key
+
+    def __repr__(self) -> str:
+        return f"ArtifactMap({dict(self._live_items())!r})"
+
+
+class Backlog(_VersionedView):
+    """User stories keyed by id; iterates the stories in the order they were added."""
+
+    __slots__ = ()
+
+    def __init__(self, stories: Iterable = ()):
+        self._reset()
+        stories = list(stories)
+        if stories:
+            merged = self.merge(stories)
+            self._entries, self._version, self._len = merged._entries, merged._version, merged._len
+
+    @classmethod
+    def coerce(cls, value: Optional[Iterable]) -> "Backlog":
+        return value if isinstance(value, cls) else cls(value or ())
+
+    def merge(self, stories: Iterable) -> "Backlog":
+        """A new backlog with `stories` added or replaced by id; this one is unchanged."""
+        return self._with((story.id, story) for story in stories)
+
+    def get(self, story_id: str, default: Any = None) -> Any:
+        story = self._lookup(story_id)
+        return default if story is _MISSING else story
+
+    def ids(self) -> List[str]:
+        return [key for key, _ in self._live_items()]
+
+    def __contains__(self, story_id: str) -> bool:
+        return self._lookup(story_id) is not _MISSING
+
+    def __iter__(self) -> Iterator:
+        for _, story in self._live_items():
+            yield story
+
+    def __repr__(self) -> str:
+        return f"Backlog({list(self)!r})"
+
+
+def append_messages(current: Any, update: Iterable) -> MessageLog:
+    """SprintState reducer for `messages` (replaces operator.add)."""
+    return MessageLog.coerce(current).extend(update)
+
+
+def merge_artifacts(current: Any, update: Any) -> ArtifactMap:
+    """SprintState reducer for `artifacts` (replaces operator.ior)."""
+    current = ArtifactMap.coerce(current)
+    if isinstance(update, ArtifactMap) and update.descends_from(current):
+        return update
+    return current.merge(update)
+
+
+def merge_backlog(current: Any, update: Iterable) -> Backlog:
+    """SprintState reducer for `backlog`: stories are upserted by id."""
+    current = Backlog.coerce(current)
+    if isinstance(update, Backlog) and update.descends_from(current):
+        return update
+    return current.merge(update)
@@ -0,0 +1,41 @@
+"""
+In-memory store of artifact bodies for lazy fetching over HTTP.
+
+Artifacts are immutable once published, so their bodies are served with a
+content-hash ETag and long-lived Cache-Control headers. The store is
+bounded by total size and evicts least recently used bodies first.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ArtifactStore:
+    """LRU map of artifact id -> (content, etag), bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+    def put(self, artifact_id: str, content: str) -> str:
+        """Store an artifact body and return its ETag."""
+        etag = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self.delete(artifact_id)
+        self._items[artifact_id] = (content, etag)
+        self.total_bytes += len(content)
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, (evicted, _) = self._items.popitem(last=False)
+            self.total_bytes -= len(evicted)
+        return etag
+
+    def get(self, artifact_id: str) -> Optional[Tuple[str, str]]:
+        item = self._items.get(artifact_id)
+        if item is not None:
+            self._items.move_to_end(artifact_id)
+        return item
+
+    def delete(self, artifact_id: str) -> None:
+        item = self._items.pop(artifact_id, None)
+        if item is not None:
+            self.total_bytes -= len(item[0])
@@ -0,0 +1,248 @@
+"""
+Session event bus and sprint job queue for running several processes.
+
+A single process keeps sprint sessions and WebSocket subscribers in memory,
+so with several uvicorn workers (or nodes) the socket and the sprint can
+land on different processes. These two abstractions decouple them:
+
+- EventBus: pub/sub of sprint updates, one channel per session. The
+  process running a sprint publishes every update; an API process with a
+  subscriber for a sprint it does not run relays the channel to its
+  sockets (see `relay_session` in api/server.py).
+- JobQueue: sprints to run, highest `priority` first and FIFO within a
+  priority. API processes enqueue `{"id", "goal", "priority"}` jobs and
+  sprint workers (api/worker.py) consume them.
+
+The in-memory backends are the default and only span one process. With
+EVENT_BUS_URL=redis://... both use Redis (pub/sub and a sorted set),
+shared by every API node and worker; `redis` is then an optional
+dependency, and anything implementing the same subset of the
+redis.asyncio client (e.g. the FakeRedis stand-in in
+benchmarks/fake_redis.py) can be passed instead.
+"""
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set
+
+CHANNEL_PREFIX = "aidevteam:sprint:"
+JOB_QUEUE_KEY = "aidevteam:jobs"
+
+
+def session_channel(session_id: str) -> str:
+    """Bus channel carrying the updates of one sprint session."""
+    return CHANNEL_PREFIX + session_id
+
+
+def is_terminal(payload: dict) -> bool:
+    """True for the last update of a sprint (completion or failure)."""
+    return payload.get("type") == "complete" or "error" in payload
+
+
+class Subscription(ABC):
+    """Async iterator over the payloads published to one channel."""
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    @abstractmethod
+    async def __anext__(self) -> dict:
+        ...
+
+    async def close(self) -> None:
+        """Unsubscribe; pending payloads are discarded."""
+
+
+class EventBus(ABC):
+    """Interface of the session event bus."""
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        """Subscribe to a channel; payloads published from now on are delivered."""
+
+    @property
+    def distributed(self) -> bool:
+        """Whether other processes can see what is published here."""
+        return False
+
+    async def close(self) -> None:
+        pass
+
+
+class JobQueue(ABC):
+    """Interface of the sprint job queue: higher `priority` first, then FIFO."""
+
+    @abstractmethod
+    async def enqueue(self, job: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Jobs waiting to be dequeued."""
+
+    @abstractmethod
+    async def dequeue(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """The next job, waiting up to `timeout` seconds (forever if None); None on timeout."""
+
+    async def close(self) -> None:
+        pass
+
+
+class _QueueSubscription(Subscription):
+    def __init__(self, bus: "InMemoryEventBus", channel: str):
+        self.bus = bus
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def __anext__(self) -> dict:
+        if self.queue is None:
+            raise StopAsyncIteration
+        return await self.queue.get()
+
+    async def close(self) -> None:
+        self.bus._unsubscribe(self)
+        self.queue = None
+
+
+class InMemoryEventBus(EventBus):
+    """Process-local bus: one unbounded queue per subscription."""
+
+    def __init__(self):
+        self.channels: Dict[str, Set[_QueueSubscription]] = {}
+
+    async def publish(self, channel: str, payload: dict) -> None:
+        for subscription in self.channels.get(channel, ()):
+            subscription.queue.put_nowait(payload)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = _QueueSubscription(self, channel)
+        self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: _QueueSubscription) -> None:
+        subscribers = self.channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[subscription.channel]
+
+
+class InMemoryJobQueue(JobQueue):
+    """Process-local priority queue of jobs."""
+
+    def __init__(self):
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+
+    async def enqueue(self, job: dict) -> None:
+        self.queue.put_nowait((-job.get("priority", 0), next(self._order), job))
+
+    async def size(self) -> int:
+        return self.queue.qsize()
+
+    async def dequeue(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            return (await asyncio.wait_for(self.queue.get(), timeout))[2]
+        except asyncio.TimeoutError:
+            return None
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, pubsub, channel: str):
+        self.pubsub = pubsub
+        self.channel = channel
+        self.messages = pubsub.listen()
+
+    async def __anext__(self) -> dict:
+        async for message in self.messages:
+            if message.get("type") == "message":
+                return json.loads(message["data"])
+        raise StopAsyncIteration
+
+    async def close(self) -> None:
+        await self.pubsub.unsubscribe(self.channel)
+        await self.pubsub.aclose()
+
+
+class RedisEventBus(EventBus):
+    """Bus over Redis pub/sub; payloads are JSON encoded."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def publish(self, channel: str, payload: dict) -> None:
+        await self.client.publish(channel, json.dumps(payload))
+
+    async def subscribe(self, channel: str) -> Subscription:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(pubsub, channel)
+
+    @property
+    def distributed(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Priorities are clamped to +-MAX_PRIORITY so that the sorted-set score
+# (-priority * PRIORITY_SCALE + enqueue time) orders by priority, then time.
+MAX_PRIORITY = 100
+PRIORITY_SCALE = 1e10
+
+
+class RedisJobQueue(JobQueue):
+    """Job queue on a Redis sorted set (ZADD / BZPOPMIN, Redis >= 5)."""
+
+    def __init__(self, client, key: str = JOB_QUEUE_KEY):
+        self.client = client
+        self.key = key
+
+    async def enqueue(self, job: dict) -> None:
+        priority = max(-MAX_PRIORITY, min(MAX_PRIORITY, job.get("priority", 0)))
+        await self.client.zadd(self.key, {json.dumps(job): -priority * PRIORITY_SCALE + time.time()})
+
+    async def size(self) -> int:
+        return await self.client.zcard(self.key)
+
+    async def dequeue(self, timeout: Optional[float] = None) -> Optional[dict]:
+        # Old servers take whole seconds; 0 blocks forever
+        item = await self.client.bzpopmin([self.key], timeout=max(1, round(timeout)) if timeout else 0)
+        return json.loads(item[1]) if item else None
+
+
+def redis_client(url: str):
+    """A redis.asyncio client for `url` (requires `pip install redis`)."""
+    try:
+        redis = importlib.import_module("redis.asyncio")
+    except ImportError:  # optional dependency
+        raise RuntimeError("EVENT_BUS_URL requires the redis package: pip install redis")
+    return redis.from_url(url)
+
+
+def create_bus(url: Optional[str] = None, client=None):
+    """
+    (EventBus, JobQueue) for a bus URL: empty for the in-memory backends,
+    redis://... (or an explicit redis-compatible `client`) for Redis.
+    """
+    if client is None and url:
+        if not url.startswith(("redis://", "rediss://", "unix://")):
+            raise ValueError(f"Unsupported EVENT_BUS_URL: {url}")
+        client = redis_client(url)
+    if client is not None:
+        return RedisEventBus(client), RedisJobQueue(client)
+    return InMemoryEventBus(), InMemoryJobQueue()
+
+
+def get_bus():
+    """(EventBus, JobQueue) configured by EVENT_BUS_URL (unset: in-memory)."""
+    return create_bus(os.getenv("EVENT_BUS_URL", ""))
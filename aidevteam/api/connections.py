@@ -0,0 +1,288 @@
+"""
+WebSocket fan-out for sprint updates.
+
+Every session can have several subscribers (browser tabs, observers). Each
+subscriber owns a bounded outbound queue drained by its own writer task,
+so the sprint producing updates never awaits a socket directly.
+
+When a subscriber's queue is full:
+- `log` frames are droppable: the oldest queued log is evicted (or the new
+  one dropped) and counted.
+- `agent_update` frames coalesce with a queued update for the same agent,
+  and `artifact_delta` frames merge into a queued delta for the same
+  artifact, since only the latest status / the full text matter.
+- Everything else (artifacts, completion, errors) is lossless: the producer
+  waits up to `send_timeout` for room, after which the subscriber is
+  considered stalled and disconnected so it cannot hold up the others.
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from fastapi import WebSocket
+
+from aidevteam.api.models import SprintUpdate
+from aidevteam.api.wire import encode_frame, strip_artifact_body
+
+DROPPABLE_TYPES = {"log"}
+
+
+class SubscriberQueue:
+    """Bounded FIFO of outbound payloads with drop/coalesce on overflow."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items: Deque[dict] = deque()
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        self.closed = False
+        self._cond = asyncio.Condition()
+        self._release: Optional[asyncio.Task] = None
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def preload(self, payloads: List[dict]) -> None:
+        """Queue replayed payloads ahead of live ones, ignoring the bound."""
+        for payload in payloads:
+            self._append(payload)
+
+    def _coalesce(self, payload: dict) -> bool:
+        kind = payload.get("type")
+        data = payload.get("data") or {}
+        if kind == "agent_update":
+            for i in range(len(self.items) - 1, -1, -1):
+                item = self.items[i]
+                if item.get("type") == "agent_update" and item["data"].get("agent_id") == data.get("agent_id"):
+                    self.items[i] = payload
+                    return True
+        elif kind == "artifact_delta":
+            for i in range(len(self.items) - 1, -1, -1):
+                item = self.items[i]
+                if (item.get("data") or {}).get("id") != data.get("id"):
+                    continue
+                if item.get("type") != "artifact_delta":
+                    return False
+                merged = dict(item["data"], delta=item["data"]["delta"] + data["delta"])
+                self.items[i] = dict(item, data=merged)
+                return True
+        return False
+
+    def _evict_droppable(self) -> bool:
+        for i, item in enumerate(self.items):
+            if item.get("type") in DROPPABLE_TYPES:
+                del self.items[i]
+                self._task_done()
+                self.dropped += 1
+                return True
+        return False
+
+    def _append(self, payload: dict) -> None:
+        self.items.append(payload)
+        self._unfinished += 1
+        self._idle.clear()
+        self.high_water = max(self.high_water, len(self.items))
+
+    async def put(self, payload: dict, timeout: Optional[float] = None) -> bool:
+        """Queue a payload. Returns False if a lossless frame timed out or the queue was cleared."""
+        async with self._cond:
+            if self.closed:
+                return False
+            if len(self.items) >= self.maxsize:
+                if self._coalesce(payload):
+                    self.coalesced += 1
+                    return True
+                if payload.get("type") in DROPPABLE_TYPES and not self._evict_droppable():
+                    self.dropped += 1
+                    return True
+                if len(self.items) >= self.maxsize and not self._evict_droppable():
+                    try:
+                        await asyncio.wait_for(
+                            self._cond.wait_for(lambda: self.closed or len(self.items) < self.maxsize), timeout
+                        )
+                    except asyncio.TimeoutError:
+                        return False
+                    if self.closed:
+                        return False
+            self._append(payload)
+            self._cond.notify_all()
+            return True
+
+    async def get(self) -> dict:
+        async with self._cond:
+            await self._cond.wait_for(lambda: bool(self.items))
+            payload = self.items.popleft()
+            self._cond.notify_all()
+            return payload
+
+    def _task_done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+
+    def task_done(self) -> None:
+        self._task_done()
+
+    def clear(self) -> None:
+        """Discard everything queued, refuse further puts and release waiters."""
+        self.closed = True
+        self.items.clear()
+        self._unfinished = 0
+        self._idle.set()
+        self._release = asyncio.get_running_loop().create_task(self._release_waiters())
+
+    async def _release_waiters(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def join(self) -> None:
+        await self._idle.wait()
+
+
+class Subscriber:
+    """One WebSocket watching a session, with its queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int, encoding: str = "json",
+                 lazy_artifacts: bool = False):
+        self.websocket = websocket
+        self.queue = SubscriberQueue(max_queue_size)
+        self.encoding = encoding
+        self.lazy_artifacts = lazy_artifacts
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.bytes_sent = 0
+
+    async def send(self, payload: dict) -> None:
+        """Encode a payload in the negotiated format and send it."""
+        if self.lazy_artifacts:
+            payload = strip_artifact_body(payload)
+        frame = encode_frame(payload, self.encoding)
+        if isinstance(frame, bytes):
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+        self.bytes_sent += len(frame)
+
+
+class ConnectionManager:
+    """Tracks sprint sessions and fans updates out to their subscribers."""
+
+    def __init__(self, max_queue_size: int = 256, send_timeout: float = 30.0):
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.sessions: Dict[str, List[Subscriber]] = {}
+        self.frames_sent = 0
+        self.stalled_disconnects = 0
+        self._retired_dropped = 0
+        self._retired_coalesced = 0
+        self._retired_bytes = 0
+
+    async def connect(self, session_id: str, websocket: WebSocket) -> Subscriber:
+        await websocket.accept()
+        return self.subscribe(session_id, websocket)
+
+    def subscribe(self, session_id: str, websocket: WebSocket, replay: Optional[List[dict]] = None,
+                  encoding: str = "json", lazy_artifacts: bool = False) -> Subscriber:
+        """
+        Attach an accepted socket to a session.
+
+        Replayed events are queued before the subscriber becomes visible to
+        producers, so they are always delivered ahead of live updates.
+        """
+        subscriber = Subscriber(websocket, self.max_queue_size, encoding, lazy_artifacts)
+        if replay:
+            subscriber.queue.preload(replay)
+        subscriber.writer = asyncio.create_task(self._writer(session_id, subscriber))
+        self.sessions.setdefault(session_id, []).append(subscriber)
+        return subscriber
+
+    def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        """Remove one subscriber of a session, or all of them if no socket is given."""
+        subscribers = self.sessions.get(session_id, [])
+        for subscriber in list(subscribers):
+            if websocket is None or subscriber.websocket is websocket:
+                self._retire(session_id, subscriber)
+
+    def _retire(self, session_id: str, subscriber: Subscriber):
+        subscribers = self.sessions.get(session_id, [])
+        if subscriber in subscribers:
+            subscribers.remove(subscriber)
+            self._retired_dropped += subscriber.queue.dropped
+            self._retired_coalesced += subscriber.queue.coalesced
+            self._retired_bytes += subscriber.bytes_sent
+        if not subscribers:
+            self.sessions.pop(session_id, None)
+        subscriber.closed = True
+        subscriber.queue.clear()
+        if subscriber.writer is not None and subscriber.writer is not asyncio.current_task():
+            subscriber.writer.cancel()
+
+    async def _writer(self, session_id: str, subscriber: Subscriber):
+        """Send queued payloads in order until the socket fails."""
+        try:
+            while True:
+                payload = await subscriber.queue.get()
+                try:
+                    await subscriber.send(payload)
+                    self.frames_sent += 1
+                finally:
+                    subscriber.queue.task_done()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Client went away: stop tracking it and release anyone draining it
+            self._retire(session_id, subscriber)
+
+    def is_connected(self, session_id: str) -> bool:
+        return bool(self.sessions.get(session_id))
+
+    async def send_json(self, session_id: str, payload: dict):
+        """Queue a raw payload for every subscriber of the session."""
+        subscribers = list(self.sessions.get(session_id, []))
+        if not subscribers:
+            return
+        results = await asyncio.gather(*(
+            subscriber.queue.put(payload, self.send_timeout) for subscriber in subscribers
+        ))
+        for subscriber, accepted in zip(subscribers, results):
+            if not accepted and not subscriber.closed:
+                self.stalled_disconnects += 1
+                self._retire(session_id, subscriber)
+                try:
+                    await subscriber.websocket.close(code=1013)
+                except Exception:
+                    pass
+
+    async def send_update(self, session_id: str, update: SprintUpdate):
+        await self.send_json(session_id, update.model_dump())
+
+    async def send_error(self, session_id: str, message: str):
+        await self.send_json(session_id, {"error": message})
+
+    async def drain(self, session_id: str, websocket: Optional[WebSocket] = None):
+        """Wait until everything queued for the session (or one socket) has been sent."""
+        for subscriber in list(self.sessions.get(session_id, [])):
+            if websocket is None or subscriber.websocket is websocket:
+                await subscriber.queue.join()
+
+    def metrics(self) -> dict:
+        """Queue depth and drop/coalesce counters across all subscribers."""
+        subscribers = [s for subs in self.sessions.values() for s in subs]
+        depths = [len(s.queue) for s in subscribers]
+        return {
+            "sessions": len(self.sessions),
+            "subscribers": len(subscribers),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "queue_high_water": max((s.queue.high_water for s in subscribers), default=0),
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self._retired_bytes + sum(s.bytes_sent for s in subscribers),
+            "frames_dropped": self._retired_dropped + sum(s.queue.dropped for s in subscribers),
+            "frames_coalesced": self._retired_coalesced + sum(s.queue.coalesced for s in subscribers),
+            "stalled_disconnects": self.stalled_disconnects
+        }
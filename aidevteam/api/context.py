@@ -0,0 +1,170 @@
+"""
+Context budgeting between sprint phases.
+
+Each phase inlines the previous phase's artifact into its prompt, so input
+size grows along the pipeline. Before a prompt is built, every upstream
+artifact is measured and, if it exceeds its per-phase budget, compacted:
+Markdown documents keep the sections the phase needs (e.g. only the API
+and schema sections of a design for the developer) and then an extractive
+cut of each section; code keeps imports, signatures and docstrings.
+
+Token counts come from a local approximation (words, punctuation and
+4-character pieces of long words), so no tokenizer download is needed.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.*)$")
+_CODE_OUTLINE_RE = re.compile(r"^\s*(@|def |async def |class |from |import |[A-Z_][A-Z0-9_]*\s*=)")
+
+# Per-phase token budgets for each upstream input, plus the Markdown
+# sections worth keeping first when a document has to be compacted.
+PHASE_BUDGETS: Dict[str, Dict[str, dict]] = {
+    "architect": {
+        "stories": {"budget": 1500},
+    },
+    "developer": {
+        "design": {
+            "budget": 1500,
+            "sections": ["Overview", "Tech Stack", "API Endpoints", "Database Schema", "Schema", "Models"],
+        },
+    },
+    "qa_engineer": {
+        "code": {"budget": 2500},
+    },
+    "qa_plan": {
+        "design": {
+            "budget": 1500,
+            "sections": ["Overview", "API Endpoints", "Database Schema", "Schema", "Models"],
+        },
+    },
+}
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the BPE token count of a text locally."""
+    count = 0
+    for piece in _TOKEN_RE.findall(text):
+        count += max(1, (len(piece) + 3) // 4)
+    return count
+
+
+def split_sections(markdown: str) -> List[Tuple[str, List[str]]]:
+    """Split Markdown into (heading line, body lines) pairs; preamble has heading ''."""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    in_code = False
+    for line in markdown.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+        if not in_code and _HEADING_RE.match(line):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return [s for s in sections if s[0] or any(l.strip() for l in s[1])]
+
+
+def _wanted(heading: str, keywords: Iterable[str]) -> bool:
+    title = heading.lstrip("#").strip().lower()
+    return any(keyword.lower() in title for keyword in keywords)
+
+
+def compact_markdown(markdown: str, budget: int, sections: Optional[List[str]] = None) -> str:
+    """
+    Shrink a Markdown document to roughly `budget` tokens.
+
+    Sections matching `sections` are kept in full when they fit; the rest of
+    the budget is shared out round-robin, one line per section at a time, so
+    every heading and the opening lines of each section survive.
+    """
+    if count_tokens(markdown) <= budget:
+        return markdown
+
+    parsed = split_sections(markdown)
+    kept: List[List[str]] = [[] for _ in parsed]
+    used = 0
+
+    # 1. Headings always survive; preferred sections are kept whole if possible
+    for i, (heading, body) in enumerate(parsed):
+        if heading:
+            kept[i].append(heading)
+            used += count_tokens(heading)
+    if sections:
+        for i, (heading, body) in enumerate(parsed):
+            if heading and _wanted(heading, sections):
+                cost = count_tokens("\n".join(body))
+                if used + cost <= budget:
+                    kept[i].extend(body)
+                    used += cost
+                    parsed[i] = (heading, [])
+
+    # 2. Extractive fill: leading lines of every remaining section, round-robin
+    cursors = [0] * len(parsed)
+    progress = True
+    while progress and used < budget:
+        progress = False
+        for i, (heading, body) in enumerate(parsed):
+            while cursors[i] < len(body) and not body[cursors[i]].strip():
+                cursors[i] += 1
+            if cursors[i] >= len(body):
+                continue
+            line = body[cursors[i]]
+            cost = count_tokens(line)
+            if used + cost > budget:
+                continue
+            kept[i].append(line)
+            used += cost
+            cursors[i] += 1
+            progress = True
+
+    return "\n".join("\n".join(lines) for lines in kept if lines)
+
+
+def compact_code(code: str, budget: int) -> str:
+    """Shrink source code to its outline: imports, signatures and docstring openers."""
+    if count_tokens(code) <= budget:
+        return code
+
+    lines = code.splitlines()
+    outline: List[str] = []
+    used = 0
+    for i, line in enumerate(lines):
+        keep = bool(_CODE_OUTLINE_RE.match(line))
+        if not keep and i > 0 and lines[i - 1].rstrip().endswith(":") and line.strip().startswith(('"""', "'''")):
+            keep = True
+        if keep:
+            cost = count_tokens(line)
+            if used + cost > budget:
+                break
+            outline.append(line)
+            used += cost
+    outline.append("# ... implementation bodies omitted to fit the context budget ...")
+    return "\n".join(outline)
+
+
+class ContextBudgeter:
+    """Applies per-phase budgets to the upstream artifacts of a prompt."""
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, dict]]] = None):
+        self.budgets = budgets if budgets is not None else PHASE_BUDGETS
+
+    def prepare(self, phase: str, **inputs: str) -> Tuple[Dict[str, str], Dict[str, dict]]:
+        """
+        Compact each input over its budget.
+
+        Returns the (possibly compacted) inputs and per-input stats with the
+        original and final token counts.
+        """
+        prepared: Dict[str, str] = {}
+        stats: Dict[str, dict] = {}
+        for name, text in inputs.items():
+            rule = self.budgets.get(phase, {}).get(name)
+            original = count_tokens(text)
+            if rule is None or original <= rule["budget"]:
+                prepared[name] = text
+            elif name == "code":
+                prepared[name] = compact_code(text, rule["budget"])
+            else:
+                prepared[name] = compact_markdown(text, rule["budget"], rule.get("sections"))
+            stats[name] = {"original_tokens": original, "tokens": count_tokens(prepared[name])}
+        return prepared, stats
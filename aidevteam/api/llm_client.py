@@ -1,40 +1,222 @@
 """
 LLM Client for Agent Generation
 
-Supports OpenAI (default) and can be extended for other providers.
+Supports OpenAI (default) and any OpenAI-compatible server, targeted
+through OPENAI_BASE_URL or per role through the model router (routing.py).
+Identical generations are served from the response cache (see cache.py).
 """
+import importlib.util
+import logging
 import os
-from typing import Optional
-from openai import OpenAI
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
 
+from aidevteam.api.cache import ResponseCache, get_response_cache, make_cache_key
+from aidevteam.api.context import count_tokens
+from aidevteam.api.metrics import LLM_FIRST_TOKEN_SECONDS, observe_llm_request
+from aidevteam.api.resilience import LLMError, ResilientCaller, RetryPolicy, is_retryable
+
+if TYPE_CHECKING:
+    from aidevteam.api.routing import ModelRouter
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
 class LLMClient:
     """Client for interacting with LLM APIs."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None, retry: Optional[RetryPolicy] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        self.client = OpenAI(api_key=self.api_key)
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        # Retries are handled by our own policy rather than the SDK's
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                             timeout=float(os.getenv("LLM_TIMEOUT", "60")))
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.temperature = 0.7
+        self.cache = cache or get_response_cache()
+        self.retry = retry or RetryPolicy(max_attempts=int(os.getenv("LLM_MAX_RETRIES", "3")) + 1)
     
     def generate(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000) -> str:
-        """Generate a response from the LLM."""
+        """
+        Generate a response from the LLM.
+        
+        Raises LLMError if the request still fails after retries.
+        """
+        start = time.perf_counter()
+        key = make_cache_key(self.model, system_prompt, user_prompt, max_tokens, self.temperature)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                observe_llm_request(self.model, "generate", "cache_hit", time.perf_counter() - start)
+                return cached
+        for attempt in range(self.retry.max_attempts):
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=self.temperature
+                )
+                break
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 >= self.retry.max_attempts:
+                    observe_llm_request(self.model, "generate", "error", time.perf_counter() - start)
+                    raise LLMError(f"LLM request failed: {e}") from e
+                time.sleep(self.retry.backoff(attempt, e))
+        content = response.choices[0].message.content or ""
+        observe_llm_request(self.model, "generate", "ok", time.perf_counter() - start,
+                            count_tokens(system_prompt) + count_tokens(user_prompt), count_tokens(content))
+        if self.cache is not None:
+            self.cache.set(key, content)
+        return content
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking client for interacting with LLM APIs.
+
+    Uses the AsyncOpenAI client so that awaiting a completion yields to the
+    event loop instead of blocking every other session on the same worker.
+    Calls go through a ResilientCaller (rate limits, retries with jitter,
+    deadlines, optional hedging); failures raise LLMError instead of being
+    returned as text.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 resilience: Optional[ResilientCaller] = None, model: Optional[str] = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        # Retries and timeouts are handled by the ResilientCaller rather than the SDK
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client,
+                                  max_retries=0)
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.temperature = 0.7
+        self.cache = cache or get_response_cache()
+        self.resilience = resilience or ResilientCaller.from_env()
+
+    def cached(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000) -> Optional[str]:
+        """Cached response for this exact request, if any."""
+        if self.cache is None:
+            return None
+        content = self.cache.get(make_cache_key(self.model, system_prompt, user_prompt, max_tokens, self.temperature))
+        if content is not None:
+            observe_llm_request(self.model, "generate", "cache_hit", 0.0)
+        return content
+
+    def _messages(self, system_prompt: str, user_prompt: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _estimated_tokens(self, system_prompt: str, user_prompt: str, max_tokens: int) -> int:
+        # Providers count max_tokens against the tokens-per-minute quota up front
+        return count_tokens(system_prompt) + count_tokens(user_prompt) + max_tokens
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                        role: Optional[str] = None, check_cache: bool = True) -> str:
+        """
+        Generate a response from the LLM without blocking the event loop.
+
+        `role` is accepted for parity with ModelRouter; a single client
+        serves every role. Pass check_cache=False when the caller has already
+        looked the request up. Raises LLMError if the request still fails
+        after retries.
+        """
+        start = time.perf_counter()
+        key = make_cache_key(self.model, system_prompt, user_prompt, max_tokens, self.temperature)
+        if self.cache is not None and check_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                observe_llm_request(self.model, "generate", "cache_hit", time.perf_counter() - start)
+                return cached
         try:
-            response = self.client.chat.completions.create(
+            response = await self.resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(system_prompt, user_prompt),
+                    max_tokens=max_tokens,
+                    temperature=self.temperature
+                ),
+                tokens=self._estimated_tokens(system_prompt, user_prompt, max_tokens)
+            )
+        except LLMError:
+            observe_llm_request(self.model, "generate", "error", time.perf_counter() - start)
+            raise
+        content = response.choices[0].message.content or ""
+        observe_llm_request(self.model, "generate", "ok", time.perf_counter() - start,
+                            count_tokens(system_prompt) + count_tokens(user_prompt), count_tokens(content))
+        if self.cache is not None:
+            self.cache.set(key, content)
+        return content
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                      role: Optional[str] = None, check_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as text chunks as they are generated.
+
+        A cache hit is yielded as a single chunk; a completed stream is cached.
+        Opening the stream is retried; a failure mid-stream, a stalled stream
+        or one outlasting the LLM_DEADLINE raises LLMError.
+        """
+        start = time.perf_counter()
+        key = make_cache_key(self.model, system_prompt, user_prompt, max_tokens, self.temperature)
+        if self.cache is not None and check_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                observe_llm_request(self.model, "stream", "cache_hit", time.perf_counter() - start)
+                yield cached
+                return
+        parts = []
+        stream = self.resilience.stream(
+            lambda: self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._messages(system_prompt, user_prompt),
                 max_tokens=max_tokens,
-                temperature=0.7
-            )
-            return response.choices[0].message.content or ""
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
+                temperature=self.temperature,
+                stream=True
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt, max_tokens)
+        )
+        try:
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            LLM_FIRST_TOKEN_SECONDS.labels(model=self.model).observe(time.perf_counter() - start)
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            except LLMError:
+                raise
+            except Exception as e:
+                raise LLMError(f"LLM stream interrupted: {e}") from e
+        except LLMError:
+            observe_llm_request(self.model, "stream", "error", time.perf_counter() - start)
+            raise
+        content = "".join(parts)
+        observe_llm_request(self.model, "stream", "ok", time.perf_counter() - start,
+                            count_tokens(system_prompt) + count_tokens(user_prompt), count_tokens(content))
+        if self.cache is not None:
+            self.cache.set(key, content)
+
+    async def aclose(self) -> None:
+        """Release the underlying HTTP connection pool."""
+        await self.client.close()
 
 
 # Prompt templates for each agent role
@@ -86,7 +268,9 @@ Make the code production-ready with proper error handling."""
         "system": """You are a detail-oriented QA Engineer who writes comprehensive test suites.
 Your job is to create a test report that verifies the implementation meets requirements.
 Format your response as a Markdown test report.
-Include: Summary, Test Results (with pass/fail status), Coverage Analysis, and Recommendations.""",
+Include: Summary, a pytest test module for main.py in a single ```python block
+(import from `main`; it is executed against the code), Test Results (with pass/fail status),
+Coverage Analysis, and Recommendations.""",
         
         "user": """Sprint Goal: {goal}
 
@@ -100,6 +284,39 @@ Create a comprehensive test report that:
 4. Provides recommendations for improvement
 
 Make this realistic and thorough."""
+    },
+    
+    # Pipelined sprints (SPRINT_PIPELINE=1): QA writes tests while the code is being written
+    "qa_plan": {
+        "system": """You are a detail-oriented QA Engineer who writes comprehensive test suites.
+Your job is to plan the tests for an implementation that is being written from a technical design.
+Format your response as a Markdown test plan.
+Include: Summary, a pytest test module for main.py in a single ```python block
+(import from `main`, using the names given in the design; it is executed against the code),
+Test Cases (what each test verifies) and Coverage Analysis.""",
+        
+        "user": """Sprint Goal: {goal}
+
+Technical Design:
+{design}
+
+The developer is implementing main.py from this design right now.
+Write the test suite for it: cover every endpoint and model in the design,
+including validation and error cases."""
+    },
+    
+    # Pipelined sprints: a phase that started on partial input catches up with the rest.
+    # Used with the phase's own system prompt.
+    "reconcile": {
+        "user": """Sprint Goal: {goal}
+
+You started this work before all of its input was available. Your draft:
+{draft}
+
+{updates}
+
+Reply with only the additions and corrections your draft needs to fully account for the input above.
+Do not repeat unchanged parts; if a code block must change, repeat that block in full."""
     }
 }
 
@@ -107,3 +324,66 @@ Make this realistic and thorough."""
 def get_llm_client() -> LLMClient:
     """Factory function to get LLM client instance."""
     return LLMClient()
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of pooled async LLM clients.
+
+    A single HTTP connection pool is created at startup and shared by every
+    session and provider, so keep-alive connections (and their TLS
+    handshakes) are reused across sprints. Pool limits are tunable through
+    the environment: LLM_POOL_MAX_CONNECTIONS, LLM_POOL_MAX_KEEPALIVE,
+    LLM_POOL_KEEPALIVE_EXPIRY and LLM_HTTP2 (requires the optional h2
+    package). Requests are routed to per-role models by a ModelRouter (see
+    routing.py).
+    """
+
+    def __init__(self):
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._router = None
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30"))
+        )
+        http2 = os.getenv("LLM_HTTP2", "0").lower() in ("1", "true", "yes")
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("LLM_HTTP2 is set but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+        return DefaultAsyncHttpxClient(limits=limits, http2=http2)
+
+    async def startup(self) -> None:
+        """Create the shared connection pool."""
+        if self.http_client is None:
+            self.http_client = self._create_http_client()
+
+    async def shutdown(self) -> None:
+        """Close the shared connection pool and forget the router."""
+        self._router = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    def get(self) -> "ModelRouter":
+        """Return the shared router, constructing it on first use."""
+        if self._router is None:
+            from aidevteam.api.routing import build_router
+            if self.http_client is None:
+                self.http_client = self._create_http_client()
+            self._router = build_router(http_client=self.http_client)
+        return self._router
+
+    def stats(self) -> Optional[dict]:
+        """Per-route latency and failure counters, once the router exists."""
+        return self._router.stats() if self._router is not None else None
+
+
+llm_registry = LLMClientRegistry()
+
+
+def get_async_llm_client() -> "ModelRouter":
+    """Factory function to get the shared, pooled and routed async LLM client."""
+    return llm_registry.get()
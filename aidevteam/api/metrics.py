@@ -0,0 +1,140 @@
+"""
+Prometheus metrics and optional OpenTelemetry spans.
+
+Metrics are prometheus_client collectors in a registry of their own, which
+the server renders at GET /metrics. Values owned by other components
+(WebSocket queue depths, active sessions) are pulled at scrape time by
+callbacks registered with `on_collect`.
+
+When the opentelemetry API is installed, `timed_phase` and the
+`instrument_phase` decorator also open a span per phase; they are no-ops
+until an SDK and exporter are configured.
+"""
+import functools
+import importlib
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+registry = CollectorRegistry()
+_collectors: List[Callable[[], None]] = []
+
+LLM_REQUEST_SECONDS = Histogram(
+    "aidevteam_llm_request_seconds", "Duration of LLM requests.", ["model", "mode", "outcome"],
+    buckets=DEFAULT_BUCKETS, registry=registry
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "aidevteam_llm_first_token_seconds", "Time until a streamed LLM response yields its first chunk.", ["model"],
+    buckets=DEFAULT_BUCKETS, registry=registry
+)
+LLM_TOKENS = Counter(
+    "aidevteam_llm_tokens", "Approximate LLM tokens by direction (prompt, completion).", ["model", "direction"],
+    registry=registry
+)
+PHASE_SECONDS = Histogram(
+    "aidevteam_phase_seconds", "Duration of sprint phases and workflow functions.", ["phase", "outcome"],
+    buckets=DEFAULT_BUCKETS, registry=registry
+)
+UPDATE_PUBLISH_SECONDS = Histogram(
+    "aidevteam_update_publish_seconds", "Time to log and fan out one sprint update.", ["type"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0), registry=registry
+)
+UPDATES_PUBLISHED = Counter(
+    "aidevteam_updates_published", "Sprint updates published, by type.", ["type"], registry=registry
+)
+ACTIVE_SESSIONS = Gauge("aidevteam_active_sessions", "Sprint sessions currently running.", registry=registry)
+SPRINTS_SUBMITTED = Counter(
+    "aidevteam_sprints_submitted", "Headless sprint submissions, by outcome (queued, shed).", ["outcome"],
+    registry=registry
+)
+SPRINT_QUEUE_DEPTH = Gauge("aidevteam_sprint_queue_depth", "Sprint jobs waiting for a worker.", registry=registry)
+WS_SUBSCRIBERS = Gauge("aidevteam_ws_subscribers", "Connected WebSocket subscribers.", registry=registry)
+WS_QUEUE_DEPTH = Gauge(
+    "aidevteam_ws_queue_depth", "Frames queued for WebSocket subscribers (total and deepest queue).", ["stat"],
+    registry=registry
+)
+
+
+def observe_llm_request(model: str, mode: str, outcome: str, seconds: float,
+                        prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+    """Record one LLM request: mode is generate/stream, outcome ok/error/cache_hit."""
+    LLM_REQUEST_SECONDS.labels(model=model, mode=mode, outcome=outcome).observe(seconds)
+    if prompt_tokens:
+        LLM_TOKENS.labels(model=model, direction="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model=model, direction="completion").inc(completion_tokens)
+
+
+def on_collect(collector: Callable[[], None]) -> None:
+    """Run `collector` before every scrape, e.g. to refresh gauges."""
+    _collectors.append(collector)
+
+
+def render() -> bytes:
+    """All metrics in the Prometheus text exposition format (CONTENT_TYPE_LATEST)."""
+    for collector in _collectors:
+        collector()
+    return generate_latest(registry)
+
+
+_tracer = None
+
+
+def get_tracer():
+    """The OpenTelemetry tracer, or None without the opentelemetry API (imported on first use)."""
+    global _tracer
+    if _tracer is None:
+        try:
+            trace = importlib.import_module("opentelemetry.trace")
+        except ImportError:  # optional dependency
+            _tracer = False
+        else:
+            _tracer = trace.get_tracer("aidevteam")
+    return _tracer or None
+
+
+@contextmanager
+def phase_span(name: str, **attributes) -> Iterator[Optional[object]]:
+    """OpenTelemetry span for a phase, if the opentelemetry API is installed."""
+    tracer = get_tracer()
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+@contextmanager
+def timed_phase(phase: str, **attributes) -> Iterator[None]:
+    """Record a phase's duration (and outcome) and trace it as a span."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with phase_span(f"phase {phase}", phase=phase, **attributes):
+            yield
+        outcome = "ok"
+    finally:
+        PHASE_SECONDS.labels(phase=phase, outcome=outcome).observe(time.perf_counter() - start)
+
+
+def instrument_phase(phase: str) -> Callable:
+    """Decorator applying `timed_phase` to a sync or async workflow function."""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed_phase(phase):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed_phase(phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
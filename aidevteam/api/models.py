@@ -0,0 +1,47 @@
+"""
+Pydantic models for the sprint API and WebSocket protocol.
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class SprintRequest(BaseModel):
+    goal: str = Field(min_length=1)
+    priority: int = Field(default=0, ge=-100, le=100)  # higher runs first (POST /sprints)
+
+
+class AgentUpdate(BaseModel):
+    agent_id: str
+    name: str
+    status: str  # idle, thinking, active, done
+    thought: Optional[str] = None
+
+
+class ArtifactUpdate(BaseModel):
+    id: str
+    title: str
+    type: str  # design, code, test
+    preview: str
+    content: str
+    timestamp: str
+
+
+class ArtifactDeltaUpdate(BaseModel):
+    id: str
+    title: str
+    type: str  # design, code, test
+    delta: str
+
+
+class LogUpdate(BaseModel):
+    id: str
+    agent: str
+    message: str
+    timestamp: str
+
+
+class SprintUpdate(BaseModel):
+    type: str  # agent_update, artifact, artifact_delta, log, usage, complete
+    data: dict
+    seq: Optional[int] = None  # position in the session event log, set when published
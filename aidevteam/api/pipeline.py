@@ -0,0 +1,82 @@
+"""
+Section-level streams between sprint phases.
+
+With SPRINT_PIPELINE=1 a phase does not wait for its upstream artifact to
+finish: the Product Owner's stories are split into their `## ` sections
+while they stream, and the architect starts designing as soon as the first
+ones are complete. Whatever arrives after a phase started is handed to it in
+a short reconciliation pass at the end (see `run_sprint` in server.py).
+"""
+import asyncio
+import re
+from typing import AsyncIterator, List
+
+_SECTION_RE = re.compile(r"^##\s")
+
+
+class SectionStream:
+    """
+    Accumulates streamed Markdown and exposes its completed `## ` sections.
+
+    A section is complete once the next `## ` heading starts (outside a code
+    fence) or the stream is closed. Text before the first heading is kept
+    with the first section.
+    """
+
+    def __init__(self):
+        self.sections: List[str] = []
+        self.closed = False
+        self._lines: List[str] = []  # complete lines of the open section
+        self._partial = ""  # incomplete last line
+        self._in_code = False
+        self._headed = False
+        self._changed = asyncio.Condition()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.sections) + "".join(self._lines) + self._partial
+
+    def _complete_section(self) -> None:
+        self.sections.append("".join(self._lines))
+        self._lines = []
+
+    async def feed(self, chunk: str) -> None:
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        before = len(self.sections)
+        for line in lines:
+            if line.strip().startswith("```"):
+                self._in_code = not self._in_code
+            elif not self._in_code and _SECTION_RE.match(line):
+                if self._headed:
+                    self._complete_section()
+                self._headed = True
+            self._lines.append(line + "\n")
+        if len(self.sections) > before:
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def close(self) -> None:
+        if self._partial:
+            self._lines.append(self._partial)
+            self._partial = ""
+        if any(line.strip() for line in self._lines):
+            self._complete_section()
+        self.closed = True
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_for(self, count: int) -> List[str]:
+        """The completed sections once there are `count` of them (or all, if the stream ends first)."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(self.sections) >= count or self.closed)
+        return list(self.sections)
+
+    async def tap(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass a token stream through, feeding it to this stream; closes it at the end."""
+        try:
+            async for chunk in chunks:
+                await self.feed(chunk)
+                yield chunk
+        finally:
+            await self.close()
@@ -0,0 +1,309 @@
+"""
+Client-side flow control for LLM providers.
+
+- RateLimiter: token buckets on requests per minute and tokens per minute,
+  so a shared quota is spread out instead of tripping 429s.
+- RetryPolicy: exponential backoff with full jitter for retryable errors
+  (429, timeouts, connection errors, 5xx), honouring Retry-After.
+- ResilientCaller: combines both with per-attempt timeouts, an overall
+  deadline and optional hedged requests (a second attempt is fired once the
+  first has run longer than the observed p95 latency; the first to finish
+  wins). Streams are opened with retries and then read under the same
+  deadline.
+"""
+import asyncio
+import inspect
+import os
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+
+class LLMError(Exception):
+    """An LLM call failed after exhausting retries (or was not retryable)."""
+
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait according to the provider's Retry-After header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        value = response.headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter on requests per minute and (optionally) tokens per minute.
+
+    Up to `burst` requests may start back to back; after that requests are
+    spaced so the long-run rates never exceed the configured limits.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 burst: Optional[int] = None):
+        self.requests = None
+        self.tokens = None
+        if requests_per_minute:
+            rate = requests_per_minute / 60.0
+            self.requests = TokenBucket(rate, float(burst if burst is not None else max(1, int(rate))))
+        if tokens_per_minute:
+            # Allow a full minute's worth of tokens in a burst, like provider quotas do
+            self.tokens = TokenBucket(tokens_per_minute / 60.0, float(tokens_per_minute))
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until a request costing `tokens` may be sent."""
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None and tokens:
+                    wait = max(wait, self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None and tokens:
+                self.tokens.take(tokens)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Delay before retry number `attempt` (0-based)."""
+        hinted = retry_after(error) if error is not None else None
+        if hinted is not None:
+            return min(hinted, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResilientCaller:
+    """
+    Runs LLM calls with rate limiting, retries, deadlines and hedging.
+
+    Latencies are tracked per call mode ("complete" for whole responses,
+    "stream" for opening a stream), since the time to a stream's first byte
+    says nothing about how long a full completion takes; hedging uses the
+    "complete" latencies.
+    """
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, retry: Optional[RetryPolicy] = None,
+                 attempt_timeout: Optional[float] = 60.0, deadline: Optional[float] = 180.0,
+                 hedge: bool = False, hedge_quantile: float = 0.95, hedge_min_samples: int = 20):
+        self.rate_limiter = rate_limiter
+        self.retry = retry or RetryPolicy()
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.retries = 0
+        self.hedges = 0
+
+    @classmethod
+    def from_env(cls) -> "ResilientCaller":
+        """
+        Configured via LLM_RPM, LLM_TPM, LLM_MAX_RETRIES, LLM_TIMEOUT,
+        LLM_DEADLINE and LLM_HEDGE.
+        """
+        rpm, tpm = os.getenv("LLM_RPM"), os.getenv("LLM_TPM")
+        limiter = RateLimiter(float(rpm) if rpm else None, float(tpm) if tpm else None) if (rpm or tpm) else None
+        return cls(
+            rate_limiter=limiter,
+            retry=RetryPolicy(max_attempts=int(os.getenv("LLM_MAX_RETRIES", "3")) + 1),
+            attempt_timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+            deadline=float(os.getenv("LLM_DEADLINE", "180")),
+            hedge=os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes")
+        )
+
+    def tracker(self, mode: str) -> LatencyTracker:
+        """The latency window of one call mode."""
+        tracker = self.latencies.get(mode)
+        if tracker is None:
+            tracker = self.latencies[mode] = LatencyTracker()
+        return tracker
+
+    @property
+    def latency(self) -> LatencyTracker:
+        """Latencies of complete (non-streamed) calls, which drive hedging."""
+        return self.tracker("complete")
+
+    def hedge_delay(self) -> Optional[float]:
+        """When to fire the hedge: the observed p95 latency, once enough samples exist."""
+        if not self.hedge or len(self.latency.samples) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_quantile)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], tokens: int, mode: str = "complete") -> T:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(tokens)
+        start = time.monotonic()
+        result = await asyncio.wait_for(fn(), self.attempt_timeout)
+        self.tracker(mode).record(time.monotonic() - start)
+        return result
+
+    async def _hedged_attempt(self, fn: Callable[[], Awaitable[T]], tokens: int, mode: str = "complete") -> T:
+        # Only complete calls are hedged: a losing stream could not simply be discarded
+        delay = self.hedge_delay() if mode == "complete" else None
+        if delay is None:
+            return await self._attempt(fn, tokens, mode)
+
+        primary = asyncio.ensure_future(self._attempt(fn, tokens, mode))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        hedge = asyncio.ensure_future(self._attempt(fn, tokens, mode))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[T]], tokens: int = 0, hedge: bool = True,
+                   mode: str = "complete") -> T:
+        """
+        Run `fn` (a zero-argument coroutine factory) until it succeeds.
+
+        `tokens` is the request's estimated cost for the tokens-per-minute
+        limit; pass hedge=False for calls whose losing attempt cannot simply
+        be discarded. `mode` selects the latency window the call is recorded
+        in; only "complete" calls are hedged, never streams. Raises LLMError when the
+        error is not retryable, attempts are exhausted, or the deadline passes.
+        """
+        attempt_fn = self._hedged_attempt if hedge else self._attempt
+        started = time.monotonic()
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.retry.max_attempts):
+            try:
+                if self.deadline is None:
+                    return await attempt_fn(fn, tokens, mode)
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                return await asyncio.wait_for(attempt_fn(fn, tokens, mode), remaining)
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e) or attempt + 1 >= self.retry.max_attempts:
+                    break
+                delay = self.retry.backoff(attempt, e)
+                if self.deadline is not None and time.monotonic() - started + delay >= self.deadline:
+                    break
+                self.retries += 1
+                await asyncio.sleep(delay)
+        raise LLMError(f"LLM request failed: {last_error}") from last_error
+
+    async def stream(self, fn: Callable[[], Awaitable[AsyncIterator[T]]], tokens: int = 0) -> AsyncIterator[T]:
+        """
+        Open a stream with `call` (retried, never hedged) and yield its items.
+
+        The overall deadline covers reading the stream as well as opening it,
+        and each item must arrive within the per-attempt timeout; either
+        raises LLMError. The stream is closed however iteration ends.
+        """
+        started = time.monotonic()
+        stream = await self.call(fn, tokens, mode="stream")
+        items = stream.__aiter__()
+        try:
+            while True:
+                timeout, remaining = self.attempt_timeout, None
+                if self.deadline is not None:
+                    remaining = self.deadline - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise LLMError(f"LLM stream exceeded its {self.deadline}s deadline")
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                try:
+                    item = await asyncio.wait_for(items.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError as e:
+                    if timeout == remaining:
+                        raise LLMError(f"LLM stream exceeded its {self.deadline}s deadline") from e
+                    raise LLMError(f"LLM stream timed out after {timeout}s without a chunk") from e
+                yield item
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
@@ -0,0 +1,312 @@
+"""
+Per-role model routing across LLM providers.
+
+A provider backend is anything with the AsyncLLMClient interface
+(`cached`, `agenerate`, `astream`, `aclose`). Two kinds are built in, both
+speaking the OpenAI chat completions protocol:
+- "openai": api.openai.com or any hosted compatible endpoint
+- "local": a llama.cpp / vLLM / Ollama style server at `base_url`; no API
+  key is needed and requests are not rate limited client-side
+Further kinds can be added with `register_provider_type`.
+
+Each role maps to an ordered list of (provider, model) targets, optionally
+with a latency SLO in seconds. The router keeps EWMAs of every target's
+observed latency (of whole completions, and of the time to the first chunk
+for streamed requests, which is what a streaming caller waits on) and sends
+a request to the first target meeting its SLO for that kind of call,
+falling back to the fastest one when none is, and to the next target when
+a call fails. A target that was passed over is re-probed once its EWMA is
+`probe_interval` seconds old, so a recovered model wins its traffic back.
+
+Routing is read from the JSON file named by LLM_ROUTING_CONFIG:
+
+    {
+      "providers": {
+        "openai": {"type": "openai", "rpm": 500},
+        "local": {"type": "local", "base_url": "http://localhost:8080/v1"}
+      },
+      "routes": {
+        "product_owner": [{"provider": "local", "model": "llama-3.1-8b", "slo_seconds": 8},
+                          {"provider": "openai", "model": "gpt-4o-mini"}],
+        "developer": [{"provider": "openai", "model": "gpt-4o"}],
+        "default": [{"provider": "openai", "model": "gpt-4o-mini"}]
+      }
+    }
+
+Without a config file every role goes to OPENAI_MODEL at OPENAI_BASE_URL.
+"""
+import json
+import logging
+import os
+import re
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from aidevteam.api.llm_client import AsyncLLMClient
+from aidevteam.api.resilience import LLMError, RateLimiter, ResilientCaller
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTE = "default"
+
+# Agent display names and persona files that share a route with a sprint phase
+ROLE_ALIASES = {
+    "senior_backend_developer": "developer",
+    "backend_dev": "developer",
+    "software_architect": "architect",
+}
+
+
+def route_key(role: Optional[str]) -> str:
+    """Normalise a role ("Product Owner", "product_owner", ...) to its route name."""
+    if not role:
+        return DEFAULT_ROUTE
+    key = re.sub(r"[^a-z0-9]+", "_", role.lower()).strip("_")
+    return ROLE_ALIASES.get(key, key)
+
+
+def _provider_resilience(spec: dict, local: bool) -> ResilientCaller:
+    """Flow control for one provider; `rpm`/`tpm` in the spec override LLM_RPM/LLM_TPM."""
+    resilience = ResilientCaller.from_env()
+    if spec.get("rpm") or spec.get("tpm"):
+        resilience.rate_limiter = RateLimiter(spec.get("rpm"), spec.get("tpm"))
+    elif local:
+        resilience.rate_limiter = None
+    return resilience
+
+
+def _openai_provider(spec: dict, model: str, http_client: Optional[httpx.AsyncClient],
+                     resilience: ResilientCaller) -> AsyncLLMClient:
+    api_key = spec.get("api_key") or os.getenv(spec.get("api_key_env", "OPENAI_API_KEY"))
+    return AsyncLLMClient(api_key=api_key, base_url=spec.get("base_url"), http_client=http_client,
+                          resilience=resilience, model=model)
+
+
+def _local_provider(spec: dict, model: str, http_client: Optional[httpx.AsyncClient],
+                    resilience: ResilientCaller) -> AsyncLLMClient:
+    if not spec.get("base_url"):
+        raise ValueError("Local LLM providers need a base_url")
+    # Local servers ignore the key, but the SDK insists on one
+    return AsyncLLMClient(api_key=spec.get("api_key", "local"), base_url=spec["base_url"],
+                          http_client=http_client, resilience=resilience, model=model)
+
+
+PROVIDER_TYPES: Dict[str, Callable[..., AsyncLLMClient]] = {
+    "openai": _openai_provider,
+    "local": _local_provider,
+}
+
+
+def register_provider_type(kind: str, factory: Callable[..., AsyncLLMClient]) -> None:
+    """Add a backend kind: factory(spec, model, http_client, resilience) -> client."""
+    PROVIDER_TYPES[kind] = factory
+
+
+class LatencyEWMA:
+    """Exponentially weighted moving average of call latency, in seconds."""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+        self.samples = 0
+        self.updated = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.value = seconds if self.value is None else self.alpha * seconds + (1 - self.alpha) * self.value
+        self.samples += 1
+        self.updated = time.monotonic()
+
+
+class RouteTarget:
+    """One (provider, model) candidate for a role."""
+
+    # Latency charged for a failed call when there is nothing better to go on
+    FAILURE_PENALTY = 30.0
+
+    def __init__(self, provider: str, client: AsyncLLMClient, slo_seconds: Optional[float] = None):
+        self.provider = provider
+        self.client = client
+        self.slo_seconds = slo_seconds
+        self.latency = LatencyEWMA()  # whole completions
+        self.first_token = LatencyEWMA()  # time to the first streamed chunk
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}/{self.client.model}"
+
+    def ewma(self, mode: str = "complete") -> LatencyEWMA:
+        return self.first_token if mode == "stream" else self.latency
+
+    def meets_slo(self, mode: str = "complete") -> bool:
+        value = self.ewma(mode).value
+        if self.slo_seconds is None or value is None:
+            return True
+        return value <= self.slo_seconds
+
+    def record_success(self, seconds: float, mode: str = "complete") -> None:
+        self.calls += 1
+        self.ewma(mode).record(seconds)
+
+    def record_failure(self, new_call: bool = True) -> None:
+        """Penalise both latencies: a failing target is as unfit to stream as to complete."""
+        self.calls += new_call
+        self.failures += 1
+        for ewma in (self.latency, self.first_token):
+            ewma.record(2 * max(ewma.value or 0.0, self.slo_seconds or 0.0) or self.FAILURE_PENALTY)
+
+    def stats(self) -> dict:
+        def rounded(ewma: LatencyEWMA) -> Optional[float]:
+            return round(ewma.value, 3) if ewma.value is not None else None
+
+        return {
+            "target": self.name,
+            "slo_seconds": self.slo_seconds,
+            "latency_ewma": rounded(self.latency),
+            "first_token_ewma": rounded(self.first_token),
+            "calls": self.calls,
+            "failures": self.failures
+        }
+
+
+class ModelRouter:
+    """
+    Routes each request to a model by role, SLO and observed latency.
+
+    Exposes the same agenerate/astream interface as AsyncLLMClient, with an
+    extra `role` argument, so it can stand in wherever a client is expected.
+    """
+
+    def __init__(self, routes: Dict[str, List[RouteTarget]], probe_interval: float = 30.0):
+        if not routes.get(DEFAULT_ROUTE):
+            raise ValueError("Routing needs a non-empty 'default' route")
+        self.routes = routes
+        self.probe_interval = probe_interval
+
+    def select(self, role: Optional[str] = None, mode: str = "complete") -> List[RouteTarget]:
+        """Targets for a role in the order they should be tried, by the latency of `mode` calls."""
+        targets = self.routes.get(route_key(role)) or self.routes[DEFAULT_ROUTE]
+        now = time.monotonic()
+        preferred = [t for t in targets
+                     if t.meets_slo(mode) or now - t.ewma(mode).updated >= self.probe_interval]
+        rest = sorted((t for t in targets if t not in preferred), key=lambda t: t.ewma(mode).value)
+        return preferred + rest
+
+    @staticmethod
+    def _cached(targets: List[RouteTarget], system_prompt: str, user_prompt: str,
+                max_tokens: int) -> Optional[str]:
+        for target in targets:
+            content = target.client.cached(system_prompt, user_prompt, max_tokens)
+            if content is not None:
+                return content
+        return None
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                        role: Optional[str] = None) -> str:
+        """Generate with the best target for the role, failing over on LLMError."""
+        targets = self.select(role)
+        content = self._cached(targets, system_prompt, user_prompt, max_tokens)
+        if content is not None:
+            return content
+        last_error: Optional[LLMError] = None
+        for target in targets:
+            start = time.monotonic()
+            try:
+                content = await target.client.agenerate(system_prompt, user_prompt, max_tokens, check_cache=False)
+            except LLMError as e:
+                target.record_failure()
+                logger.warning("LLM target %s failed for %s: %s", target.name, route_key(role), e)
+                last_error = e
+                continue
+            target.record_success(time.monotonic() - start)
+            return content
+        raise last_error
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                      role: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream from the best target for the role; fails over only before the
+        first chunk. The target is timed to its first chunk, not to the end
+        of the stream, which also depends on how fast the caller consumes it.
+        """
+        targets = self.select(role, mode="stream")
+        content = self._cached(targets, system_prompt, user_prompt, max_tokens)
+        if content is not None:
+            yield content
+            return
+        last_error: Optional[LLMError] = None
+        for target in targets:
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in target.client.astream(system_prompt, user_prompt, max_tokens, check_cache=False):
+                    if not started:
+                        started = True
+                        target.record_success(time.monotonic() - start, mode="stream")
+                    yield chunk
+            except LLMError as e:
+                target.record_failure(new_call=not started)
+                if started:
+                    raise
+                logger.warning("LLM target %s failed for %s: %s", target.name, route_key(role), e)
+                last_error = e
+                continue
+            if not started:  # an empty response
+                target.record_success(time.monotonic() - start, mode="stream")
+            return
+        raise last_error
+
+    def stats(self) -> Dict[str, List[dict]]:
+        return {role: [t.stats() for t in targets] for role, targets in self.routes.items()}
+
+    async def aclose(self) -> None:
+        clients = {id(t.client): t.client for targets in self.routes.values() for t in targets}
+        for client in clients.values():
+            await client.aclose()
+
+
+def load_routing_config(path: Optional[str] = None) -> dict:
+    """Routing config from `path` or LLM_ROUTING_CONFIG, else a single default route."""
+    path = path or os.getenv("LLM_ROUTING_CONFIG")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {
+        "providers": {"openai": {"type": "openai"}},
+        "routes": {DEFAULT_ROUTE: [{"provider": "openai", "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini")}]}
+    }
+
+
+def build_router(config: Optional[dict] = None, http_client: Optional[httpx.AsyncClient] = None) -> ModelRouter:
+    """
+    Build a router from a routing config.
+
+    Every target on the same provider shares that provider's rate limits,
+    and all providers share `http_client` (the pooled connections).
+    """
+    config = config if config is not None else load_routing_config()
+    providers = config.get("providers", {})
+    resilience: Dict[str, ResilientCaller] = {}
+    clients: Dict[tuple, AsyncLLMClient] = {}
+    routes: Dict[str, List[RouteTarget]] = {}
+    for role, entries in config.get("routes", {}).items():
+        targets = []
+        for entry in entries:
+            name = entry["provider"]
+            if name not in providers:
+                raise ValueError(f"Route {role!r} refers to unknown provider {name!r}")
+            spec = providers[name]
+            kind = spec.get("type", "openai")
+            if kind not in PROVIDER_TYPES:
+                raise ValueError(f"Unknown LLM provider type {kind!r}")
+            if name not in resilience:
+                resilience[name] = _provider_resilience(spec, local=kind == "local")
+            key = (name, entry["model"])
+            if key not in clients:
+                clients[key] = PROVIDER_TYPES[kind](spec, entry["model"], http_client, resilience[name])
+            targets.append(RouteTarget(name, clients[key], entry.get("slo_seconds")))
+        routes[route_key(role)] = targets
+    return ModelRouter(routes, probe_interval=float(config.get("probe_interval", 30.0)))
@@ -2,76 +2,97 @@
 FastAPI Server with WebSocket support for real-time sprint updates.
 """
 import asyncio
+import logging
+import math
+import os
+import time
 import uuid
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 from datetime import datetime
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
-from aidevteam.api.llm_client import get_llm_client, PROMPTS, LLMClient
-
-
-# Models
-class SprintRequest(BaseModel):
-    goal: str
-
-
-class AgentUpdate(BaseModel):
-    agent_id: str
-    name: str
-    status: str  # idle, thinking, active, done
-    thought: Optional[str] = None
-
-
-class ArtifactUpdate(BaseModel):
-    id: str
-    title: str
-    type: str  # design, code, test
-    preview: str
-    content: str
-    timestamp: str
-
-
-class LogUpdate(BaseModel):
-    id: str
-    agent: str
-    message: str
-    timestamp: str
-
-
-class SprintUpdate(BaseModel):
-    type: str  # agent_update, artifact, log, complete
-    data: dict
-
-
-# Connection Manager for WebSockets
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def connect(self, session_id: str, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections[session_id] = websocket
-    
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-    
-    async def send_update(self, session_id: str, update: SprintUpdate):
-        if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(update.model_dump())
-
+from aidevteam.api.models import SprintRequest, SprintUpdate
+from aidevteam.api.bus import Subscription, get_bus, is_terminal, session_channel
+from aidevteam.api.connections import ConnectionManager, Subscriber
+from aidevteam.api.sessions import SessionStore, SprintSession
+from aidevteam.api.worker import SprintWorker
+from aidevteam.api.store import extract_stories, get_sprint_store
+from aidevteam.api.artifacts import ArtifactStore
+from aidevteam.api.wire import artifact_url, negotiate_encoding
+from aidevteam.api.llm_client import get_async_llm_client, llm_registry, PROMPTS
+from aidevteam.api.routing import ModelRouter
+from aidevteam.api.cache import get_response_cache
+from aidevteam.api.context import ContextBudgeter, count_tokens
+from aidevteam.api.pipeline import SectionStream
+from aidevteam.api import metrics
+from aidevteam.agents.scripts.code_index import close_code_index
+from aidevteam.agents.scripts.sandbox import TestRun, extract_python, get_qa_sandbox
+from aidevteam.agents.scripts.tools import workspace_tools
+from aidevteam.agents.scripts.workspace import Workspace
+
+
+logger = logging.getLogger(__name__)
 
 manager = ConnectionManager()
+sprint_store = get_sprint_store()
+sprint_sessions = SessionStore(store=sprint_store)
+artifact_store = ArtifactStore()
+context_budgeter = ContextBudgeter()
+
+# Sprint execution across processes (see api/bus.py and api/worker.py).
+# SPRINT_EXECUTION=inline runs sprints started over a WebSocket in this
+# process; "queue" enqueues them for sprint workers, like POST /sprints
+# always does. SPRINT_WORKERS is the number of queued sprints this process
+# runs at a time (default: 1 with the in-memory bus, 0 with a shared one,
+# where `python -m aidevteam.api.worker` processes consume the queue).
+# POST /sprints is rejected with 429 while SPRINT_QUEUE_LIMIT jobs wait.
+# Jobs are delivered at most once: a worker that dies mid-sprint loses it,
+# and with a shared bus its sprint is flagged "interrupted" by the next
+# process to start once it has logged nothing for SPRINT_STALE_SECONDS.
+event_bus, job_queue = get_bus()
+SPRINT_EXECUTION = os.getenv("SPRINT_EXECUTION", "inline")
+SPRINT_WORKERS = int(os.getenv("SPRINT_WORKERS") or (0 if event_bus.distributed else 1))
+SPRINT_QUEUE_LIMIT = int(os.getenv("SPRINT_QUEUE_LIMIT", "500"))
+SPRINT_STALE_SECONDS = float(os.getenv("SPRINT_STALE_SECONDS", "3600"))
+sprint_worker: Optional[SprintWorker] = None
+# Headless sprints accepted here and not started yet, for GET /sprints/{id} without a sprint store
+queued_sprints: Dict[str, dict] = {}
+
+
+def collect_metrics():
+    """Refresh session and queue gauges before a /metrics scrape."""
+    connections = manager.metrics()
+    metrics.ACTIVE_SESSIONS.set(sum(1 for s in sprint_sessions.sessions.values() if s.is_running))
+    metrics.WS_SUBSCRIBERS.set(connections["subscribers"])
+    metrics.WS_QUEUE_DEPTH.labels(stat="total").set(connections["queue_depth_total"])
+    metrics.WS_QUEUE_DEPTH.labels(stat="max").set(connections["queue_depth_max"])
+
+
+metrics.on_collect(collect_metrics)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
+    global sprint_worker
+    await llm_registry.startup()
+    if sprint_store is not None:
+        await asyncio.to_thread(sprint_store.open)
+    await recover_sprints()
+    if SPRINT_WORKERS > 0:
+        sprint_worker = SprintWorker(job_queue, start_sprint_job, SPRINT_WORKERS, fail=fail_sprint_job)
+        sprint_worker.start()
     yield
+    if sprint_worker is not None:
+        await sprint_worker.stop()
+    await sprint_sessions.shutdown()
+    await llm_registry.shutdown()
+    await event_bus.close()
+    if sprint_store is not None:
+        await asyncio.to_thread(sprint_store.close)
 
 
 app = FastAPI(
@@ -91,13 +112,30 @@ app.add_middleware(
 )
 
 
+async def publish(session_id: str, update: SprintUpdate):
+    """Append an update to the session's event log and fan it out to subscribers."""
+    with metrics.UPDATE_PUBLISH_SECONDS.labels(type=update.type).time():
+        if update.type == "artifact":
+            artifact_store.put(update.data["id"], update.data.get("content") or "")
+        await publish_payload(session_id, update.model_dump())
+    metrics.UPDATES_PUBLISHED.labels(type=update.type).inc()
+
+
+async def publish_payload(session_id: str, payload: dict) -> dict:
+    """Log a raw payload, send it to local subscribers and to the event bus for other processes."""
+    payload = sprint_sessions.record(session_id, payload)
+    await manager.send_json(session_id, payload)
+    await event_bus.publish(session_channel(session_id), payload)
+    return payload
+
+
 def get_timestamp() -> str:
     return datetime.now().strftime("%H:%M:%S")
 
 
 async def send_log(session_id: str, agent: str, message: str):
     """Send a log update to the client."""
-    await manager.send_update(session_id, SprintUpdate(
+    await publish(session_id, SprintUpdate(
         type="log",
         data={
             "id": str(uuid.uuid4()),
@@ -110,7 +148,7 @@ async def send_log(session_id: str, agent: str, message: str):
 
 async def send_agent_update(session_id: str, agent_id: str, name: str, status: str, thought: Optional[str] = None):
     """Send an agent status update to the client."""
-    await manager.send_update(session_id, SprintUpdate(
+    await publish(session_id, SprintUpdate(
         type="agent_update",
         data={
             "agent_id": agent_id,
@@ -121,12 +159,13 @@ async def send_agent_update(session_id: str, agent_id: str, name: str, status: s
     ))
 
 
-async def send_artifact(session_id: str, title: str, artifact_type: str, preview: str, content: str):
+async def send_artifact(session_id: str, title: str, artifact_type: str, preview: str, content: str,
+                        artifact_id: Optional[str] = None):
     """Send an artifact to the client."""
-    await manager.send_update(session_id, SprintUpdate(
+    await publish(session_id, SprintUpdate(
         type="artifact",
         data={
-            "id": str(uuid.uuid4()),
+            "id": artifact_id or str(uuid.uuid4()),
             "title": title,
             "type": artifact_type,
             "preview": preview,
@@ -136,121 +175,722 @@ async def send_artifact(session_id: str, title: str, artifact_type: str, preview
     ))
 
 
-async def run_sprint(session_id: str, goal: str, llm: LLMClient):
-    """Run the full sprint cycle with real LLM generation."""
-    
-    await send_log(session_id, "System", f'Sprint started with goal: "{goal}"')
-    
-    # Phase 1: Product Owner - Generate User Stories
-    await send_agent_update(session_id, "po", "Product Owner", "active", "Analyzing requirements...")
-    await send_log(session_id, "Product Owner", "Breaking down the goal into user stories...")
+async def send_artifact_delta(session_id: str, artifact_id: str, title: str, artifact_type: str, delta: str):
+    """Append text to an artifact the client is building from deltas."""
+    await publish(session_id, SprintUpdate(
+        type="artifact_delta",
+        data={
+            "id": artifact_id,
+            "title": title,
+            "type": artifact_type,
+            "delta": delta
+        }
+    ))
+
+
+# Streamed tokens are coalesced into artifact_delta frames of at least
+# DELTA_MIN_CHARS, or whatever arrived within DELTA_MAX_INTERVAL seconds.
+DELTA_MIN_CHARS = 256
+DELTA_MAX_INTERVAL = 0.1
+
+
+async def stream_artifact(session_id: str, artifact_id: str, title: str, artifact_type: str,
+                          chunks: AsyncIterator[str]) -> str:
+    """
+    Forward a token stream to the client as coalesced artifact_delta updates.
+
+    The first chunk is flushed immediately to minimise time to first byte.
+    Returns the full concatenated content.
+    """
+    parts: List[str] = []
+    pending: List[str] = []
+    pending_chars = 0
+    last_flush = float("-inf")
+
+    async def flush():
+        nonlocal pending, pending_chars, last_flush
+        if pending:
+            await send_artifact_delta(session_id, artifact_id, title, artifact_type, "".join(pending))
+        pending = []
+        pending_chars = 0
+        last_flush = time.monotonic()
+
+    async for chunk in chunks:
+        parts.append(chunk)
+        pending.append(chunk)
+        pending_chars += len(chunk)
+        if pending_chars >= DELTA_MIN_CHARS or time.monotonic() - last_flush >= DELTA_MAX_INTERVAL:
+            await flush()
+    await flush()
+
+    return "".join(parts)
+
+
+async def generate_artifact(session_id: str, llm: ModelRouter, title: str, artifact_type: str,
+                            system_prompt: str, user_prompt: str, role: Optional[str] = None,
+                            sections: Optional[SectionStream] = None) -> Tuple[str, str]:
+    """
+    Stream an LLM generation to the client. Returns (artifact_id, content).
+    With `sections`, the generation is also split into sections for downstream phases.
+    """
+    artifact_id = str(uuid.uuid4())
+    chunks = llm.astream(system_prompt, user_prompt, role=role)
+    if sections is not None:
+        chunks = sections.tap(chunks)
+    content = await stream_artifact(session_id, artifact_id, title, artifact_type, chunks)
+    return artifact_id, content
+
+
+async def publish_usage(session_id: str, phase: str, artifact_id: str, system_prompt: str, user_prompt: str,
+                        content: str, compaction: Dict[str, dict]):
+    """Report a generation's input/output token counts as a `usage` update."""
+    await publish(session_id, SprintUpdate(
+        type="usage",
+        data={
+            "phase": phase,
+            "artifact_id": artifact_id,
+            "input_tokens": count_tokens(system_prompt) + count_tokens(user_prompt),
+            "output_tokens": count_tokens(content),
+            "compaction": compaction
+        }
+    ))
+
+
+async def run_phase(session_id: str, llm: ModelRouter, phase: str, title: str, artifact_type: str,
+                    goal: str, prompt: Optional[str] = None, sections: Optional[SectionStream] = None,
+                    **upstream: str) -> Tuple[str, str]:
+    """
+    Run one agent phase: budget its upstream context, stream the generation
+    and report input/output token counts as a `usage` update. `prompt`
+    selects another prompt for the phase's role (e.g. "qa_plan").
+    """
+    prompt = prompt or phase
+    with metrics.timed_phase(phase, session_id=session_id):
+        inputs, compaction = context_budgeter.prepare(prompt, **upstream)
+        system_prompt = PROMPTS[prompt]["system"]
+        user_prompt = PROMPTS[prompt]["user"].format(goal=goal, **inputs)
+        
+        artifact_id, content = await generate_artifact(
+            session_id, llm, title, artifact_type, system_prompt, user_prompt, role=phase, sections=sections
+        )
     
-    stories = llm.generate(
-        PROMPTS["product_owner"]["system"],
-        PROMPTS["product_owner"]["user"].format(goal=goal)
-    )
+    await publish_usage(session_id, phase, artifact_id, system_prompt, user_prompt, content, compaction)
+    return artifact_id, content
+
+
+# Titles of the inputs a phase may receive late, in reconciliation prompts
+RECONCILE_INPUTS = {"stories": "User Stories Added Since", "code": "Source Code",
+                    "test_results": "Results of Your Tests"}
+
+
+async def reconcile_phase(session_id: str, llm: ModelRouter, phase: str, artifact_id: str, title: str,
+                          artifact_type: str, goal: str, draft: str, **updates: str) -> str:
+    """
+    Bring a draft started on partial upstream output up to date with the
+    rest of it. The addendum is streamed onto the draft's artifact and returned.
+    """
+    with metrics.timed_phase(f"{phase}_reconcile", session_id=session_id):
+        inputs, compaction = context_budgeter.prepare(phase, **updates)
+        system_prompt = PROMPTS[phase]["system"]
+        user_prompt = PROMPTS["reconcile"]["user"].format(goal=goal, draft=draft, updates="\n\n".join(
+            f"{RECONCILE_INPUTS.get(name, name.title())}:\n{text}" for name, text in inputs.items()
+        ))
+
+        async def chunks():
+            yield "\n\n"
+            async for chunk in llm.astream(system_prompt, user_prompt, role=phase):
+                yield chunk
+
+        addendum = (await stream_artifact(session_id, artifact_id, title, artifact_type, chunks()))[2:]
     
-    await send_artifact(session_id, "User Stories", "design", f"{len(stories.split('##'))-1} stories defined", stories)
+    await publish_usage(session_id, f"{phase}_reconcile", artifact_id, system_prompt, user_prompt, addendum,
+                        compaction)
+    return addendum
+
+
+async def run_generated_tests(session_id: str, code: str, test_report: str) -> Optional[TestRun]:
+    """
+    Run the QA phase's pytest module against the developer's main.py, if both
+    contain code and the isolated sandbox is enabled (QA_SANDBOX=1, see
+    agents/scripts/sandbox.py).
+    """
+    sandbox = get_qa_sandbox()
+    if sandbox is None:
+        return None
+    source = extract_python(code)
+    tests = extract_python(test_report, tests=True)
+    if not source or not tests:
+        return None
+    with metrics.timed_phase("qa_tests", session_id=session_id):
+        return await sandbox.arun({"main.py": source, "test_main.py": tests})
+
+
+# SPRINT_PIPELINE=1 overlaps phases: the architect starts once the first
+# SPRINT_PIPELINE_MIN_STORIES stories have streamed and QA plans tests from
+# the design while the developer codes; each then reconciles with the rest.
+SPRINT_PIPELINE = os.getenv("SPRINT_PIPELINE", "0") == "1"
+SPRINT_PIPELINE_MIN_STORIES = int(os.getenv("SPRINT_PIPELINE_MIN_STORIES", "1"))
+
+
+# With SPRINT_WORKSPACE_ROOT set, each sprint's generated main.py and
+# test_main.py are also written to its workspace (<root>/<sprint id>)
+# through the sprint's file tools, where search_code and the other
+# workspace tools see them; its code index is dropped when the sprint ends.
+SPRINT_WORKSPACE_ROOT = os.getenv("SPRINT_WORKSPACE_ROOT")
+
+
+async def save_sprint_files(session_id: str, files: Dict[str, str]) -> None:
+    """Write generated files to the sprint's workspace, if workspaces are enabled."""
+    files = {path: content for path, content in files.items() if content}
+    if not SPRINT_WORKSPACE_ROOT or not files:
+        return
+    tools = {tool.name: tool for tool in workspace_tools(Workspace.for_sprint(session_id, SPRINT_WORKSPACE_ROOT))}
+    result = await tools["write_files"].ainvoke({"files": files})
+    if "Error with" in result:
+        logger.warning("Could not save the files of sprint %s: %s", session_id, result)
+
+
+async def finish_stories(session_id: str, stories_id: str, stories: str):
+    await send_artifact(session_id, "User Stories", "design", f"{len(stories.split('##'))-1} stories defined", stories,
+                        artifact_id=stories_id)
+    sprint_sessions.save_stories(session_id, extract_stories(stories))
     await send_agent_update(session_id, "po", "Product Owner", "done")
     await send_log(session_id, "Product Owner", "User stories defined and prioritized.")
-    
-    await asyncio.sleep(0.5)  # Small delay for UI feedback
-    
-    # Phase 2: Architect - Generate Technical Design
-    await send_agent_update(session_id, "arch", "Architect", "active", "Designing system...")
-    await send_log(session_id, "Architect", "Creating technical design document...")
-    
-    design = llm.generate(
-        PROMPTS["architect"]["system"],
-        PROMPTS["architect"]["user"].format(goal=goal, stories=stories)
-    )
-    
+
+
+async def finish_design(session_id: str, design_id: str, design: str):
     # Extract tech stack for preview
     tech_preview = "FastAPI + React" if "FastAPI" in design else "Custom Stack"
-    await send_artifact(session_id, "Technical Design", "design", tech_preview, design)
+    await send_artifact(session_id, "Technical Design", "design", tech_preview, design, artifact_id=design_id)
     await send_agent_update(session_id, "arch", "Architect", "done")
     await send_log(session_id, "Architect", "Architecture approved. Ready for implementation.")
-    
-    await asyncio.sleep(0.5)
-    
-    # Phase 3: Developer - Generate Code
-    await send_agent_update(session_id, "dev", "Developer", "active", "Writing code...")
-    await send_log(session_id, "Developer", "Implementing API endpoints...")
-    
-    code = llm.generate(
-        PROMPTS["developer"]["system"],
-        PROMPTS["developer"]["user"].format(goal=goal, design=design)
-    )
-    
+
+
+async def finish_code(session_id: str, code_id: str, code: str):
     # Extract first function name for preview
     code_preview = "main.py"
-    await send_artifact(session_id, "main.py", "code", code_preview, code)
+    await send_artifact(session_id, "main.py", "code", code_preview, code, artifact_id=code_id)
+    await save_sprint_files(session_id, {"main.py": extract_python(code)})
     await send_agent_update(session_id, "dev", "Developer", "done")
     await send_log(session_id, "Developer", "Implementation complete. Handing off to QA.")
+
+
+async def finish_tests(session_id: str, report_id: str, test_report: str, code: str, tests: Optional[str] = None):
+    """Run the report's tests (or `tests`, when they were revised) and publish the report."""
+    tests = tests or test_report
+    # Run the generated tests against the generated code; the preview reports the real outcome
+    test_run = await run_generated_tests(session_id, code, tests)
+    if test_run is not None:
+        # Streamed like the report itself, so clients building it from deltas (?lazy=1) show the results
+        results = "\n\n" + test_run.to_markdown()
+        await send_artifact_delta(session_id, report_id, "Test Report", "test", results)
+        test_report += results
+        test_preview = test_run.summary()
+        qa_message = "All tests passed. Sprint complete!" if test_run.passed else f"Test run: {test_preview}."
+    else:
+        test_preview = "100% PASS" if "PASS" in test_report.upper() else "Tests Complete"
+        qa_message = "All tests passed. Sprint complete!"
+    await send_artifact(session_id, "Test Report", "test", test_preview, test_report, artifact_id=report_id)
+    await save_sprint_files(session_id, {"test_main.py": extract_python(tests, tests=True)})
+    await send_agent_update(session_id, "qa", "QA Engineer", "done")
+    await send_log(session_id, "QA", qa_message)
+
+
+async def gather_or_cancel(*tasks: asyncio.Task) -> None:
+    """Cancel the sibling phases of one that failed (or of a cancelled sprint)."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_sprint(session_id: str, goal: str, llm: ModelRouter):
+    """
+    Run the full sprint cycle with real LLM generation.
+
+    Updates are paced by the session's outbound queue (see ConnectionManager);
+    there is no artificial delay, and with no socket attached (headless/API
+    use) the sprint runs as fast as the LLM allows.
+    """
     
-    await asyncio.sleep(0.5)
-    
-    # Phase 4: QA Engineer - Generate Test Report
-    await send_agent_update(session_id, "qa", "QA Engineer", "active", "Running tests...")
-    await send_log(session_id, "QA", "Executing automated test suite...")
-    
-    test_report = llm.generate(
-        PROMPTS["qa_engineer"]["system"],
-        PROMPTS["qa_engineer"]["user"].format(goal=goal, code=code)
-    )
+    await send_log(session_id, "System", f'Sprint started with goal: "{goal}"')
     
-    # Determine pass/fail for preview
-    test_preview = "100% PASS" if "PASS" in test_report.upper() else "Tests Complete"
-    await send_artifact(session_id, "Test Report", "test", test_preview, test_report)
-    await send_agent_update(session_id, "qa", "QA Engineer", "done")
-    await send_log(session_id, "QA", "All tests passed. Sprint complete!")
+    if SPRINT_PIPELINE:
+        await run_pipelined_phases(session_id, goal, llm)
+    else:
+        # Phase 1: Product Owner - Generate User Stories
+        await send_agent_update(session_id, "po", "Product Owner", "active", "Analyzing requirements...")
+        await send_log(session_id, "Product Owner", "Breaking down the goal into user stories...")
+        
+        stories_id, stories = await run_phase(session_id, llm, "product_owner", "User Stories", "design", goal)
+        await finish_stories(session_id, stories_id, stories)
+        
+        # Phase 2: Architect - Generate Technical Design
+        await send_agent_update(session_id, "arch", "Architect", "active", "Designing system...")
+        await send_log(session_id, "Architect", "Creating technical design document...")
+        
+        design_id, design = await run_phase(
+            session_id, llm, "architect", "Technical Design", "design", goal, stories=stories
+        )
+        await finish_design(session_id, design_id, design)
+        
+        # Phase 3: Developer - Generate Code
+        await send_agent_update(session_id, "dev", "Developer", "active", "Writing code...")
+        await send_log(session_id, "Developer", "Implementing API endpoints...")
+        
+        code_id, code = await run_phase(session_id, llm, "developer", "main.py", "code", goal, design=design)
+        await finish_code(session_id, code_id, code)
+        
+        # Phase 4: QA Engineer - Generate Test Report
+        await send_agent_update(session_id, "qa", "QA Engineer", "active", "Running tests...")
+        await send_log(session_id, "QA", "Executing automated test suite...")
+        
+        report_id, test_report = await run_phase(session_id, llm, "qa_engineer", "Test Report", "test", goal, code=code)
+        await finish_tests(session_id, report_id, test_report, code)
     
     await send_log(session_id, "System", "Sprint retrospective complete. Ready for next cycle.")
     
     # Send completion signal
-    await manager.send_update(session_id, SprintUpdate(
+    await publish(session_id, SprintUpdate(
         type="complete",
         data={"success": True}
     ))
 
 
+async def run_pipelined_phases(session_id: str, goal: str, llm: ModelRouter):
+    """
+    The sprint phases with overlapping agents (SPRINT_PIPELINE=1).
+
+    1. The architect designs from the first stories while the Product Owner
+       writes the rest, then reconciles the design with the later stories.
+    2. QA writes its tests from the design while the developer codes. The
+       tests are run against the code, and only when they fail does QA
+       reconcile them with the code (and the failures) before the final run.
+    Artifacts are still completed in phase order.
+    """
+    await send_agent_update(session_id, "po", "Product Owner", "active", "Analyzing requirements...")
+    await send_log(session_id, "Product Owner", "Breaking down the goal into user stories...")
+    
+    story_sections = SectionStream()
+    po = asyncio.create_task(run_phase(session_id, llm, "product_owner", "User Stories", "design", goal,
+                                       sections=story_sections))
+    tasks = [po]
+    try:
+        seen = await story_sections.wait_for(SPRINT_PIPELINE_MIN_STORIES)
+        await send_agent_update(session_id, "arch", "Architect", "active", "Designing system...")
+        await send_log(session_id, "Architect", f"Creating technical design from the first {len(seen)} stories...")
+        arch = asyncio.create_task(run_phase(session_id, llm, "architect", "Technical Design", "design", goal,
+                                             stories="".join(seen)))
+        tasks.append(arch)
+        stories_id, stories = await po
+        await finish_stories(session_id, stories_id, stories)
+        design_id, design = await arch
+    except BaseException:
+        await gather_or_cancel(*tasks)
+        raise
+    
+    later = story_sections.sections[len(seen):]
+    if later:
+        await send_log(session_id, "Architect", f"Reconciling the design with {len(later)} more stories...")
+        design += "\n\n" + await reconcile_phase(session_id, llm, "architect", design_id, "Technical Design",
+                                                  "design", goal, design, stories="".join(later))
+    await finish_design(session_id, design_id, design)
+    
+    await send_agent_update(session_id, "dev", "Developer", "active", "Writing code...")
+    await send_log(session_id, "Developer", "Implementing API endpoints...")
+    await send_agent_update(session_id, "qa", "QA Engineer", "active", "Planning tests...")
+    await send_log(session_id, "QA", "Writing the test suite from the technical design...")
+    dev = asyncio.create_task(run_phase(session_id, llm, "developer", "main.py", "code", goal, design=design))
+    qa = asyncio.create_task(run_phase(session_id, llm, "qa_engineer", "Test Report", "test", goal,
+                                       prompt="qa_plan", design=design))
+    try:
+        code_id, code = await dev
+        await finish_code(session_id, code_id, code)
+        report_id, test_report = await qa
+    except BaseException:
+        await gather_or_cancel(dev, qa)
+        raise
+    
+    planned = await run_generated_tests(session_id, code, test_report)
+    if planned is not None and planned.passed:
+        # Sandbox results are cached, so the final run does not execute them again
+        await finish_tests(session_id, report_id, test_report, code)
+        return
+    await send_log(session_id, "QA", "Reconciling the tests with the implementation...")
+    results = {"test_results": planned.to_markdown()} if planned is not None else {}
+    revision = await reconcile_phase(session_id, llm, "qa_engineer", report_id, "Test Report", "test", goal,
+                                     test_report, code=code, **results)
+    # A revised test module replaces the planned one
+    tests = revision if extract_python(revision, tests=True) else test_report
+    await finish_tests(session_id, report_id, test_report + "\n\n" + revision, code, tests)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "version": "1.0.0"}
+    cache = get_response_cache()
+    return {
+        "status": "healthy",
+        "version": "1.0.0",
+        "llm_cache": cache.stats() if cache is not None else None,
+        "llm_routes": llm_registry.stats(),
+        "connections": manager.metrics(),
+        "execution": {
+            "mode": SPRINT_EXECUTION,
+            "shared_bus": event_bus.distributed,
+            "worker": sprint_worker.stats() if sprint_worker is not None else None
+        }
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: LLM, phase and publish latencies, tokens, queues and sessions."""
+    metrics.SPRINT_QUEUE_DEPTH.set(await job_queue.size())
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@app.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str, request: Request):
+    """Artifact body for lazily-loaded artifact frames; immutable and cacheable."""
+    item = artifact_store.get(artifact_id)
+    if item is None and sprint_store is not None:
+        item = await asyncio.to_thread(sprint_store.get_artifact, artifact_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    content, etag = item
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return PlainTextResponse(content, headers=headers)
+
+
+def require_sprint_store():
+    if sprint_store is None:
+        raise HTTPException(status_code=503, detail="Sprint history is disabled (SPRINT_DB_PATH is empty)")
+    return sprint_store
+
+
+@app.get("/sprints")
+async def list_sprints(limit: int = 20, cursor: Optional[str] = None):
+    """Past and running sprints, newest first; follow `next_cursor` for the next page."""
+    store = require_sprint_store()
+    try:
+        sprints, next_cursor = await asyncio.to_thread(store.list_sprints, max(1, min(limit, 100)), cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"sprints": sprints, "next_cursor": next_cursor}
+
+
+# Assumed sprint duration for Retry-After until the local worker has finished one
+DEFAULT_SPRINT_SECONDS = 60.0
+
+
+def retry_after(queue_depth: int) -> int:
+    """Seconds until a rejected submission is likely to fit in the queue again."""
+    seconds = DEFAULT_SPRINT_SECONDS
+    concurrency = 1
+    if sprint_worker is not None:
+        seconds = sprint_worker.average_seconds or seconds
+        concurrency = sprint_worker.concurrency
+    overflow = queue_depth - SPRINT_QUEUE_LIMIT + 1
+    return max(1, math.ceil(seconds * overflow / concurrency))
+
+
+@app.post("/sprints", status_code=202)
+async def submit_sprint(request: SprintRequest):
+    """
+    Queue a headless sprint and return its id at once; poll GET /sprints/{id}
+    (or follow the WebSocket with {"observe": true}). Higher `priority`
+    runs first. When SPRINT_QUEUE_LIMIT jobs are already waiting the
+    request is shed with 429 and a Retry-After header.
+    """
+    depth = await job_queue.size()
+    metrics.SPRINT_QUEUE_DEPTH.set(depth)
+    if depth >= SPRINT_QUEUE_LIMIT:
+        metrics.SPRINTS_SUBMITTED.labels(outcome="shed").inc()
+        raise HTTPException(status_code=429, detail="Sprint queue is full",
+                            headers={"Retry-After": str(retry_after(depth))})
+    sprint_id = uuid.uuid4().hex
+    await enqueue_sprint(sprint_id, request.goal, request.priority)
+    metrics.SPRINTS_SUBMITTED.labels(outcome="queued").inc()
+    metrics.SPRINT_QUEUE_DEPTH.set(depth + 1)
+    return {
+        "id": sprint_id,
+        "status": "queued",
+        "priority": request.priority,
+        "queue_depth": depth + 1,
+        "status_url": f"/sprints/{sprint_id}",
+        "events_url": f"/sprints/{sprint_id}/events"
+    }
+
+
+def session_summary(session: SprintSession) -> dict:
+    """GET /sprints/{id} body for an in-memory session (no sprint store)."""
+    artifacts = [e["data"] for e in session.events if e.get("type") == "artifact"]
+    return {
+        "id": session.session_id,
+        "goal": session.goal,
+        "status": session.status,
+        "created_at": session.created_at,
+        "finished_at": session.finished_at,
+        "stories": [],
+        "artifacts": [
+            {"id": a["id"], "title": a["title"], "type": a["type"], "content_length": len(a.get("content") or "")}
+            for a in artifacts
+        ],
+        "event_count": len(session.events)
+    }
+
+
+@app.get("/sprints/{sprint_id}")
+async def get_sprint(sprint_id: str):
+    """A sprint's status with its stories and artifact metadata (bodies via /artifacts/{id})."""
+    if sprint_store is not None:
+        sprint = await asyncio.to_thread(sprint_store.get_sprint, sprint_id)
+    elif sprint_id in sprint_sessions.sessions:
+        sprint = session_summary(sprint_sessions.sessions[sprint_id])
+    elif sprint_id in queued_sprints:
+        job = queued_sprints[sprint_id]
+        sprint = {"id": sprint_id, "goal": job["goal"], "status": "queued", "created_at": job["submitted_at"],
+                  "finished_at": None, "stories": [], "artifacts": [], "event_count": 0}
+    else:
+        sprint = None
+    if sprint is None:
+        raise HTTPException(status_code=404, detail="Sprint not found")
+    for artifact in sprint["artifacts"]:
+        artifact["content_url"] = artifact_url(artifact["id"])
+    return sprint
+
+
+@app.get("/sprints/{sprint_id}/events")
+async def get_sprint_events(sprint_id: str, after: int = 0, limit: int = 500):
+    """A sprint's persisted event log after seq `after`, in pages of at most `limit`."""
+    events = await asyncio.to_thread(require_sprint_store().get_events, sprint_id, after, max(1, min(limit, 1000)))
+    return {"events": events, "next_after": events[-1]["seq"] if events else None}
+
+
+async def run_session_sprint(session_id: str, goal: str, llm: ModelRouter):
+    """Detached sprint task: failures are logged to the session like any other event."""
+    try:
+        await run_sprint(session_id, goal, llm)
+    except Exception as e:
+        await publish_payload(session_id, {"error": str(e)})
+        raise
+    finally:
+        if SPRINT_WORKSPACE_ROOT:
+            close_code_index(os.path.join(SPRINT_WORKSPACE_ROOT, session_id))
+
+
+async def recover_sprints() -> None:
+    """Flag sprints left queued or running by processes that are gone."""
+    if sprint_store is None:
+        return
+    if event_bus.distributed:
+        # Other processes may be running sprints: only flag the ones that went quiet
+        await asyncio.to_thread(sprint_store.mark_interrupted, SPRINT_STALE_SECONDS)
+    else:
+        await asyncio.to_thread(sprint_store.mark_interrupted)
+
+
+async def enqueue_sprint(sprint_id: str, goal: str, priority: int = 0) -> dict:
+    """Record a sprint as queued and put its job on the queue."""
+    job = {"id": sprint_id, "goal": goal, "priority": priority, "submitted_at": time.time()}
+    if sprint_store is not None:
+        await asyncio.to_thread(sprint_store.create_sprint, sprint_id, goal, job["submitted_at"], status="queued")
+    else:
+        queued_sprints[sprint_id] = job
+    await job_queue.enqueue(job)
+    return job
+
+
+async def sprint_status(sprint_id: str) -> Optional[str]:
+    """Status of a sprint in this process, the sprint store or the local queue; None if unknown."""
+    session = sprint_sessions.get(sprint_id)
+    if session is not None:
+        return session.status
+    if sprint_store is not None:
+        stored = await asyncio.to_thread(sprint_store.get_sprint, sprint_id)
+        return stored["status"] if stored is not None else None
+    return "queued" if sprint_id in queued_sprints else None
+
+
+def start_sprint_job(job: dict) -> SprintSession:
+    """Run a queued sprint job ({"id", "goal"}) as a detached session of this process."""
+    llm = get_async_llm_client()
+    session = sprint_sessions.start(job["id"], job["goal"], run_session_sprint(job["id"], job["goal"], llm))
+    queued_sprints.pop(job["id"], None)
+    return session
+
+
+async def fail_sprint_job(job: dict, error: Exception) -> None:
+    """A job that could not be started: mark it failed and tell its followers."""
+    queued_sprints.pop(job["id"], None)
+    payload = {"seq": 1, "error": f"Sprint could not be started: {error}"}
+    if sprint_store is not None:
+        await asyncio.to_thread(sprint_store.append_event, job["id"], payload)
+        await asyncio.to_thread(sprint_store.finish_sprint, job["id"], "failed")
+    await manager.send_json(job["id"], payload)
+    await event_bus.publish(session_channel(job["id"]), payload)
+
+
+# A relayed event can reach this process before its predecessors are
+# readable from the store (the worker batches writes), so gaps are re-read
+# from the store for up to GAP_FILL_TIMEOUT seconds.
+GAP_FILL_TIMEOUT = 2.0
+
+
+async def read_gap(session_id: str, after_seq: int, before_seq: int) -> List[dict]:
+    """Persisted events with after_seq < seq < before_seq, waiting briefly for them to land."""
+    if sprint_store is None:
+        return []
+    deadline = time.monotonic() + GAP_FILL_TIMEOUT
+    while True:
+        events = await asyncio.to_thread(sprint_store.get_events, session_id, after_seq, before_seq - after_seq)
+        events = [e for e in events if e["seq"] < before_seq]
+        if len(events) >= before_seq - after_seq - 1 or time.monotonic() >= deadline:
+            return events
+        await asyncio.sleep(0.05)
+
+
+async def relay_session(session_id: str, subscription: Subscription, subscriber: Subscriber, after_seq: int):
+    """
+    Forward a sprint run by another process from the event bus to one
+    subscriber, skipping events it already replayed, until the sprint ends.
+    """
+    try:
+        async for payload in subscription:
+            seq = payload.get("seq", after_seq + 1)
+            if seq <= after_seq:
+                continue
+            if session_id in sprint_sessions.sessions:
+                # Picked up by this process's own worker: local fan-out already delivers it
+                after_seq = seq
+                if is_terminal(payload):
+                    return
+                continue
+            pending = await read_gap(session_id, after_seq, seq) if seq > after_seq + 1 else []
+            for item in pending + [payload]:
+                if not await subscriber.queue.put(item, manager.send_timeout):
+                    return  # stalled subscriber
+            after_seq = seq
+            if is_terminal(payload):
+                return
+    finally:
+        await subscription.close()
+
+
+async def follow_session(websocket: WebSocket, finished: Awaitable[None]):
+    """Keep the socket open until the sprint finishes or the client leaves."""
+    done = asyncio.ensure_future(finished)
+    try:
+        while True:
+            receive = asyncio.create_task(websocket.receive_text())
+            finished, _ = await asyncio.wait({done, receive}, return_when=asyncio.FIRST_COMPLETED)
+            if done in finished:
+                receive.cancel()
+                return
+            receive.result()  # raises WebSocketDisconnect when the client leaves
+    finally:
+        done.cancel()
 
 
 @app.websocket("/ws/sprint/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time sprint updates."""
-    await manager.connect(session_id, websocket)
+    """
+    WebSocket endpoint for real-time sprint updates.
+
+    The first message is either {"goal": ...} to start a sprint, or
+    {"resume": true, "last_seq": n} to (re)attach to an existing one and
+    replay every event after n. {"observe": true} is a resume from 0.
+    Sprints run detached from the socket, so dropping the connection
+    does not lose the work; sprints no longer in memory are replayed from
+    the sprint store. Sprints running in another process (a queue worker
+    or another API node) are replayed from the store and then followed
+    live through the event bus. Query parameters `encoding=msgpack` and
+    `lazy=1` select the frame format (see api/wire.py).
+    """
+    encoding = negotiate_encoding(websocket.query_params.get("encoding"))
+    lazy_artifacts = websocket.query_params.get("lazy") in ("1", "true")
+    await websocket.accept()
     
     try:
-        # Wait for sprint start message
+        # Wait for sprint start (or resume) message
         data = await websocket.receive_json()
         goal = data.get("goal", "")
+        session = sprint_sessions.get(session_id)
         
-        if not goal:
-            await websocket.send_json({"error": "Sprint goal is required"})
-            return
+        if data.get("resume") or data.get("observe"):
+            last_seq = int(data.get("last_seq") or 0)
+            if session is None:
+                # Not in memory (e.g. after a restart or run elsewhere): replay the persisted log, if any
+                stored = None
+                if sprint_store is not None:
+                    stored = await asyncio.to_thread(sprint_store.get_sprint, session_id)
+                if stored is None:
+                    await websocket.send_json({"error": f"Unknown sprint session: {session_id}"})
+                    return
+                # Subscribe before reading the log so no live event falls in between
+                subscription = None
+                if stored["status"] == "running" and event_bus.distributed:
+                    subscription = await event_bus.subscribe(session_channel(session_id))
+                history = await asyncio.to_thread(sprint_store.get_events, session_id, last_seq)
+                subscriber = manager.subscribe(session_id, websocket, replay=history,
+                                               encoding=encoding, lazy_artifacts=lazy_artifacts)
+                if subscription is not None:
+                    after_seq = history[-1]["seq"] if history else last_seq
+                    await follow_session(websocket, relay_session(session_id, subscription, subscriber, after_seq))
+                return
+        else:
+            if not goal:
+                await websocket.send_json({"error": "Sprint goal is required"})
+                return
+            if session is not None and session.is_running:
+                await websocket.send_json({"error": "Sprint is already running; resume it instead"})
+                return
+            
+            if SPRINT_EXECUTION == "queue":
+                # A sprint worker (possibly another process) runs it; follow it through the bus
+                if await sprint_status(session_id) in ("queued", "running"):
+                    await websocket.send_json({"error": "Sprint is already queued or running; resume it instead"})
+                    return
+                subscription = await event_bus.subscribe(session_channel(session_id))
+                await enqueue_sprint(session_id, goal, max(-100, min(100, int(data.get("priority") or 0))))
+                subscriber = manager.subscribe(session_id, websocket, encoding=encoding,
+                                               lazy_artifacts=lazy_artifacts)
+                await follow_session(websocket, relay_session(session_id, subscription, subscriber, 0))
+                return
+            
+            # Shared LLM client (pooled connections, see LLMClientRegistry)
+            try:
+                llm = get_async_llm_client()
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                return
+            
+            # Run the sprint as a detached task
+            session = sprint_sessions.start(session_id, goal, run_session_sprint(session_id, goal, llm))
+            last_seq = 0
         
-        # Initialize LLM client
-        try:
-            llm = get_llm_client()
-        except ValueError as e:
-            await websocket.send_json({"error": str(e)})
-            return
-        
-        # Run the sprint
-        await run_sprint(session_id, goal, llm)
+        # Replay missed events ahead of live ones, then follow until done
+        manager.subscribe(session_id, websocket, replay=session.events_since(last_seq),
+                          encoding=encoding, lazy_artifacts=lazy_artifacts)
+        if session.is_running:
+            await follow_session(websocket, session.wait())
         
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        pass
     except Exception as e:
-        await websocket.send_json({"error": str(e)})
-        manager.disconnect(session_id)
+        try:
+            await websocket.send_json({"error": str(e)})
+        except Exception:
+            pass
+    finally:
+        # Flush queued updates before the handler returns and closes the socket
+        await manager.drain(session_id, websocket)
+        manager.disconnect(session_id, websocket)
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # permessage-deflate compresses the (highly repetitive) JSON frames on the wire
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws="websockets", ws_per_message_deflate=True)
@@ -0,0 +1,142 @@
+"""
+Detached sprint sessions with a replayable event log.
+
+A sprint runs as its own asyncio task, independent of the WebSocket that
+started it. Every update it publishes is appended to the session's event
+log with a monotonic sequence number, so a client that reconnects can ask
+for everything after the last `seq` it saw instead of re-running (and
+re-paying for) the whole sprint. With a SprintStore attached, sessions,
+artifacts and events are also persisted for history after a restart.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Dict, List, Optional
+
+from aidevteam.api.store import SprintStore
+
+logger = logging.getLogger(__name__)
+
+
+class SprintSession:
+    """Event log and task handle of one sprint."""
+
+    def __init__(self, session_id: str, goal: str):
+        self.session_id = session_id
+        self.goal = goal
+        self.events: List[dict] = []
+        self.next_seq = 1
+        self.status = "running"  # running, complete, failed
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    @property
+    def last_seq(self) -> int:
+        return self.next_seq - 1
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == "running"
+
+    def record(self, payload: dict) -> dict:
+        """Stamp a payload with the next sequence number and append it."""
+        payload = dict(payload, seq=self.next_seq)
+        self.next_seq += 1
+        if payload.get("type") == "artifact":
+            # The final artifact carries the full content: its deltas are no longer needed for replay
+            artifact_id = payload["data"].get("id")
+            self.events = [
+                e for e in self.events
+                if not (e.get("type") == "artifact_delta" and e["data"].get("id") == artifact_id)
+            ]
+        self.events.append(payload)
+        return payload
+
+    def events_since(self, last_seq: int) -> List[dict]:
+        """Every logged event with seq greater than last_seq."""
+        return [e for e in self.events if e["seq"] > last_seq]
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        self._done.set()
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+
+class SessionStore:
+    """In-process registry of sprint sessions."""
+
+    def __init__(self, retention: float = 3600.0, store: Optional[SprintStore] = None):
+        self.retention = retention
+        self.store = store
+        self.sessions: Dict[str, SprintSession] = {}
+
+    def get(self, session_id: str) -> Optional[SprintSession]:
+        return self.sessions.get(session_id)
+
+    def start(self, session_id: str, goal: str, sprint: Awaitable[None]) -> SprintSession:
+        """Register a session and run the sprint coroutine as a detached task."""
+        self.prune()
+        existing = self.sessions.get(session_id)
+        if existing is not None and existing.is_running:
+            raise ValueError(f"Sprint {session_id} is already running")
+        session = SprintSession(session_id, goal)
+        self.sessions[session_id] = session
+        if self.store is not None:
+            self.store.create_sprint(session_id, goal, session.created_at)
+
+        def finish(status: str):
+            session.finish(status)
+            if self.store is not None:
+                self.store.finish_sprint(session_id, status, session.finished_at)
+
+        async def run():
+            try:
+                await sprint
+            except asyncio.CancelledError:
+                finish("failed")
+                raise
+            except Exception:
+                logger.exception("Sprint %s failed", session_id)
+                finish("failed")
+            else:
+                finish("complete")
+
+        session.task = asyncio.create_task(run())
+        return session
+
+    def record(self, session_id: str, payload: dict) -> dict:
+        """Log (and persist) a payload if the session is tracked; headless runs pass through."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return payload
+        payload = session.record(payload)
+        if self.store is not None:
+            digest = None
+            if payload.get("type") == "artifact":
+                digest = self.store.save_artifact(session_id, payload["data"])
+            self.store.append_event(session_id, payload, content_hash=digest)
+        return payload
+
+    def save_stories(self, session_id: str, stories: List[dict]) -> None:
+        """Persist the stories planned for a tracked session."""
+        if self.store is not None and session_id in self.sessions:
+            self.store.save_stories(session_id, stories)
+
+    def prune(self) -> None:
+        """Forget finished sessions older than the retention window."""
+        cutoff = time.time() - self.retention
+        for session_id, session in list(self.sessions.items()):
+            if session.finished_at is not None and session.finished_at < cutoff:
+                del self.sessions[session_id]
+
+    async def shutdown(self) -> None:
+        """Cancel sprints that are still running."""
+        tasks = [s.task for s in self.sessions.values() if s.task is not None and not s.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
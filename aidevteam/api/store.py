@@ -0,0 +1,417 @@
+"""
+Persistent sprint history.
+
+Sprints, their stories, artifacts and event logs are written to a storage
+backend so they survive restarts and can be browsed through the REST API
+(GET /sprints, GET /sprints/{id}). SQLiteSprintStore is the default
+backend; others implement the SprintStore interface.
+
+- Writes are queued and applied in batches, one transaction per batch, by
+  a background thread, so publishing an update never waits on the disk.
+  Reads flush the queue first, so they always see every accepted write.
+- Streaming artifact_delta frames are not persisted: the final artifact
+  event carries the full content.
+- Artifact content is stored once per SHA-256 hash, since repeated goals
+  produce near-identical documents; artifacts and artifact events only
+  reference the blob.
+- The database runs in WAL mode, so the REST endpoints read on their own
+  connection without blocking the writer, with indexes on sprint id and
+  timestamps.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from aidevteam.api.context import split_sections
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sprints (
+    id TEXT PRIMARY KEY,
+    goal TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sprints_created ON sprints(created_at, id);
+
+CREATE TABLE IF NOT EXISTS stories (
+    sprint_id TEXT NOT NULL,
+    story_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (sprint_id, story_id)
+);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    id TEXT PRIMARY KEY,
+    sprint_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_sprint ON artifacts(sprint_id, created_at);
+
+CREATE TABLE IF NOT EXISTS events (
+    sprint_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (sprint_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_events_created ON events(sprint_id, created_at);
+"""
+
+# "Story 1: ...", "STORY-002: ...", "User Story: ..." (but not field headings like "Story ID")
+_STORY_HEADING_RE = re.compile(r"\bstory[-\s#]*(\d+)|^(?:user\s+)?story$", re.IGNORECASE)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def extract_stories(markdown: str) -> List[Dict[str, str]]:
+    """User stories from the Product Owner's Markdown: one per heading that names a story."""
+    stories = []
+    for heading, body in split_sections(markdown):
+        title = heading.lstrip("#").strip()
+        match = _STORY_HEADING_RE.search(title.split(":")[0].strip())
+        if not match:
+            continue
+        taken = {story["id"] for story in stories}
+        number = int(match.group(1) or len(stories) + 1)
+        while f"STORY-{number:03d}" in taken:
+            number += 1
+        stories.append({
+            "id": f"STORY-{number:03d}",
+            "title": title,
+            "description": "\n".join(body).strip(),
+            "status": "TODO"
+        })
+    return stories
+
+
+class SprintStore(ABC):
+    """Interface of sprint history backends."""
+
+    @abstractmethod
+    def create_sprint(self, sprint_id: str, goal: str, created_at: Optional[float] = None,
+                      status: str = "running") -> None:
+        """Record a sprint (status "queued" or "running"), replacing any earlier record."""
+
+    @abstractmethod
+    def finish_sprint(self, sprint_id: str, status: str, finished_at: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def save_stories(self, sprint_id: str, stories: List[Dict[str, str]]) -> None:
+        ...
+
+    @abstractmethod
+    def save_artifact(self, sprint_id: str, artifact: dict) -> str:
+        """Persist an artifact (id, title, type, content); returns its content hash."""
+
+    @abstractmethod
+    def append_event(self, sprint_id: str, payload: dict, content_hash: Optional[str] = None) -> None:
+        """
+        Persist an event. Artifact bodies are stored once, by hash; pass the
+        `content_hash` returned by save_artifact to skip hashing the body again.
+        """
+
+    @abstractmethod
+    def mark_interrupted(self, idle_seconds: Optional[float] = None) -> int:
+        """
+        Flag sprints left queued or running by a previous process; returns how
+        many. With `idle_seconds`, only running sprints that logged nothing for
+        that long are flagged (their worker is presumed dead).
+        """
+
+    @abstractmethod
+    def list_sprints(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Newest sprints first; pass the returned cursor to get the next page."""
+
+    @abstractmethod
+    def get_sprint(self, sprint_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def get_events(self, sprint_id: str, after_seq: int = 0, limit: Optional[int] = None) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def get_artifact(self, artifact_id: str) -> Optional[Tuple[str, str]]:
+        """(content, content hash) of an artifact, or None."""
+
+    def flush(self) -> None:
+        pass
+
+    def open(self) -> None:
+        """(Re)open the store; after close() every call raises until it is reopened."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSprintStore(SprintStore):
+    """SQLite backend with batched background writes."""
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, tuple]] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+
+    # -- connections ---------------------------------------------------------
+
+    def _connect(self) -> None:
+        """Open the database on first use, so importing the server touches no files."""
+        with self._write_lock:
+            if self._writer is not None:
+                return
+            if self._closed:
+                raise RuntimeError(f"Sprint store {self.path} is closed")
+            writer = sqlite3.connect(self.path, check_same_thread=False)
+            writer.execute("PRAGMA journal_mode=WAL")
+            writer.execute("PRAGMA synchronous=NORMAL")
+            writer.executescript(SCHEMA)
+            writer.commit()
+            self._reader = writer if self.path == ":memory:" else sqlite3.connect(self.path, check_same_thread=False)
+            self._reader.row_factory = sqlite3.Row
+            self._writer = writer
+            self._thread = threading.Thread(target=self._run, name="sprint-store-writer", daemon=True)
+            self._thread.start()
+
+    def open(self) -> None:
+        self._closed = False
+        self._connect()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    # -- writes --------------------------------------------------------------
+
+    def _enqueue(self, sql: str, params: tuple) -> None:
+        if self._writer is None:
+            self._connect()
+        with self._pending_lock:
+            self._pending.append((sql, params))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Apply every queued write in one transaction."""
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch or self._writer is None:
+                return
+            with self._writer:
+                for sql, group in itertools.groupby(batch, key=lambda item: item[0]):
+                    self._writer.executemany(sql, [params for _, params in group])
+            self.batches += 1
+            self.writes += len(batch)
+
+    def create_sprint(self, sprint_id: str, goal: str, created_at: Optional[float] = None,
+                      status: str = "running") -> None:
+        self._enqueue(
+            "INSERT OR REPLACE INTO sprints (id, goal, status, created_at, finished_at) VALUES (?, ?, ?, ?, NULL)",
+            (sprint_id, goal, status, created_at or time.time())
+        )
+
+    def finish_sprint(self, sprint_id: str, status: str, finished_at: Optional[float] = None) -> None:
+        self._enqueue(
+            "UPDATE sprints SET status = ?, finished_at = ? WHERE id = ?",
+            (status, finished_at or time.time(), sprint_id)
+        )
+
+    def save_stories(self, sprint_id: str, stories: List[Dict[str, str]]) -> None:
+        for story in stories:
+            self._enqueue(
+                "INSERT OR REPLACE INTO stories (sprint_id, story_id, title, description, status) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sprint_id, story["id"], story.get("title", ""), story.get("description", ""),
+                 story.get("status", "TODO"))
+            )
+
+    def _save_blob(self, content: str) -> str:
+        digest = content_hash(content)
+        self._enqueue(
+            "INSERT OR IGNORE INTO blobs (hash, content, size) VALUES (?, ?, ?)",
+            (digest, content, len(content.encode("utf-8")))
+        )
+        return digest
+
+    def save_artifact(self, sprint_id: str, artifact: dict) -> str:
+        digest = self._save_blob(artifact.get("content") or "")
+        self._enqueue(
+            "INSERT OR REPLACE INTO artifacts (id, sprint_id, title, type, content_hash, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (artifact["id"], sprint_id, artifact.get("title", ""), artifact.get("type", ""), digest, time.time())
+        )
+        return digest
+
+    def append_event(self, sprint_id: str, payload: dict, content_hash: Optional[str] = None) -> None:
+        if payload.get("type") == "artifact_delta":
+            return
+        if payload.get("type") == "artifact":
+            # The body lives in the blob table; keep only a reference in the event
+            data = dict(payload["data"])
+            content = data.pop("content", None) or ""
+            data["content_hash"] = content_hash or self._save_blob(content)
+            payload = dict(payload, data=data)
+        self._enqueue(
+            "INSERT OR REPLACE INTO events (sprint_id, seq, type, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (sprint_id, payload.get("seq", 0), payload.get("type"), json.dumps(payload, ensure_ascii=False),
+             time.time())
+        )
+
+    def mark_interrupted(self, idle_seconds: Optional[float] = None) -> int:
+        if self._writer is None:
+            self._connect()
+        self.flush()
+        now = time.time()
+        with self._write_lock, self._writer:
+            if idle_seconds is None:
+                cursor = self._writer.execute(
+                    "UPDATE sprints SET status = 'interrupted', finished_at = ? WHERE status IN ('queued', 'running')",
+                    (now,)
+                )
+            else:
+                cursor = self._writer.execute(
+                    "UPDATE sprints SET status = 'interrupted', finished_at = ? WHERE status = 'running' AND "
+                    "MAX(created_at, COALESCE((SELECT MAX(created_at) FROM events WHERE sprint_id = sprints.id), 0)) < ?",
+                    (now, now - idle_seconds)
+                )
+        return cursor.rowcount
+
+    # -- reads ---------------------------------------------------------------
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        if self._writer is None:
+            self._connect()
+        self.flush()
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def list_sprints(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        if cursor:
+            created_at, sprint_id = cursor.split(":", 1)
+            rows = self._query(
+                "SELECT * FROM sprints WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+                (float(created_at), sprint_id, limit + 1)
+            )
+        else:
+            rows = self._query("SELECT * FROM sprints ORDER BY created_at DESC, id DESC LIMIT ?", (limit + 1,))
+        sprints = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = sprints[-1]
+            next_cursor = f"{last['created_at']!r}:{last['id']}"
+        return sprints, next_cursor
+
+    def get_sprint(self, sprint_id: str) -> Optional[dict]:
+        rows = self._query("SELECT * FROM sprints WHERE id = ?", (sprint_id,))
+        if not rows:
+            return None
+        sprint = dict(rows[0])
+        sprint["stories"] = [
+            {"id": row["story_id"], "title": row["title"], "description": row["description"], "status": row["status"]}
+            for row in self._query(
+                "SELECT * FROM stories WHERE sprint_id = ? ORDER BY story_id", (sprint_id,)
+            )
+        ]
+        sprint["artifacts"] = [
+            dict(row) for row in self._query(
+                "SELECT a.id, a.title, a.type, a.content_hash, a.created_at, b.size AS content_length "
+                "FROM artifacts a JOIN blobs b ON b.hash = a.content_hash "
+                "WHERE a.sprint_id = ? ORDER BY a.created_at", (sprint_id,)
+            )
+        ]
+        sprint["event_count"] = self._query(
+            "SELECT COUNT(*) AS n FROM events WHERE sprint_id = ?", (sprint_id,)
+        )[0]["n"]
+        return sprint
+
+    def get_events(self, sprint_id: str, after_seq: int = 0, limit: Optional[int] = None) -> List[dict]:
+        rows = self._query(
+            "SELECT payload FROM events WHERE sprint_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (sprint_id, after_seq, -1 if limit is None else limit)
+        )
+        events = [json.loads(row["payload"]) for row in rows]
+        hashes = {e["data"]["content_hash"] for e in events if e.get("type") == "artifact"}
+        if hashes:
+            placeholders = ",".join("?" * len(hashes))
+            blobs = {
+                row["hash"]: row["content"]
+                for row in self._query(f"SELECT hash, content FROM blobs WHERE hash IN ({placeholders})", tuple(hashes))
+            }
+            for event in events:
+                if event.get("type") == "artifact":
+                    event["data"]["content"] = blobs.get(event["data"]["content_hash"], "")
+        return events
+
+    def get_artifact(self, artifact_id: str) -> Optional[Tuple[str, str]]:
+        rows = self._query(
+            "SELECT b.content, b.hash FROM artifacts a JOIN blobs b ON b.hash = a.content_hash WHERE a.id = ?",
+            (artifact_id,)
+        )
+        return (rows[0]["content"], rows[0]["hash"]) if rows else None
+
+    def stats(self) -> Dict[str, int]:
+        return {"batches": self.batches, "writes": self.writes, "pending": len(self._pending)}
+
+    def close(self) -> None:
+        """Flush outstanding writes and close the database."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        with self._write_lock:
+            if self._reader is not None and self._reader is not self._writer:
+                self._reader.close()
+            if self._writer is not None:
+                self._writer.close()
+            self._reader = self._writer = None
+
+
+def get_sprint_store() -> Optional[SprintStore]:
+    """
+    Sprint history backend configured from the environment.
+
+    SPRINT_DB_PATH selects the SQLite file (default sprints.sqlite3); an
+    empty value disables persistence.
+    """
+    path = os.getenv("SPRINT_DB_PATH", "sprints.sqlite3")
+    if not path:
+        return None
+    return SQLiteSprintStore(path)
@@ -0,0 +1,58 @@
+"""
+Wire encoding of SprintUpdate frames.
+
+Subscribers negotiate their format when connecting:
+- `?encoding=msgpack` sends binary MessagePack frames instead of JSON text
+  (needs the optional `msgpack` package, or `ormsgpack`; falls back to JSON).
+- `?lazy=1` strips artifact bodies from `artifact` frames; clients fetch
+  them on demand from the cacheable GET /artifacts/{id} endpoint.
+
+Transport compression is permessage-deflate, negotiated by uvicorn's
+WebSocket implementation (see `ws_per_message_deflate` in server.py).
+"""
+import json
+from typing import Callable, Optional, Union
+
+_packb: Optional[Callable[[object], bytes]]
+try:
+    import msgpack
+
+    def _packb(obj: object) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+except ImportError:
+    try:
+        import ormsgpack
+        _packb = ormsgpack.packb
+    except ImportError:
+        _packb = None
+
+ENCODINGS = ("json", "msgpack")
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Pick the frame encoding for a subscriber, falling back to JSON."""
+    if requested == "msgpack" and _packb is not None:
+        return "msgpack"
+    return "json"
+
+
+def encode_frame(payload: dict, encoding: str = "json") -> Union[str, bytes]:
+    """Serialize a payload: str for JSON text frames, bytes for msgpack."""
+    if encoding == "msgpack" and _packb is not None:
+        return _packb(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def artifact_url(artifact_id: str) -> str:
+    return f"/artifacts/{artifact_id}"
+
+
+def strip_artifact_body(payload: dict) -> dict:
+    """Replace an artifact's content with a link to fetch it lazily."""
+    if payload.get("type") != "artifact":
+        return payload
+    data = dict(payload["data"])
+    content = data.pop("content", None) or ""
+    data["content_url"] = artifact_url(data["id"])
+    data["content_length"] = len(content.encode("utf-8"))
+    return dict(payload, data=data)
@@ -0,0 +1,139 @@
+"""
+Sprint worker: runs queued sprints outside the API processes.
+
+API processes started with SPRINT_EXECUTION=queue enqueue sprints on the
+job queue instead of running them; workers pull jobs, run them with the
+same `run_sprint` code and publish every update to the event bus, which
+the API processes relay to their WebSocket subscribers. Point workers and
+API nodes at the same EVENT_BUS_URL and SPRINT_DB_PATH.
+
+Delivery is at most once: a job leaves the queue when a worker takes it,
+with no acknowledgement, so a worker that crashes loses the sprints it was
+running. Their store rows are flagged "interrupted" once they have been
+quiet for SPRINT_STALE_SECONDS (see `recover_sprints` in api/server.py);
+resubmit them to run them again. A job that cannot be started is marked
+failed straight away.
+
+Usage:
+    EVENT_BUS_URL=redis://localhost:6379/0 python -m aidevteam.api.worker --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from aidevteam.api.bus import JobQueue
+from aidevteam.api.sessions import SprintSession
+
+logger = logging.getLogger(__name__)
+
+
+class SprintWorker:
+    """
+    Pulls sprint jobs from a queue and runs at most `concurrency` at a time.
+
+    A job is only dequeued once a slot is free, so waiting jobs stay in the
+    (shared) queue, in priority order, where any idle worker can take them.
+    When `start` raises, `fail(job, error)` is awaited so the job does not
+    stay queued forever.
+    """
+
+    def __init__(self, queue: JobQueue, start: Callable[[dict], SprintSession], concurrency: int = 1,
+                 poll_interval: float = 1.0, fail: Optional[Callable[[dict, Exception], Awaitable[None]]] = None):
+        self.queue = queue
+        self.start_job = start
+        self.fail_job = fail
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.running = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        """Consume jobs until cancelled."""
+        while True:
+            await self._slots.acquire()
+            try:
+                job = await self.queue.dequeue(self.poll_interval)
+            except BaseException:
+                self._slots.release()
+                raise
+            if job is None:
+                self._slots.release()
+                continue
+            try:
+                session = self.start_job(job)
+            except Exception as e:
+                logger.exception("Could not start sprint job %s", job.get("id"))
+                self._slots.release()
+                if self.fail_job is not None:
+                    try:
+                        await self.fail_job(job, e)
+                    except Exception:
+                        logger.exception("Could not mark sprint job %s as failed", job.get("id"))
+                continue
+            self.running += 1
+            started = time.monotonic()
+            session.task.add_done_callback(lambda task, started=started: self._finished(time.monotonic() - started))
+
+    def _finished(self, seconds: float) -> None:
+        self.running -= 1
+        self.completed += 1
+        self.busy_seconds += seconds
+        self._slots.release()
+
+    @property
+    def average_seconds(self) -> Optional[float]:
+        """Mean run time of completed sprints, None before the first one."""
+        return self.busy_seconds / self.completed if self.completed else None
+
+    def start(self) -> None:
+        """Run the consumer loop as a background task."""
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop taking jobs; sprints already running are left to their session store."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"concurrency": self.concurrency, "running": self.running, "completed": self.completed,
+                "average_seconds": self.average_seconds}
+
+
+async def serve(concurrency: int) -> None:
+    """Run a standalone worker process until interrupted."""
+    from aidevteam.api import server
+
+    await server.llm_registry.startup()
+    await server.recover_sprints()
+    worker = SprintWorker(server.job_queue, server.start_sprint_job, concurrency, fail=server.fail_sprint_job)
+    logger.info("Sprint worker started (concurrency %d)", concurrency)
+    try:
+        await worker.run()
+    finally:
+        await server.sprint_sessions.shutdown()
+        await server.llm_registry.shutdown()
+        await server.event_bus.close()
+        if server.sprint_store is not None:
+            server.sprint_store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=1, help="Sprints run at the same time")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
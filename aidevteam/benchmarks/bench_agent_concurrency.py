@@ -0,0 +1,62 @@
+"""
+Wall-clock scaling of concurrent multi-role agent calls.
+
+Builds a LangGraph StateGraph where N role nodes are all ready in the same
+step, runs it against the local fake OpenAI-compatible server, and compares
+the shared AgentScheduler (concurrent dispatch) with a concurrency cap of 1
+(the serial behaviour).
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_agent_concurrency.py --latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from langgraph.graph import StateGraph, START, END
+
+from aidevteam.agents.state import SprintState
+from aidevteam.agents.scripts.scheduling import AgentScheduler
+from aidevteam.agents.scripts.factory import create_agent_node
+from aidevteam.api.llm_client import AsyncLLMClient
+from aidevteam.benchmarks.fake_llm_server import FakeLLMServer
+
+ROLES = ["Product Owner", "Architect", "Backend Dev", "QA Engineer",
+         "Scrum Master", "Security Reviewer", "UX Designer", "DevOps Engineer"]
+
+
+async def run_roles(n_roles: int, base_url: str, max_concurrency: int) -> dict:
+    llm = AsyncLLMClient(api_key="fake", base_url=base_url)
+    scheduler = AgentScheduler(llm=llm, max_concurrency=max_concurrency)
+    graph = StateGraph(SprintState)
+    for role in ROLES[:n_roles]:
+        graph.add_node(role, create_agent_node(role, scheduler=scheduler))
+        graph.add_edge(START, role)
+        graph.add_edge(role, END)
+
+    start = time.perf_counter()
+    result = await graph.compile().ainvoke({"sprint_goal": "A health check API", "messages": [], "artifacts": {}})
+    elapsed = time.perf_counter() - start
+    await llm.aclose()
+    assert len(result["messages"]) == n_roles
+    return {"elapsed_s": round(elapsed, 3), **scheduler.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    os.environ["LLM_CACHE_SIZE"] = "0"
+
+    with FakeLLMServer(latency=args.latency) as fake:
+        print(f"Fake LLM latency {args.latency}s per call\n")
+        print(f"{'roles':>5}{'concurrent s':>14}{'serial s':>12}{'peak':>6}")
+        for n_roles in (1, 2, 4, 8):
+            concurrent = asyncio.run(run_roles(n_roles, fake.base_url, max_concurrency=8))
+            serial = asyncio.run(run_roles(n_roles, fake.base_url, max_concurrency=1))
+            print(f"{n_roles:>5}{concurrent['elapsed_s']:>14}{serial['elapsed_s']:>12}{concurrent['peak_concurrency']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Concurrent-session throughput benchmark for run_sprint.
+
+Runs N sprints at once against a local fake OpenAI-compatible server and
+compares the blocking LLMClient (called inline on the event loop, as the
+server used to do) with the non-blocking AsyncLLMClient. Event loop lag is
+sampled alongside to show how long a /health request would have stalled.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_concurrent_sprints.py --sessions 20
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Optional
+
+from aidevteam.api.llm_client import LLMClient, AsyncLLMClient
+from aidevteam.api.server import run_sprint
+from aidevteam.benchmarks.fake_llm_server import FakeLLMServer
+
+
+class BlockingAdapter:
+    """Exposes the sync client through agenerate without offloading it."""
+
+    def __init__(self, client: LLMClient):
+        self.client = client
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None) -> str:
+        return self.client.generate(system_prompt, user_prompt, max_tokens)
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None):
+        yield self.client.generate(system_prompt, user_prompt, max_tokens)
+
+
+async def _sample_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(sessions: int, llm) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_sample_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(run_sprint(f"bench-{i}", "A health check API", llm) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_lag = await lag_task
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "sprints_per_s": round(sessions / elapsed, 2),
+        "max_loop_lag_ms": round(worst_lag * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (s)")
+    parser.add_argument("--skip-blocking", action="store_true", help="Only run the async client")
+    args = parser.parse_args()
+
+    # Every session uses the same goal, so keep the response cache out of the measurement
+    os.environ["LLM_CACHE_SIZE"] = "0"
+
+    with FakeLLMServer(latency=args.latency) as fake:
+        print(f"Fake LLM server at {fake.base_url} ({args.latency}s per completion)")
+        print(f"Running {args.sessions} concurrent sprints (4 LLM calls each)\n")
+
+        if not args.skip_blocking:
+            blocking = BlockingAdapter(LLMClient(api_key="fake", base_url=fake.base_url))
+            print(f"blocking LLMClient : {asyncio.run(_run(args.sessions, blocking))}")
+
+        async def run_async():
+            llm = AsyncLLMClient(api_key="fake", base_url=fake.base_url)
+            try:
+                return await _run(args.sessions, llm)
+            finally:
+                await llm.aclose()
+
+        print(f"AsyncLLMClient     : {asyncio.run(run_async())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Import-time benchmark for the aidevteam packages.
+
+Each module is imported in a fresh interpreter (so nothing is cached
+between runs) and the median wall time over several runs is reported,
+together with the cost of building the team nodes and loading personas.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_import_time.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "aidevteam.agents.state",
+    "aidevteam.agents.scripts.utils",
+    "aidevteam.agents.scripts.factory",
+    "aidevteam.agents.scripts.sprint",
+    "aidevteam.api.llm_client",
+    "aidevteam.api.server",
+]
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{extra}
+print(imported - start, time.perf_counter() - imported)
+"""
+
+NODES = """
+from aidevteam.agents.scripts import factory
+for name in ("PO_NODE", "ARCHITECT_NODE", "DEV_NODE", "QA_NODE", "SM_NODE"):
+    getattr(factory, name)
+"""
+
+PERSONAS = """
+from aidevteam.agents.scripts.utils import load_persona
+for _ in range(1000):
+    load_persona("backend_dev")
+"""
+
+
+def time_snippet(module: str, extra: str, runs: int) -> tuple:
+    imports, extras = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module, extra=extra)],
+            capture_output=True, text=True, check=True, env=dict(os.environ)
+        ).stdout.split()
+        imports.append(float(out[0]))
+        extras.append(float(out[1]))
+    return statistics.median(imports) * 1000, statistics.median(extras) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<40}{'import ms':>12}")
+    for module in MODULES:
+        import_ms, _ = time_snippet(module, "", args.runs)
+        print(f"{module:<40}{import_ms:>12.1f}")
+
+    _, nodes_ms = time_snippet("aidevteam.agents.scripts.factory", NODES, args.runs)
+    _, personas_ms = time_snippet("aidevteam.agents.scripts.utils", PERSONAS, args.runs)
+    print(f"\nbuild 5 team nodes on first access      {nodes_ms:>8.2f} ms")
+    print(f"1000 cached load_persona() calls         {personas_ms:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
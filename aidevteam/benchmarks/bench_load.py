@@ -0,0 +1,311 @@
+"""
+Load test of the sprint server over real WebSockets.
+
+Boots the API with uvicorn (in a subprocess, so its memory can be measured
+on its own) against the local fake OpenAI-compatible server, then drives
+concurrent WebSocket clients through /ws/sprint/{session_id} until every
+sprint has completed or failed. Reports sprint latency and time to first
+event percentiles, frames per second and the server's memory per session.
+
+Results are saved as JSON (by default benchmarks/results/load-<commit>.json);
+pass --baseline with an earlier file to compare the two runs.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_load.py --clients 50 --sprints 200 \\
+        --latency 0.3 --distribution lognormal --tokens-per-second 150 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import websockets
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from aidevteam.benchmarks.fake_llm_server import DISTRIBUTIONS, FakeLLMServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Metrics compared against a baseline, with the direction that is better
+COMPARED = {
+    ("latency_s", "p50"): "lower", ("latency_s", "p95"): "lower", ("latency_s", "p99"): "lower",
+    ("ttfe_ms", "p50"): "lower", ("ttfe_ms", "p95"): "lower",
+    ("frames", "per_second"): "higher", ("memory", "per_session_kb"): "lower",
+}
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Linearly interpolated percentile (p in 0-100) of unsorted values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def distribution(values: List[float], scale: float = 1.0, digits: int = 3) -> dict:
+    def rounded(value):
+        return round(value * scale, digits) if value is not None else None
+    return {
+        "p50": rounded(percentile(values, 50)), "p95": rounded(percentile(values, 95)),
+        "p99": rounded(percentile(values, 99)), "max": rounded(max(values) if values else None),
+        "mean": rounded(sum(values) / len(values) if values else None)
+    }
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ApiServer:
+    """The sprint API in a uvicorn subprocess."""
+
+    def __init__(self, env: Dict[str, str]):
+        self.port = _free_port()
+        self.env = {**os.environ, "PYTHONPATH": REPO_ROOT, **env}
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ApiServer":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "aidevteam.api.server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            env=self.env, cwd=REPO_ROOT
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://{self.url}/health", timeout=1):
+                    return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.__exit__()
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+async def run_client(url: str, goal: str, encoding: Optional[str] = None) -> dict:
+    """One sprint over a WebSocket: timings, frame counts and the outcome."""
+    query = f"?encoding={encoding}" if encoding else ""
+    result = {"frames": 0, "bytes": 0, "ttfe": None, "latency": None, "ok": False, "error": None}
+    start = time.perf_counter()
+    try:
+        async with websockets.connect(f"ws://{url}/ws/sprint/{uuid.uuid4().hex}{query}", max_size=None) as ws:
+            await ws.send(json.dumps({"goal": goal}))
+            async for message in ws:
+                now = time.perf_counter()
+                if result["ttfe"] is None:
+                    result["ttfe"] = now - start
+                result["frames"] += 1
+                result["bytes"] += len(message)
+                # Binary frames are msgpack; the server falls back to JSON text frames
+                payload = msgpack.unpackb(message) if isinstance(message, bytes) else json.loads(message)
+                if payload.get("type") == "complete":
+                    result["latency"] = now - start
+                    result["ok"] = bool(payload.get("data", {}).get("success", True))
+                    break
+                if "error" in payload:
+                    error = payload["error"]
+                    result["error"] = error if isinstance(error, str) else error.get("message", str(error))
+                    break
+            else:
+                result["error"] = "Connection closed before the sprint completed"
+    except (OSError, websockets.WebSocketException) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def drive(url: str, clients: int, sprints: int, goal: str, pid: Optional[int],
+                encoding: Optional[str] = None) -> dict:
+    """Run `sprints` sprints with at most `clients` connected at once, sampling server memory."""
+    semaphore = asyncio.Semaphore(clients)
+    baseline = rss_bytes(pid) if pid else None
+    peak = baseline
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal peak
+        while not done.is_set():
+            current = rss_bytes(pid) if pid else None
+            if current is not None:
+                peak = max(peak or 0, current)
+            await asyncio.sleep(0.05)
+
+    async def client():
+        async with semaphore:
+            return await run_client(url, goal, encoding)
+
+    sampler = asyncio.create_task(sample_memory())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client() for _ in range(sprints)))
+    wall = time.perf_counter() - start
+    done.set()
+    await sampler
+    return {"results": results, "wall": wall, "baseline_rss": baseline, "peak_rss": peak}
+
+
+def summarize(results: List[dict], wall: float, clients: int, baseline_rss: Optional[int],
+              peak_rss: Optional[int]) -> dict:
+    completed = [r for r in results if r["ok"]]
+    frames = sum(r["frames"] for r in results)
+    memory = {"baseline_mb": None, "peak_mb": None, "per_session_kb": None}
+    if baseline_rss is not None and peak_rss is not None:
+        memory = {
+            "baseline_mb": round(baseline_rss / 2 ** 20, 1),
+            "peak_mb": round(peak_rss / 2 ** 20, 1),
+            "per_session_kb": round((peak_rss - baseline_rss) / min(clients, len(results)) / 1024, 1)
+        }
+    return {
+        "sprints": {
+            "total": len(results),
+            "completed": len(completed),
+            "failed": len(results) - len(completed),
+            "errors": dict(Counter(r["error"] for r in results if r["error"]))
+        },
+        "wall_s": round(wall, 3),
+        "sprints_per_s": round(len(completed) / wall, 2) if wall else None,
+        "latency_s": distribution([r["latency"] for r in completed]),
+        "ttfe_ms": distribution([r["ttfe"] for r in results if r["ttfe"] is not None], scale=1000, digits=1),
+        "frames": {
+            "total": frames,
+            "per_second": round(frames / wall, 1) if wall else None,
+            "per_sprint": round(frames / len(results), 1) if results else None,
+            "bytes": sum(r["bytes"] for r in results)
+        },
+        "memory": memory
+    }
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """One line per compared metric: baseline -> current and the relative change."""
+    lines = []
+    for (group, key), better in COMPARED.items():
+        old, new = baseline.get(group, {}).get(key), report.get(group, {}).get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = change > 0 if better == "lower" else change < 0
+        flag = " (worse)" if worse and abs(change) >= 5 else ""
+        lines.append(f"{group}.{key}: {old} -> {new} ({change:+.1f}%){flag}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent WebSocket clients")
+    parser.add_argument("--sprints", type=int, help="Sprints in total (default: one per client)")
+    parser.add_argument("--goal", default="A health check API")
+    parser.add_argument("--encoding", choices=["json", "msgpack"], default="json")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean fake LLM latency / time to first token (s)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.5, help="Relative spread (uniform) or sigma (lognormal)")
+    parser.add_argument("--tokens-per-second", type=float, help="Streaming rate after the first token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the API server (e.g. SPRINT_PIPELINE=1)")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/load-<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare with")
+    args = parser.parse_args()
+    if args.encoding == "msgpack" and msgpack is None:
+        parser.error("--encoding msgpack requires `pip install msgpack`")
+    sprints = args.sprints or args.clients
+    profile = {"distribution": args.distribution, "spread": args.spread, "tokens_per_second": args.tokens_per_second,
+               "error_rate": args.error_rate, "error_status": args.error_status, "seed": args.seed}
+
+    with tempfile.TemporaryDirectory() as tmp, FakeLLMServer(latency=args.latency, **profile) as fake:
+        env = {
+            "OPENAI_API_KEY": "fake", "OPENAI_BASE_URL": fake.base_url,
+            # Every sprint uses the same goal, so keep the response cache out of the measurement
+            "LLM_CACHE_SIZE": "0",
+            "SPRINT_DB_PATH": os.path.join(tmp, "sprints.sqlite3"),
+            "QA_CACHE_PATH": os.path.join(tmp, "qa_cache.sqlite3"),
+        }
+        env.update(item.split("=", 1) for item in args.env)
+        print(f"Fake LLM at {fake.base_url} (latency {args.latency}s {args.distribution}, "
+              f"{args.tokens_per_second or '-'} tok/s, {args.error_rate:.0%} errors)")
+        with ApiServer(env) as api:
+            print(f"Running {sprints} sprints, {args.clients} at a time, against ws://{api.url}\n")
+            encoding = args.encoding if args.encoding != "json" else None
+            run = asyncio.run(drive(api.url, args.clients, sprints, args.goal, api.process.pid, encoding))
+        fake_stats = fake.stats
+
+    report = {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {"clients": args.clients, "sprints": sprints, "goal": args.goal, "encoding": args.encoding,
+                   "latency": args.latency, **profile, "env": dict(item.split("=", 1) for item in args.env)},
+        **summarize(run["results"], run["wall"], args.clients, run["baseline_rss"], run["peak_rss"]),
+        "fake_llm": fake_stats
+    }
+    print(json.dumps({k: report[k] for k in ("sprints", "latency_s", "ttfe_ms", "frames", "memory")}, indent=2))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{(report['commit'] or 'local')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline} ({(baseline.get('commit') or 'unknown')[:12]}):")
+        for line in compare(report, baseline):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+End-to-end sprint latency with and without phase pipelining.
+
+Runs one sprint against an in-process fake LLM that streams each answer at
+a fixed token rate after a time to first token, so a phase's duration grows
+with its output like a real model's. Sequential sprints wait for every
+artifact; SPRINT_PIPELINE=1 starts the architect on the first stories and
+QA on the design, paying for short reconciliation answers instead.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_pipeline.py --tokens-per-second 200
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Optional
+
+from aidevteam.api import server
+
+# Output tokens (words) per answer
+ANSWER_TOKENS = {"product_owner": 450, "architect": 700, "developer": 900, "qa_engineer": 600, "reconcile": 120}
+
+
+class RateLimitedLLM:
+    def __init__(self, tokens_per_second: float, ttft: float):
+        self.delay = 1 / tokens_per_second
+        self.ttft = ttft
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None):
+        reconcile = "You started this work" in user_prompt
+        tokens = ANSWER_TOKENS["reconcile" if reconcile else role]
+        await asyncio.sleep(self.ttft)
+        if role == "product_owner":
+            for story in range(3):
+                yield f"## Story {story + 1}: Feature {story + 1}\n"
+                for _ in range(tokens // 3):
+                    await asyncio.sleep(self.delay)
+                    yield "word "
+                yield "\n"
+            return
+        if role == "qa_engineer":
+            yield "```python\nfrom main import health_check\n\n\ndef test_health():\n    assert health_check()\n```\n"
+        if role == "developer":
+            yield "```python\ndef health_check():\n    return {'status': 'healthy'}\n```\n"
+        for _ in range(tokens):
+            await asyncio.sleep(self.delay)
+            yield "word "
+
+
+async def _run(llm, pipeline: bool) -> float:
+    server.SPRINT_PIPELINE = pipeline
+    start = time.perf_counter()
+    await server.run_sprint(f"bench-pipeline-{pipeline}", "A health check API", llm)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Time to first token (s)")
+    args = parser.parse_args()
+    os.environ["LLM_CACHE_SIZE"] = "0"
+
+    llm = RateLimitedLLM(args.tokens_per_second, args.ttft)
+    sequential = asyncio.run(_run(llm, pipeline=False))
+    pipelined = asyncio.run(_run(llm, pipeline=True))
+    print(f"sequential : {sequential:.2f}s")
+    print(f"pipelined  : {pipelined:.2f}s ({(1 - pipelined / sequential) * 100:.0f}% faster)")
+
+
+if __name__ == "__main__":
+    main()
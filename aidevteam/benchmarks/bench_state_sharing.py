@@ -0,0 +1,80 @@
+"""
+SprintState merge cost as the sprint grows: plain lists/dicts vs the
+structurally shared containers of aidevteam.agents.structures.
+
+Every step merges one phase-sized update (a message, an artifact and one
+story status change) through PhaseGraph's `apply_update`, keeping the
+snapshot each step saw like the executor does. With `operator.add` the
+message list is copied on every merge, so the cost per step grows with
+the sprint; the MessageLog/ArtifactMap/Backlog reducers stay flat.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_state_sharing.py --messages 10000
+"""
+import argparse
+import operator
+import time
+from typing import Annotated, List, TypedDict
+
+from aidevteam.agents.graph import apply_update, get_reducers
+from aidevteam.agents.state import SprintState, UserStory
+
+
+class ListSprintState(TypedDict):
+    """SprintState as it was declared before the shared containers."""
+    messages: Annotated[List, operator.add]
+    backlog: List[UserStory]
+    artifacts: Annotated[dict, operator.ior]
+
+
+def make_update(step: int, backlog, stories: int, shared: bool) -> dict:
+    story = UserStory(id=f"STORY-{step % stories:03d}", title="Story", description="...", status="DONE")
+    if shared:
+        backlog_update = [story]
+    else:
+        # What the workflows did: rebuild the whole list around the changed story
+        backlog_update = [story if s.id == story.id else s for s in backlog]
+    return {
+        "messages": [{"author": "Scrum Master", "content": f"step {step}"}],
+        "artifacts": {f"source_code:{step}": "def f(): ..."},
+        "backlog": backlog_update,
+    }
+
+
+def run(state_type: type, messages: int, stories: int, checkpoints: List[int]) -> List[float]:
+    reducers = get_reducers(state_type)
+    shared = state_type is SprintState
+    backlog = [UserStory(id=f"STORY-{i:03d}", title="Story", description="...") for i in range(stories)]
+    state = {"messages": [], "artifacts": {}, "backlog": backlog}
+    snapshots = []
+    elapsed, timings = 0.0, []
+    for step in range(1, messages + 1):
+        update = make_update(step, state["backlog"], stories, shared)
+        start = time.perf_counter()
+        state = apply_update(state, update, reducers)
+        elapsed += time.perf_counter() - start
+        snapshots.append(state)
+        if step in checkpoints:
+            timings.append(elapsed)
+    assert len(state["messages"]) == messages and len(state["artifacts"]) == messages
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000, help="Number of merged updates (one message each)")
+    parser.add_argument("--stories", type=int, default=50, help="Stories in the backlog")
+    args = parser.parse_args()
+
+    checkpoints = sorted({max(1, args.messages * i // 10) for i in (1, 2, 5, 10)})
+    print(f"{args.messages} updates, {args.stories} stories; cumulative merge time in ms\n")
+    print(f"{'state':<14}" + "".join(f"{n:>10}" for n in checkpoints) + f"{'us/update (last)':>20}")
+    for name, state_type in (("list/dict", ListSprintState), ("shared", SprintState)):
+        timings = run(state_type, args.messages, args.stories, checkpoints)
+        tail = (timings[-1] - timings[-2]) / (checkpoints[-1] - checkpoints[-2]) if len(timings) > 1 else timings[-1]
+        row = "".join(f"{t * 1000:>10.1f}" for t in timings)
+        print(f"{name:<14}{row}{tail * 1e6:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
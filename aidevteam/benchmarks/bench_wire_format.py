@@ -0,0 +1,85 @@
+"""
+Bytes-on-the-wire and serialization-time benchmark for SprintUpdate frames.
+
+Captures every frame one sprint publishes (with large generated artifacts)
+and encodes it in each supported format. "+deflate" simulates
+permessage-deflate with context takeover: one raw-deflate stream shared by
+the whole connection, sync-flushed after each message.
+
+Usage:
+    PYTHONPATH=. python3 aidevteam/benchmarks/bench_wire_format.py --artifact-kb 64
+"""
+import argparse
+import asyncio
+import time
+import zlib
+from typing import Optional
+
+from aidevteam.api import server
+from aidevteam.api.wire import _packb, encode_frame, strip_artifact_body
+
+
+class SyntheticLLM:
+    """Streams a large, code-like document word by word."""
+
+    def __init__(self, artifact_kb: int):
+        line = "    def handle_request(self, request: Request) -> Response:  # validate and dispatch\n"
+        self.text = "## Section\n" + line * (artifact_kb * 1024 // len(line))
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None):
+        for word in self.text.split(" "):
+            yield word + " "
+
+
+def capture_frames(artifact_kb: int) -> list:
+    frames = []
+
+    async def record(session_id: str, payload: dict):
+        frames.append(payload)
+
+    server.manager.send_json = record
+    asyncio.run(server.run_sprint("bench", "A health check API", SyntheticLLM(artifact_kb)))
+    return frames
+
+
+def measure(frames: list, encoding: str, lazy: bool, deflate: bool) -> dict:
+    compressor = zlib.compressobj(wbits=-15) if deflate else None
+    total = 0
+    start = time.perf_counter()
+    for payload in frames:
+        if lazy:
+            payload = strip_artifact_body(payload)
+        frame = encode_frame(payload, encoding)
+        data = frame.encode("utf-8") if isinstance(frame, str) else frame
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        total += len(data)
+    elapsed = time.perf_counter() - start
+    return {"bytes": total, "encode_ms": round(elapsed * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact-kb", type=int, default=64, help="Size of each generated artifact")
+    args = parser.parse_args()
+
+    frames = capture_frames(args.artifact_kb)
+    print(f"{len(frames)} frames per sprint, {args.artifact_kb} KB per artifact\n")
+
+    encodings = ["json"] + (["msgpack"] if _packb is not None else [])
+    baseline = None
+    print(f"{'format':<28}{'bytes':>12}{'vs json':>10}{'encode ms':>12}")
+    for encoding in encodings:
+        for lazy in (False, True):
+            for deflate in (False, True):
+                result = measure(frames, encoding, lazy, deflate)
+                baseline = baseline or result["bytes"]
+                name = encoding + (" +lazy" if lazy else "") + (" +deflate" if deflate else "")
+                ratio = result["bytes"] / baseline
+                print(f"{name:<28}{result['bytes']:>12}{ratio:>10.2f}{result['encode_ms']:>12}")
+    if _packb is None:
+        print("\n(msgpack not installed: pip install msgpack)")
+
+
+if __name__ == "__main__":
+    main()
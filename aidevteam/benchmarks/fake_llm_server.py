@@ -0,0 +1,175 @@
+"""
+Local OpenAI-compatible fake server for benchmarks.
+
+Implements just enough of POST /v1/chat/completions for the openai SDK,
+answering every request with canned Markdown. By default each answer takes
+a fixed latency; with "stream": true it is sent as server-sent events, one
+word per chunk, spread evenly over the latency.
+
+For load tests the latency can be drawn from a distribution (the time to
+first token when `tokens_per_second` is set, after which words stream at
+that rate), and a fraction of requests can fail with an HTTP error. All
+randomness comes from one seeded generator, so a run is reproducible.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_RESPONSE = """## Story 1: Health endpoint
+As a user I want a health check so that I know the service is up.
+
+## Story 2: Metrics endpoint
+As an operator I want metrics so that I can monitor the service.
+
+## Story 3: API Endpoints
+GET /health returns {"status": "healthy"} using FastAPI.
+"""
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class LatencyModel:
+    """
+    Samples latencies with the given mean from a seeded distribution.
+    `spread` is the relative half-width (uniform) or sigma (lognormal).
+    """
+
+    def __init__(self, mean: float, distribution: str = "fixed", spread: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r} (expected one of {DISTRIBUTIONS})")
+        self.mean = mean
+        self.distribution = distribution
+        self.spread = spread
+        self.rng = rng or random.Random(0)
+
+    def sample(self) -> float:
+        if self.mean <= 0 or self.distribution == "fixed":
+            return max(self.mean, 0.0)
+        if self.distribution == "uniform":
+            return self.rng.uniform(self.mean * (1 - self.spread), self.mean * (1 + self.spread))
+        if self.distribution == "exponential":
+            return self.rng.expovariate(1 / self.mean)
+        # Mean-preserving lognormal: long tail, like real model latencies
+        return self.mean * self.rng.lognormvariate(-self.spread ** 2 / 2, self.spread)
+
+
+def create_fake_app(latency: float = 0.2, response_text: str = FAKE_RESPONSE, distribution: str = "fixed",
+                    spread: float = 0.5, tokens_per_second: Optional[float] = None, error_rate: float = 0.0,
+                    error_status: int = 500, seed: int = 0) -> FastAPI:
+    """
+    Create the fake OpenAI-compatible app.
+
+    Args:
+        latency: Mean latency of an answer, or of its first token with `tokens_per_second`.
+        distribution: How latencies vary around the mean (see LatencyModel).
+        tokens_per_second: Streaming rate of the words after the first token.
+        error_rate: Fraction of requests answered with `error_status` instead.
+        seed: Seed of the generator behind latencies and injected errors.
+    """
+    fake_app = FastAPI()
+    rng = random.Random(seed)
+    latencies = LatencyModel(latency, distribution, spread, rng)
+    words = response_text.split(" ")
+    fake_app.state.stats = {"requests": 0, "errors": 0}
+
+    @fake_app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fake_app.state.stats["requests"] += 1
+        if error_rate and rng.random() < error_rate:
+            fake_app.state.stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error", "code": None}},
+                status_code=error_status, headers={"retry-after": "0"} if error_status == 429 else None
+            )
+        first_token = latencies.sample()
+        if body.get("stream"):
+            return StreamingResponse(_stream(body, first_token), media_type="text/event-stream")
+        await asyncio.sleep(first_token + (len(words) / tokens_per_second if tokens_per_second else 0))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response_text},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    async def _stream(body: dict, first_token: float):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if tokens_per_second:
+            delays = [first_token] + [1 / tokens_per_second] * (len(words) - 1)
+        else:
+            delays = [first_token / max(len(words), 1)] * len(words)
+        for i, (word, delay) in enumerate(zip(words, delays)):
+            await asyncio.sleep(delay)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake-model"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return fake_app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeLLMServer:
+    """Runs the fake app with uvicorn in a background thread."""
+
+    def __init__(self, latency: float = 0.2, response_text: str = FAKE_RESPONSE, **profile):
+        self.port = _free_port()
+        self.app = create_fake_app(latency, response_text, **profile)
+        config = uvicorn.Config(
+            self.app,
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning"
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def stats(self) -> dict:
+        """Requests served and errors injected so far."""
+        return dict(self.app.state.stats)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self) -> "FakeLLMServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -0,0 +1,87 @@
+"""
+In-process stand-in for a redis.asyncio client.
+
+Implements only what api/bus.py uses: PUBLISH and pub/sub subscriptions,
+ZADD/ZCARD/BZPOPMIN on sorted sets and aclose. Several RedisEventBus and
+RedisJobQueue instances sharing one FakeRedis behave like API nodes and
+workers sharing a Redis server, without needing one.
+"""
+import asyncio
+from typing import Dict, List, Optional, Set
+
+
+class FakePubSub:
+    def __init__(self, server: "FakeRedis"):
+        self.server = server
+        self.channels: Set[str] = set()
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self.channels.add(channel)
+            self.server.subscribers.setdefault(channel, set()).add(self)
+            self.messages.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": 1})
+
+    async def unsubscribe(self, *channels: str) -> None:
+        for channel in channels or tuple(self.channels):
+            self.channels.discard(channel)
+            self.server.subscribers.get(channel, set()).discard(self)
+
+    async def listen(self):
+        while self.channels:
+            yield await self.messages.get()
+
+    async def aclose(self) -> None:
+        await self.unsubscribe()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.subscribers: Dict[str, Set[FakePubSub]] = {}
+        self.sorted_sets: Dict[str, Dict[bytes, float]] = {}
+        self._pushed = asyncio.Condition()
+        self.published = 0
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.published += 1
+        receivers = list(self.subscribers.get(channel, ()))
+        data = message.encode() if isinstance(message, str) else message
+        for pubsub in receivers:
+            pubsub.messages.put_nowait({"type": "message", "channel": channel.encode(), "data": data})
+        return len(receivers)
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        members = self.sorted_sets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            member = member.encode() if isinstance(member, str) else member
+            added += member not in members
+            members[member] = float(score)
+        async with self._pushed:
+            self._pushed.notify_all()
+        return added
+
+    async def zcard(self, key: str) -> int:
+        return len(self.sorted_sets.get(key, {}))
+
+    async def bzpopmin(self, keys: List[str], timeout: float = 0) -> Optional[tuple]:
+        async def pop():
+            async with self._pushed:
+                while True:
+                    for key in keys:
+                        members = self.sorted_sets.get(key)
+                        if members:
+                            member = min(members, key=members.get)
+                            return key.encode(), member, members.pop(member)
+                    await self._pushed.wait()
+
+        try:
+            return await asyncio.wait_for(pop(), timeout or None)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,63 @@
+import asyncio
+
+from aidevteam.agents.scripts.scheduling import AgentScheduler
+from aidevteam.agents.scripts.factory import create_agent_node
+
+
+class FakeLLM:
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.prompts = []
+
+    async def agenerate(self, system_prompt, user_prompt, max_tokens=2000, role=None):
+        self.prompts.append((system_prompt, user_prompt))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return f"reply to {system_prompt.splitlines()[0]}"
+
+
+def test_nodes_in_the_same_step_share_the_concurrency_cap():
+    llm = FakeLLM()
+    scheduler = AgentScheduler(llm=llm, max_concurrency=2)
+    roles = ["Product Owner", "QA Engineer", "Scrum Master", "Architect"]
+    nodes = [create_agent_node(role, scheduler=scheduler) for role in roles]
+    state = {"sprint_goal": "A health check API", "messages": ["kickoff"], "artifacts": {"design": "..."}}
+
+    async def step():
+        return await asyncio.gather(*(node(state) for node in nodes))
+
+    updates = asyncio.run(step())
+
+    assert scheduler.stats() == {"requests": 4, "in_flight": 0, "peak_concurrency": 2}
+    # The step's requests run concurrently, but never more than max_concurrency at once
+    assert llm.peak == 2
+    assert len(llm.prompts) == 4 and llm.in_flight == 0
+    assert [u["messages"][0]["author"] for u in updates] == roles
+    # The persona is the system prompt and the state is rendered into the user prompt
+    assert updates[0]["messages"][0]["content"] == "reply to # Role: Product Owner"
+    assert "Sprint Goal: A health check API" in llm.prompts[0][1]
+    assert "- kickoff" in llm.prompts[0][1]
+
+
+def test_shared_scheduler_works_across_event_loops():
+    llm = FakeLLM(latency=0.01)
+    scheduler = AgentScheduler(llm=llm, max_concurrency=1)
+
+    async def step():
+        return await asyncio.gather(*(scheduler.submit(f"# Role {i}", "go") for i in range(3)))
+
+    # Each asyncio.run is a new loop; the contended semaphore must not be bound to the first one
+    for _ in range(2):
+        assert asyncio.run(step()) == ["reply to # Role 0", "reply to # Role 1", "reply to # Role 2"]
+    assert llm.peak == 1
+    assert scheduler.stats() == {"requests": 6, "in_flight": 0, "peak_concurrency": 1}
+
+
+if __name__ == "__main__":
+    test_nodes_in_the_same_step_share_the_concurrency_cap()
+    test_shared_scheduler_works_across_event_loops()
+    print("Agent node tests passed.")
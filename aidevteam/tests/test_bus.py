@@ -0,0 +1,146 @@
+import asyncio
+import os
+import tempfile
+
+from aidevteam.api import server
+from aidevteam.api.bus import InMemoryEventBus, InMemoryJobQueue, JobQueue, create_bus, session_channel
+from aidevteam.api.connections import Subscriber
+from aidevteam.api.store import SQLiteSprintStore
+from aidevteam.api.worker import SprintWorker
+from aidevteam.benchmarks.fake_redis import FakeRedis
+
+
+def event(seq, kind="log"):
+    return {"type": kind, "data": {"message": f"event {seq}"}, "seq": seq}
+
+
+def test_in_memory_bus_delivers_to_current_subscribers():
+    async def scenario():
+        bus = InMemoryEventBus()
+        await bus.publish("c", event(0))  # nobody listening yet
+        first = await bus.subscribe("c")
+        second = await bus.subscribe("c")
+        await bus.publish("c", event(1))
+        await second.close()
+        await bus.publish("c", event(2))
+        got = [await first.__anext__(), await first.__anext__()]
+        await first.close()
+        return got, bus.channels
+
+    got, channels = asyncio.run(scenario())
+    assert [e["seq"] for e in got] == [1, 2]
+    assert channels == {}
+
+
+def test_redis_backend_spans_nodes_sharing_a_server():
+    async def scenario():
+        redis = FakeRedis()
+        (api_bus, api_jobs), (worker_bus, worker_jobs) = create_bus(client=redis), create_bus(client=redis)
+        assert api_bus.distributed
+
+        subscription = await api_bus.subscribe(session_channel("s1"))
+        await api_jobs.enqueue({"id": "s1", "goal": "A health check API"})
+        await api_jobs.enqueue({"id": "s2", "goal": "A todo API"})
+        jobs = [await worker_jobs.dequeue(1), await worker_jobs.dequeue(1)]
+        await worker_bus.publish(session_channel("s1"), event(1))
+        await worker_bus.publish(session_channel("s2"), event(1))
+        received = await asyncio.wait_for(subscription.__anext__(), 1)
+        await subscription.close()
+        return jobs, received, await worker_jobs.dequeue(0.01), redis
+
+    jobs, received, empty, redis = asyncio.run(scenario())
+    assert [job["id"] for job in jobs] == ["s1", "s2"]
+    assert received == event(1)
+    assert empty is None
+    assert not redis.subscribers[session_channel("s1")]
+
+
+def test_job_queues_serve_higher_priority_first_then_fifo():
+    async def drain(queue):
+        for i, priority in enumerate([0, 5, 0, -1, 5]):
+            await queue.enqueue({"id": f"s{i}", "goal": "goal", "priority": priority})
+        size = await queue.size()
+        return size, [(await queue.dequeue(1))["id"] for _ in range(size)]
+
+    for queue in (InMemoryJobQueue(), create_bus(client=FakeRedis())[1]):
+        assert asyncio.run(drain(queue)) == (5, ["s1", "s4", "s0", "s2", "s3"])
+
+
+def test_incomplete_job_queues_fail_when_created():
+    class PushOnlyQueue(JobQueue):
+        async def enqueue(self, job):
+            pass
+
+    try:
+        PushOnlyQueue()
+    except TypeError as e:
+        assert "dequeue" in str(e)
+    else:
+        raise AssertionError("a queue missing methods must not be instantiable")
+
+
+def test_worker_caps_concurrent_sprints():
+    class Session:
+        def __init__(self, task):
+            self.task = task
+
+    async def scenario():
+        queue = InMemoryJobQueue()
+        active, peak = 0, 0
+
+        async def sprint():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+        worker = SprintWorker(queue, lambda job: Session(asyncio.create_task(sprint())), concurrency=2,
+                              poll_interval=0.01)
+        for i in range(5):
+            await queue.enqueue({"id": f"s{i}", "goal": "goal"})
+        worker.start()
+        while worker.completed < 5:
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_relay_fills_gaps_from_the_store_and_stops_at_completion():
+    async def scenario(store):
+        bus = InMemoryEventBus()
+        subscription = await bus.subscribe(session_channel("remote"))
+        subscriber = Subscriber(None, max_queue_size=16)
+        relay = asyncio.create_task(server.relay_session("remote", subscription, subscriber, after_seq=1))
+        await asyncio.sleep(0)
+        # Seq 2 was published before the relay subscribed; it is only in the store
+        store.create_sprint("remote", "goal")
+        store.append_event("remote", event(2))
+        await bus.publish(session_channel("remote"), event(1))  # already replayed
+        await bus.publish(session_channel("remote"), event(3))
+        await bus.publish(session_channel("remote"), event(4, kind="complete"))
+        await asyncio.wait_for(relay, 1)
+        return [item["seq"] for item in subscriber.queue.items], bus.channels
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSprintStore(os.path.join(tmp, "sprints.sqlite3"))
+        previous, server.sprint_store = server.sprint_store, store
+        try:
+            seqs, channels = asyncio.run(scenario(store))
+        finally:
+            server.sprint_store = previous
+            store.close()
+    assert seqs == [2, 3, 4]
+    assert channels == {}
+
+
+if __name__ == "__main__":
+    test_in_memory_bus_delivers_to_current_subscribers()
+    test_redis_backend_spans_nodes_sharing_a_server()
+    test_job_queues_serve_higher_priority_first_then_fifo()
+    test_incomplete_job_queues_fail_when_created()
+    test_worker_caps_concurrent_sprints()
+    test_relay_fills_gaps_from_the_store_and_stops_at_completion()
+    print("Event bus tests passed.")
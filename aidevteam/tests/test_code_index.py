@@ -0,0 +1,147 @@
+import asyncio
+import os
+import tempfile
+
+from aidevteam.agents.scripts import code_index
+from aidevteam.agents.scripts.code_index import CodeIndex, close_code_index, get_code_index, tokenize
+from aidevteam.agents.scripts.factory import create_agent_node
+from aidevteam.agents.scripts.tools import core_tools
+from aidevteam.agents.scripts.workspace import Workspace
+
+APP = '''"""Todo API."""
+from store import TodoStore
+
+
+class TodoService:
+    def __init__(self, store: TodoStore):
+        self.store = store
+
+    def complete_todo(self, todo_id: int) -> None:
+        """Marks a todo as done."""
+        self.store.update(todo_id, done=True)
+
+
+def health_check():
+    return {"status": "healthy"}
+'''
+
+
+def test_index_finds_symbols_and_ranks_relevant_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Workspace(tmp)
+        workspace.write("app.py", APP)
+        workspace.write("README.md", "# Todo API\nRun `uvicorn app:app`.\n")
+        workspace.write("__pycache__/app.cpython-311.py", "def complete_todo(): pass\n")
+        index = CodeIndex(workspace)
+
+        assert index.refresh() == 2
+        assert [s["name"] for s in index.symbols["app.py"]] == ["TodoService", "TodoService.__init__",
+                                                                  "TodoService.complete_todo", "health_check"]
+        assert index.find_symbol("complete_todo")[0]["signature"] == "def complete_todo(self, todo_id: int)"
+        assert index.tree() == "README.md\napp.py: TodoService, health_check"
+
+        hits = index.search("mark todo complete", k=2)
+        assert hits[0]["symbol"] == "TodoService" and hits[0]["start_line"] == 5
+        assert index.search("health_check")[0]["symbol"] == "health_check"
+        assert index.search("uvicorn app:app")[0]["path"] == "README.md"  # literal match via trigrams
+        assert index.search("nonexistent_identifier") == []
+    assert tokenize("completeTodo todo_id") == ["completetodo", "complete", "todo", "todo_id", "todo", "id"]
+
+
+def test_index_updates_incrementally_on_writes_and_mtime_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Workspace(tmp)
+        index = CodeIndex(workspace, refresh_interval=0)
+        workspace.write("app.py", APP)
+        assert index.indexed == 1  # indexed by the write itself
+        assert index.refresh() == 0
+
+        with open(os.path.join(tmp, "app.py"), "a") as f:  # edited outside the workspace
+            f.write("\ndef readiness_probe():\n    return True\n")
+        assert index.refresh() == 1
+        assert index.find_symbol("readiness_probe")
+
+        os.remove(os.path.join(tmp, "app.py"))
+        index.refresh()
+        assert index.stats()["files"] == 0 and index.stats()["terms"] == 0 and not index.grams
+
+
+def test_refresh_does_not_walk_skipped_directories():
+    walked = []
+    walk = os.walk
+
+    def recording_walk(top, *args, **kwargs):
+        for directory, dirs, files in walk(top, *args, **kwargs):
+            walked.append(os.path.relpath(directory, top))
+            yield directory, dirs, files
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Workspace(tmp)
+        workspace.write("app.py", APP)
+        workspace.write("node_modules/pkg/index.py", "def vendored():\n    pass\n")
+        workspace.write("src/venv/lib.py", "def venv_lib():\n    pass\n")
+        os.walk = recording_walk
+        try:
+            index = CodeIndex(workspace, refresh_interval=0)
+            index.refresh()
+        finally:
+            os.walk = walk
+    assert sorted(set(walked)) == [".", "src"]
+    assert sorted(index.files) == ["app.py"]
+
+
+def test_search_code_tools_and_agent_context():
+    class RecordingScheduler:
+        prompts = []
+
+        async def submit(self, system_prompt, user_prompt, max_tokens, role=None):
+            self.prompts.append(user_prompt)
+            return "ok"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sprint = Workspace.for_sprint("sprint-a", tmp)
+        tools = {t.name: t for t in core_tools(sprint)}
+        other = {t.name: t for t in core_tools(Workspace.for_sprint("sprint-b", tmp))}
+        assert "execute_shell" in tools
+        assert "outside the workspace" in tools["write_file"].invoke({"path": "/tmp/app.py", "content": APP})
+
+        tools["write_file"].invoke({"path": "app.py", "content": APP})
+        assert "app.py:14-15 (health_check)" in tools["search_code"].invoke({"query": "health check"})
+        asyncio.run(other["write_file"].ainvoke({"path": "cache.py", "content": "def warm_cache():\n    pass\n"}))
+        assert get_code_index(os.path.join(tmp, "sprint-b")).find_symbol("warm_cache")
+        assert "cache.py:1-2 (warm_cache)" in other["search_code"].invoke({"query": "warm cache"})
+        # Each sprint searches its own workspace only
+        assert "No matches." == tools["search_code"].invoke({"query": "warm_cache"})
+        assert "app.py" not in other["search_code"].invoke({"query": "health_check"})
+
+        scheduler = RecordingScheduler()
+        node = create_agent_node("Senior Backend Developer", scheduler=scheduler, code_context=1)
+        asyncio.run(node({"sprint_goal": "Add a health check", "repo_path": sprint.root, "messages": []}))
+    assert "Relevant Code:\n### app.py:14-15 (health_check)" in scheduler.prompts[0]
+
+
+def test_shared_indexes_are_bounded_and_closed_with_their_sprint():
+    size, code_index.CACHE_SIZE = code_index.CACHE_SIZE, 2
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            roots = [os.path.join(tmp, name) for name in ("a", "b", "c")]
+            first = get_code_index(roots[0])
+            get_code_index(roots[1])
+            assert get_code_index(roots[0]) is first  # most recently used again
+            get_code_index(roots[2])
+            assert set(code_index._indexes) == {os.path.realpath(roots[0]), os.path.realpath(roots[2])}
+
+            assert close_code_index(Workspace(roots[2]))
+            assert not close_code_index(roots[2])
+            close_code_index(roots[0])
+    finally:
+        code_index.CACHE_SIZE = size
+
+
+if __name__ == "__main__":
+    test_index_finds_symbols_and_ranks_relevant_chunks()
+    test_index_updates_incrementally_on_writes_and_mtime_changes()
+    test_refresh_does_not_walk_skipped_directories()
+    test_search_code_tools_and_agent_context()
+    test_shared_indexes_are_bounded_and_closed_with_their_sprint()
+    print("Code index tests passed.")
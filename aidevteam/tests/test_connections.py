@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from aidevteam.api.connections import ConnectionManager, SubscriberQueue
+
+
+def frame(kind, **data):
+    return {"type": kind, "data": data}
+
+
+def test_full_queue_drops_logs_and_coalesces_updates():
+    async def scenario():
+        queue = SubscriberQueue(maxsize=3)
+        await queue.put(frame("log", message="first"))
+        await queue.put(frame("agent_update", agent_id="po", status="active"))
+        await queue.put(frame("artifact_delta", id="a1", delta="Hello"))
+
+        # Full: agent_update and artifact_delta merge into queued frames
+        await queue.put(frame("agent_update", agent_id="po", status="done"))
+        await queue.put(frame("artifact_delta", id="a1", delta=", world"))
+        # Full: a lossless artifact evicts the oldest log instead of waiting
+        await queue.put(frame("artifact", id="a1", content="Hello, world"), timeout=0.1)
+        # Full with nothing droppable: the incoming log is dropped
+        await queue.put(frame("log", message="second"))
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert [item["type"] for item in queue.items] == ["agent_update", "artifact_delta", "artifact"]
+    assert queue.items[0]["data"]["status"] == "done"
+    assert queue.items[1]["data"]["delta"] == "Hello, world"
+    assert queue.dropped == 2
+    assert queue.coalesced == 2
+
+
+def test_lossless_frame_times_out_when_subscriber_stalls():
+    async def scenario():
+        queue = SubscriberQueue(maxsize=1)
+        await queue.put(frame("artifact", id="a1"))
+        return await queue.put(frame("complete", success=True), timeout=0.05)
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_clearing_a_full_queue_releases_blocked_producers():
+    async def scenario():
+        queue = SubscriberQueue(maxsize=1)
+        await queue.put(frame("artifact", id="a1"))
+        blocked = asyncio.create_task(queue.put(frame("complete", success=True), timeout=30))
+        await asyncio.sleep(0)
+        waiting = not blocked.done()
+        queue.clear()
+        # Guard against a hang only: the producer must be released long before its 30s timeout
+        released = await asyncio.wait_for(blocked, 1)
+        return waiting, released, await queue.put(frame("log", message="late")), len(queue)
+
+    assert asyncio.run(scenario()) == (True, False, False, 0)
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        pass
+
+
+def test_updates_fan_out_to_every_subscriber():
+    async def scenario():
+        manager = ConnectionManager(max_queue_size=8)
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=0.01)
+        await manager.connect("s1", fast)
+        await manager.connect("s1", slow)
+        for i in range(20):
+            await manager.send_json("s1", frame("log", message=str(i)))
+        await manager.send_json("s1", frame("complete", success=True))
+        await manager.drain("s1")
+        metrics = manager.metrics()
+        manager.disconnect("s1")
+        return fast, slow, metrics
+
+    fast, slow, metrics = asyncio.run(scenario())
+    assert len(fast.sent) == 21
+    assert slow.sent[-1]["type"] == "complete"
+    assert metrics["subscribers"] == 2
+    assert metrics["frames_sent"] == len(fast.sent) + len(slow.sent)
+    assert metrics["frames_dropped"] == 21 - len(slow.sent)
+
+
+if __name__ == "__main__":
+    test_full_queue_drops_logs_and_coalesces_updates()
+    test_lossless_frame_times_out_when_subscriber_stalls()
+    test_clearing_a_full_queue_releases_blocked_producers()
+    test_updates_fan_out_to_every_subscriber()
+    print("Connection manager tests passed.")
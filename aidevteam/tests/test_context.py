@@ -0,0 +1,43 @@
+from aidevteam.api.context import ContextBudgeter, compact_code, compact_markdown, count_tokens
+
+DESIGN = "\n".join(
+    ["# Technical Design", "## Overview", "A health check service."]
+    + ["## Architecture Diagram"] + [f"box {i} ---> box {i + 1} via message queue topic {i}" for i in range(200)]
+    + ["## API Endpoints", "GET /health returns status", "GET /metrics returns counters"]
+    + ["## Security Considerations"] + [f"Rotate secret number {i} every {i} days" for i in range(200)]
+)
+
+
+def test_small_inputs_are_untouched():
+    prepared, stats = ContextBudgeter().prepare("architect", stories="## Story 1\nAs a user...")
+    assert prepared["stories"] == "## Story 1\nAs a user..."
+    assert stats["stories"]["tokens"] == stats["stories"]["original_tokens"]
+
+
+def test_design_keeps_requested_sections_within_budget():
+    compacted = compact_markdown(DESIGN, budget=300, sections=["API Endpoints", "Overview"])
+    assert count_tokens(compacted) <= 300
+    assert "GET /health returns status" in compacted
+    assert "GET /metrics returns counters" in compacted
+    # Every heading survives and other sections keep their opening lines
+    assert "## Security Considerations" in compacted
+    assert "box 0 ---> box 1" in compacted
+    assert "box 199" not in compacted
+
+
+def test_code_is_reduced_to_its_outline():
+    code = "import os\n\n\nclass Service:\n    \"\"\"Health service.\"\"\"\n" + "".join(
+        f"    def handler_{i}(self):\n        value = {i} * 2\n        return value\n" for i in range(100)
+    )
+    compacted = compact_code(code, budget=400)
+    assert count_tokens(compacted) <= 420
+    assert "import os" in compacted
+    assert "def handler_0(self):" in compacted
+    assert "value = 0 * 2" not in compacted
+
+
+if __name__ == "__main__":
+    test_small_inputs_are_untouched()
+    test_design_keeps_requested_sections_within_budget()
+    test_code_is_reduced_to_its_outline()
+    print("Context budgeting tests passed.")
@@ -0,0 +1,119 @@
+import asyncio
+import builtins
+import os
+import tempfile
+from typing import Optional
+
+from aidevteam.agents.scripts import code_index, workspace as workspace_module
+from aidevteam.agents.scripts.tools import workspace_tools
+from aidevteam.agents.scripts.workspace import Workspace
+from aidevteam.api import server
+
+
+def test_workspace_confines_paths_and_writes_atomically():
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Workspace(os.path.join(tmp, "repo"))
+        written = []
+        workspace.on_write(written.append)
+
+        assert workspace.write("app/main.py", "print('v1')\n") == os.path.join("app", "main.py")
+        workspace.write("app/main.py", "print('v2')\n")
+        assert workspace.read("app/main.py") == "print('v2')\n"
+        assert os.listdir(os.path.join(tmp, "repo", "app")) == ["main.py"]  # no temp files left behind
+        assert written == [os.path.join("app", "main.py")] * 2
+
+        os.symlink(tmp, os.path.join(tmp, "repo", "escape"))
+        for path in ("../secrets.txt", "/etc/passwd", "escape/secrets.txt"):
+            try:
+                workspace.write(path, "x")
+                assert False, f"{path} should be rejected"
+            except PermissionError:
+                pass
+        assert workspace.list_files() == [os.path.join("app", "main.py")]
+
+
+def test_ranged_and_streamed_reads_of_large_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Workspace(tmp, mmap_threshold=1024)
+        content = "".join(f"line {i:05d}\n" for i in range(1000))  # 11 KB, read through mmap
+        workspace.write("big.txt", content)
+
+        assert workspace.read("big.txt", offset=11 * 500, length=11) == "line 00500\n"
+        assert workspace.read("big.txt", offset=len(content)) == ""
+        assert b"".join(workspace.iter_chunks("big.txt", chunk_size=4096)).decode() == content
+
+        async def stream():
+            return [chunk async for chunk in workspace.astream("big.txt", chunk_size=4096)]
+
+        opened = []
+
+        def counting_open(*args, **kwargs):
+            opened.append(args[0])
+            return builtins.open(*args, **kwargs)
+
+        workspace_module.open = counting_open
+        try:
+            chunks = asyncio.run(stream())
+            small = list(Workspace(tmp).iter_chunks("big.txt", chunk_size=4096))  # below the mmap threshold
+        finally:
+            del workspace_module.open
+        assert [len(chunk) for chunk in chunks] == [4096, 4096, 2808]
+        assert b"".join(small).decode() == content
+        assert len(opened) == 2  # one handle per stream, not one per chunk
+
+
+def test_async_batch_tools_report_per_file_errors():
+    async def scenario(tools):
+        written = await tools["write_files"].ainvoke({"files": {"a.py": "A = 1\n", "b.py": "B = 2\n",
+                                                                 "../c.py": "C = 3\n"}})
+        read = await tools["read_files"].ainvoke({"paths": ["a.py", "b.py", "missing.py"]})
+        head = await tools["read_file"].ainvoke({"path": "a.py", "offset": 0, "length": 1})
+        return written, read, head
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tools = {t.name: t for t in workspace_tools(Workspace(tmp))}
+        written, read, head = asyncio.run(scenario(tools))
+        listed = tools["list_files"].invoke({})
+        single = tools["write_file"].invoke({"path": "/tmp/outside.py", "content": ""})
+
+    assert "Successfully wrote to a.py" in written and "Error with ../c.py" in written
+    assert "=== a.py ===\nA = 1" in read and "=== b.py ===\nB = 2" in read
+    assert "=== missing.py ===\nError reading file" in read
+    assert head == "A"
+    assert listed == "a.py\nb.py"
+    assert single.startswith("Error writing file")
+
+
+def test_api_sprints_write_their_files_to_the_sprint_workspace():
+    class CodingLLM:
+        async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                          role: Optional[str] = None):
+            if role == "developer":
+                yield "```python\ndef add(a, b):\n    return a + b\n```"
+            elif role == "qa_engineer":
+                yield "```python\nfrom main import add\n\ndef test_add():\n    assert add(2, 2) == 4\n```"
+            else:
+                yield "## Story 1: Add numbers\nAs a user I want to add numbers."
+
+    async def record(session_id: str, payload: dict):
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = server.manager.send_json, server.SPRINT_WORKSPACE_ROOT
+        server.manager.send_json, server.SPRINT_WORKSPACE_ROOT = record, tmp
+        try:
+            asyncio.run(server.run_session_sprint("with-files", "An adder", CodingLLM()))
+        finally:
+            server.manager.send_json, server.SPRINT_WORKSPACE_ROOT = saved
+        workspace = Workspace(os.path.join(tmp, "with-files"))
+        assert workspace.list_files() == ["main.py", "test_main.py"]
+        assert workspace.read("main.py").startswith("def add(a, b):")
+        assert workspace.root not in code_index._indexes  # dropped when the sprint ended
+
+
+if __name__ == "__main__":
+    test_workspace_confines_paths_and_writes_atomically()
+    test_ranged_and_streamed_reads_of_large_files()
+    test_async_batch_tools_report_per_file_errors()
+    test_api_sprints_write_their_files_to_the_sprint_workspace()
+    print("File tool tests passed.")
@@ -0,0 +1,78 @@
+import asyncio
+import operator
+from typing import Annotated, List, TypedDict
+
+from aidevteam.agents.graph import PhaseGraph, get_reducers
+from aidevteam.agents.scripts.sprint import build_sprint_graph
+
+
+class DemoState(TypedDict):
+    messages: Annotated[List[str], operator.add]
+    artifacts: Annotated[dict, operator.ior]
+    goal: str
+
+
+def test_reducers_are_read_from_state_annotations():
+    reducers = get_reducers(DemoState)
+    assert reducers == {"messages": operator.add, "artifacts": operator.ior}
+
+
+def test_independent_phases_run_concurrently():
+    events = []
+
+    async def design(state):
+        events.append("design started")
+        await asyncio.sleep(0.01)
+        events.append("design finished")
+        return {"artifacts": {"design": state["goal"]}, "messages": ["design"]}
+
+    async def tests(state):
+        events.append("tests started")
+        await asyncio.sleep(0.01)
+        events.append("tests finished")
+        return {"artifacts": {"tests": state["goal"]}, "messages": ["tests"]}
+
+    def report(state):
+        events.append("report started")
+        return {"artifacts": {"report": sorted(state["artifacts"])}}
+
+    graph = PhaseGraph(DemoState)
+    graph.add_phase("design", design, inputs=["goal"], outputs=["artifacts", "messages"])
+    graph.add_phase("tests", tests, inputs=["goal"], outputs=["artifacts", "messages"])
+    graph.add_phase("report", report, inputs=["artifacts"], outputs=["artifacts"])
+    assert graph.layers() == [["design", "tests"], ["report"]]
+
+    result = graph.run({"messages": [], "artifacts": {}, "goal": "api"})
+
+    # Both phases of the first layer start before either finishes; the report waits for both
+    assert sorted(events[:2]) == ["design started", "tests started"]
+    assert sorted(events[2:4]) == ["design finished", "tests finished"]
+    assert events[4:] == ["report started"]
+    assert sorted(result["messages"]) == ["design", "tests"]
+    assert result["artifacts"]["report"] == ["design", "tests"]
+
+
+def test_undeclared_output_is_rejected():
+    graph = PhaseGraph(DemoState)
+    graph.add_phase("sneaky", lambda state: {"goal": "changed"}, outputs=["messages"])
+    try:
+        graph.run({"messages": [], "artifacts": {}, "goal": "api"})
+    except ValueError as e:
+        assert "goal" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_sprint_graph_matches_langgraph_topology():
+    graph = build_sprint_graph()
+    assert graph.layers() == [["planning"], ["select_story"], ["development"], ["retro"]]
+    compiled = graph.to_langgraph().compile()
+    assert set(compiled.get_graph().nodes) >= {"planning", "select_story", "development", "retro"}
+
+
+if __name__ == "__main__":
+    test_reducers_are_read_from_state_annotations()
+    test_independent_phases_run_concurrently()
+    test_undeclared_output_is_rejected()
+    test_sprint_graph_matches_langgraph_topology()
+    print("Phase graph tests passed.")
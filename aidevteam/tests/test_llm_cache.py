@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+
+from aidevteam.api.cache import ResponseCache, make_cache_key
+
+
+def test_cache_key_covers_all_parameters():
+    base = make_cache_key("gpt-4o-mini", "system", "user", 2000, 0.7)
+    assert base == make_cache_key("gpt-4o-mini", "system", "user", 2000, 0.7)
+    assert base != make_cache_key("gpt-4o", "system", "user", 2000, 0.7)
+    assert base != make_cache_key("gpt-4o-mini", "system", "user", 1000, 0.7)
+    assert base != make_cache_key("gpt-4o-mini", "system", "user", 2000, 0.0)
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # "a" becomes most recently used
+    cache.set("c", "C")           # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=0.01)
+    cache.set("a", "A")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        cache = ResponseCache(path=path)
+        cache.set("a", "A")
+        cache.close()
+
+        reopened = ResponseCache(path=path)
+        assert reopened.get("a") == "A"
+        assert reopened.stats()["disk_hits"] == 1
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_cache_key_covers_all_parameters()
+    test_lru_eviction_and_counters()
+    test_ttl_expiry()
+    test_disk_tier_survives_restart()
+    print("Response cache tests passed.")
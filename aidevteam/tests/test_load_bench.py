@@ -0,0 +1,79 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from aidevteam.benchmarks import fake_llm_server
+from aidevteam.benchmarks.bench_load import compare, percentile, summarize
+from aidevteam.benchmarks.fake_llm_server import LatencyModel, create_fake_app
+
+REQUEST = {"model": "fake-model", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class RecordingAsyncio:
+    """Stands in for the fake server's asyncio module, recording the delays it sleeps for."""
+
+    def __init__(self):
+        self.delays = []
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay):
+        self.delays.append(delay)
+        await asyncio.sleep(0)
+
+
+def test_fake_llm_injects_seeded_errors_and_streams_at_the_token_rate():
+    def statuses(seed):
+        client = TestClient(create_fake_app(latency=0, error_rate=0.3, error_status=429, seed=seed))
+        return [client.post("/v1/chat/completions", json=REQUEST).status_code for _ in range(20)]
+
+    first = statuses(7)
+    assert first == statuses(7)  # reproducible
+    assert set(first) == {200, 429}
+
+    app = create_fake_app(latency=0.05, response_text="one two three four five", tokens_per_second=100)
+    clock = RecordingAsyncio()
+    fake_llm_server.asyncio = clock
+    try:
+        response = TestClient(app).post("/v1/chat/completions", json={**REQUEST, "stream": True})
+    finally:
+        fake_llm_server.asyncio = asyncio
+    assert response.text.count("data: ") == 6 and response.text.endswith("data: [DONE]\n\n")
+    # The first token waits out the latency, then one word every 1/tokens_per_second
+    assert clock.delays == [0.05, 0.01, 0.01, 0.01, 0.01]
+    assert app.state.stats == {"requests": 1, "errors": 0}
+
+
+def test_latency_distributions_keep_their_mean():
+    for name in ("uniform", "exponential", "lognormal"):
+        model = LatencyModel(0.2, name)
+        samples = [model.sample() for _ in range(5000)]
+        assert abs(sum(samples) / len(samples) - 0.2) < 0.02, name
+    assert LatencyModel(0.2).sample() == 0.2
+
+
+def test_load_report_percentiles_and_baseline_comparison():
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile([1.0], 99) == 1.0 and percentile([], 50) is None
+
+    results = [{"frames": 39, "bytes": 8000, "ttfe": 0.01 * i, "latency": 1.0 + i, "ok": True, "error": None}
+               for i in range(4)]
+    results.append({"frames": 3, "bytes": 300, "ttfe": 0.02, "latency": None, "ok": False, "error": "LLM down"})
+    report = summarize(results, wall=2.0, clients=5, baseline_rss=100 * 2 ** 20, peak_rss=110 * 2 ** 20)
+    assert report["sprints"] == {"total": 5, "completed": 4, "failed": 1, "errors": {"LLM down": 1}}
+    assert report["latency_s"]["p50"] == 2.5 and report["latency_s"]["max"] == 4.0
+    assert report["frames"]["per_second"] == 79.5
+    assert report["memory"]["per_session_kb"] == 2048.0
+
+    slower = {**report, "latency_s": {**report["latency_s"], "p50": 5.0}}
+    lines = compare(slower, report)
+    assert "latency_s.p50: 2.5 -> 5.0 (+100.0%) (worse)" in lines
+    assert "frames.per_second: 79.5 -> 79.5 (+0.0%)" in lines
+
+
+if __name__ == "__main__":
+    test_fake_llm_injects_seeded_errors_and_streams_at_the_token_rate()
+    test_latency_distributions_keep_their_mean()
+    test_load_report_percentiles_and_baseline_comparison()
+    print("Load benchmark tests passed.")
@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from aidevteam.api import metrics
+from aidevteam.api.metrics import instrument_phase, timed_phase
+
+
+def phase_count(phase: str, outcome: str) -> float:
+    value = metrics.registry.get_sample_value(
+        "aidevteam_phase_seconds_count", {"phase": phase, "outcome": outcome}
+    )
+    return value or 0.0
+
+
+def test_llm_requests_record_latency_and_tokens():
+    labels = {"model": "demo-model", "mode": "stream", "outcome": "ok"}
+    before = metrics.registry.get_sample_value("aidevteam_llm_request_seconds_count", labels) or 0.0
+    metrics.observe_llm_request("demo-model", "stream", "ok", 0.05, prompt_tokens=12, completion_tokens=30)
+
+    assert metrics.registry.get_sample_value("aidevteam_llm_request_seconds_count", labels) == before + 1
+    text = metrics.render().decode()
+    assert "# TYPE aidevteam_llm_tokens_total counter" in text
+    assert 'aidevteam_llm_tokens_total{direction="completion",model="demo-model"}' in text
+
+
+def test_phases_record_duration_and_outcome():
+    before_ok = phase_count("demo_phase", "ok")
+    before_error = phase_count("demo_phase", "error")
+
+    @instrument_phase("demo_phase")
+    async def workflow(state):
+        return {"done": True}
+
+    assert asyncio.run(workflow({})) == {"done": True}
+    try:
+        with timed_phase("demo_phase"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert phase_count("demo_phase", "ok") == before_ok + 1
+    assert phase_count("demo_phase", "error") == before_error + 1
+
+
+def test_metrics_endpoint_reports_workflows_and_gauges():
+    from aidevteam.api.server import app
+    from aidevteam.agents.scripts.planning import planning_workflow
+
+    planning_workflow({"sprint_goal": "A health check API"})
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'aidevteam_phase_seconds_count{outcome="ok",phase="planning"}' in response.text
+    assert "aidevteam_active_sessions 0.0" in response.text
+    assert 'aidevteam_ws_queue_depth{stat="total"} 0.0' in response.text
+
+
+if __name__ == "__main__":
+    test_llm_requests_record_latency_and_tokens()
+    test_phases_record_duration_and_outcome()
+    test_metrics_endpoint_reports_workflows_and_gauges()
+    print("Metrics tests passed.")
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from pathlib import Path
+
+from aidevteam.agents.scripts.utils import PersonaRegistry
+
+
+def write_persona(path: Path, content: str, mtime_ns: int) -> None:
+    path.write_text(content, encoding="utf-8")
+    # Explicit mtimes: two writes within the filesystem's timestamp granularity would look unchanged
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hot_reload_follows_persona_mtime():
+    with tempfile.TemporaryDirectory() as tmp:
+        skills = Path(tmp)
+        persona = skills / "backend_dev.md"
+        write_persona(persona, "v1", 1_000_000_000)
+        live = PersonaRegistry(skills, hot_reload=True)
+        frozen = PersonaRegistry(skills, hot_reload=False)
+
+        assert live.get("Backend Dev") == frozen.get("backend_dev") == "v1"
+
+        write_persona(persona, "v2", 2_000_000_000)
+        assert live.get("backend_dev") == "v2"
+        assert frozen.get("backend_dev") == "v1"
+
+        # Same mtime: the cached content is served without re-reading
+        write_persona(persona, "v3", 2_000_000_000)
+        assert live.get("backend_dev") == "v2"
+
+        write_persona(skills / "architect.md", "design", 3_000_000_000)
+        assert live.get("architect") == "design"
+
+        persona.unlink()
+        try:
+            live.get("backend_dev")
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("a deleted persona must not be served")
+
+
+if __name__ == "__main__":
+    test_hot_reload_follows_persona_mtime()
+    print("Persona tests passed.")
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Optional
+
+from aidevteam.api import server
+from aidevteam.agents.scripts.sandbox import TestSandbox
+from aidevteam.api.pipeline import SectionStream
+
+STORIES = ["Intro\n## Story 1: Add numbers\nAs a user I want to add.\n",
+           "## Story 2: Subtract\nAs a user I want to subtract.\n```python\n## not a heading\n```\n",
+           "## Story 3: Multiply\nAs a user I want to multiply.\n"]
+
+
+def test_section_stream_completes_sections_at_the_next_heading():
+    async def scenario():
+        stream = SectionStream()
+        waiter = asyncio.create_task(stream.wait_for(2))
+        text = "".join(STORIES)
+        for i in range(0, len(text), 7):
+            await stream.feed(text[i:i + 7])
+            await asyncio.sleep(0)
+            if waiter.done():
+                break
+        first_two = await waiter
+        await stream.feed(text[i + 7:])
+        await stream.close()
+        return first_two, stream.sections, await stream.wait_for(5), stream.text
+
+    first_two, sections, all_sections, text = asyncio.run(scenario())
+    assert first_two == STORIES[:2]
+    assert sections == all_sections == STORIES
+    assert text == "".join(STORIES)
+
+
+def test_pipelined_sprint_overlaps_phases_and_reconciles():
+    events = []
+
+    class PipelineLLM:
+        async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                          role: Optional[str] = None):
+            reconcile = user_prompt.startswith("Sprint Goal") and "You started this work" in user_prompt
+            name = f"{role}_reconcile" if reconcile else role
+            events.append(("start", name))
+            if role == "product_owner":
+                for story in STORIES:
+                    await asyncio.sleep(0.05)
+                    yield story
+            elif role == "architect" and reconcile:
+                assert "Story 3" in user_prompt and "Story 1" not in user_prompt  # only the later stories
+                yield "## Multiplication endpoint\nPOST /multiply"
+            elif role == "architect":
+                assert "Story 1" in user_prompt and "Story 3" not in user_prompt
+                yield "## API Endpoints\nPOST /add, POST /subtract"
+            elif role == "developer":
+                await asyncio.sleep(0.05)
+                yield "```python\ndef add(a, b):\n    return a + b\n```"
+            elif reconcile:
+                assert "def add" in user_prompt and "ImportError: cannot import name 'plus'" in user_prompt
+                yield "```python\nfrom main import add\n\ndef test_add():\n    assert add(2, 2) == 4\n```"
+            else:
+                assert "POST /add" in user_prompt  # planned from the design
+                yield "# Test Plan\n```python\nfrom main import plus\n\ndef test_plus():\n    assert plus(1, 1) == 2\n```"
+            events.append(("end", name))
+
+    frames = []
+
+    async def record(session_id: str, payload: dict):
+        frames.append(payload)
+
+    sandbox = TestSandbox(workers=1)
+    saved = server.manager.send_json, server.SPRINT_PIPELINE, server.get_qa_sandbox
+    server.manager.send_json, server.SPRINT_PIPELINE, server.get_qa_sandbox = record, True, lambda: sandbox
+    try:
+        asyncio.run(server.run_sprint("pipelined", "A calculator", PipelineLLM()))
+    finally:
+        server.manager.send_json, server.SPRINT_PIPELINE, server.get_qa_sandbox = saved
+        sandbox.close()
+
+    assert events.index(("start", "architect")) < events.index(("end", "product_owner"))
+    assert events.index(("start", "qa_engineer")) < events.index(("end", "developer"))
+    assert events[-2:] == [("start", "qa_engineer_reconcile"), ("end", "qa_engineer_reconcile")]
+
+    artifacts = [f["data"] for f in frames if f.get("type") == "artifact"]
+    assert [a["title"] for a in artifacts] == ["User Stories", "Technical Design", "main.py", "Test Report"]
+    design = artifacts[1]
+    assert design["content"] == "## API Endpoints\nPOST /add, POST /subtract\n\n## Multiplication endpoint\nPOST /multiply"
+    streamed = "".join(f["data"]["delta"] for f in frames
+                       if f.get("type") == "artifact_delta" and f["data"]["id"] == design["id"])
+    assert streamed == design["content"]
+    assert artifacts[3]["preview"] == "1/1 passed"  # the reconciled tests were executed
+    usage = [f["data"]["phase"] for f in frames if f.get("type") == "usage"]
+    assert "architect_reconcile" in usage and "qa_engineer_reconcile" in usage
+    assert frames[-1]["type"] == "complete"
+
+
+if __name__ == "__main__":
+    test_section_stream_completes_sections_at_the_next_heading()
+    test_pipelined_sprint_overlaps_phases_and_reconciles()
+    print("Pipeline tests passed.")
@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import httpx
+import openai
+
+from aidevteam.api.resilience import LLMError, RateLimiter, ResilientCaller, RetryPolicy
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def fast_retry(max_attempts=4):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.01)
+
+
+def test_retries_retryable_errors_then_succeeds():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise rate_limit_error()
+        return "ok"
+
+    caller = ResilientCaller(retry=fast_retry())
+    assert asyncio.run(caller.call(flaky)) == "ok"
+    assert len(calls) == 3
+    assert caller.retries == 2
+
+
+def test_non_retryable_errors_fail_fast():
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    caller = ResilientCaller(retry=fast_retry())
+    try:
+        asyncio.run(caller.call(broken))
+    except LLMError as e:
+        assert isinstance(e.__cause__, ValueError)
+    else:
+        raise AssertionError("expected LLMError")
+    assert len(calls) == 1
+
+
+def test_backoff_honours_retry_after():
+    policy = RetryPolicy(max_delay=5)
+    assert policy.backoff(0, rate_limit_error(retry_after=2)) == 2
+    assert policy.backoff(0, rate_limit_error(retry_after=60)) == 5
+    assert 0 <= policy.backoff(3) <= 4
+
+
+def test_attempt_timeout_and_deadline():
+    calls = []
+
+    async def hangs():
+        calls.append(1)
+        await asyncio.sleep(10)
+
+    caller = ResilientCaller(retry=fast_retry(max_attempts=100), attempt_timeout=0.02, deadline=0.1)
+    start = time.monotonic()
+    try:
+        asyncio.run(caller.call(hangs))
+    except LLMError:
+        pass
+    else:
+        raise AssertionError("expected LLMError")
+    assert time.monotonic() - start < 0.5
+    assert 1 < len(calls) < 100
+
+
+def test_hedge_fires_after_p95_and_first_result_wins():
+    calls = []
+
+    async def slow_then_fast():
+        calls.append(1)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    caller = ResilientCaller(hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        caller.latency.record(0.02)
+
+    start = time.monotonic()
+    assert asyncio.run(caller.call(slow_then_fast)) == 2
+    assert time.monotonic() - start < 0.5
+    assert caller.hedges == 1
+
+
+def test_streams_are_never_hedged():
+    calls = []
+
+    async def open_stream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "stream"
+
+    caller = ResilientCaller(hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        caller.latency.record(0.001)
+
+    assert asyncio.run(caller.call(open_stream, mode="stream")) == "stream"
+    assert len(calls) == 1 and caller.hedges == 0
+    assert len(caller.tracker("stream").samples) == 1
+    assert len(caller.latency.samples) == 5
+
+
+def test_streams_are_read_under_the_deadline_and_tracked_apart():
+    class TrickleStream:
+        closed = False
+
+        def __init__(self, items, gap):
+            self.items, self.gap = items, gap
+
+        async def __aiter__(self):
+            for item in self.items:
+                await asyncio.sleep(self.gap)
+                yield item
+
+        async def close(self):
+            self.closed = True
+
+    async def consume(caller, stream):
+        async def open_stream():
+            return stream
+        return [item async for item in caller.stream(open_stream)]
+
+    caller = ResilientCaller(attempt_timeout=1.0, deadline=0.1)
+    stalled = TrickleStream(range(100), 0.02)  # every item is on time, the stream as a whole is not
+    try:
+        asyncio.run(consume(caller, stalled))
+    except LLMError as e:
+        assert "deadline" in str(e)
+    else:
+        raise AssertionError("expected LLMError")
+    assert stalled.closed
+
+    caller = ResilientCaller(attempt_timeout=0.05, deadline=10)
+    assert asyncio.run(consume(caller, TrickleStream("abc", 0.001))) == ["a", "b", "c"]
+    try:
+        asyncio.run(consume(caller, TrickleStream("abc", 0.2)))  # stalls between items
+    except LLMError as e:
+        assert "timed out" in str(e)
+    else:
+        raise AssertionError("expected LLMError")
+
+    # Stream opens are kept out of the latencies hedging is based on
+    assert len(caller.tracker("stream").samples) == 2
+    assert len(caller.latency.samples) == 0
+
+
+def test_rate_limiter_spaces_requests_and_tokens():
+    async def run():
+        limiter = RateLimiter(requests_per_minute=600, burst=1)  # one every 0.1s
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        requests_elapsed = time.monotonic() - start
+
+        limiter = RateLimiter(tokens_per_minute=600)  # 10 tokens/s, 600 burst
+        await limiter.acquire(600)
+        start = time.monotonic()
+        await limiter.acquire(2)
+        return requests_elapsed, time.monotonic() - start
+
+    requests_elapsed, tokens_elapsed = asyncio.run(run())
+    assert requests_elapsed >= 0.18
+    assert tokens_elapsed >= 0.15
+
+
+if __name__ == "__main__":
+    test_retries_retryable_errors_then_succeeds()
+    test_non_retryable_errors_fail_fast()
+    test_backoff_honours_retry_after()
+    test_attempt_timeout_and_deadline()
+    test_hedge_fires_after_p95_and_first_result_wins()
+    test_streams_are_never_hedged()
+    test_streams_are_read_under_the_deadline_and_tracked_apart()
+    test_rate_limiter_spaces_requests_and_tokens()
+    print("Resilience tests passed.")
@@ -0,0 +1,131 @@
+import asyncio
+
+from aidevteam.api.cache import ResponseCache
+from aidevteam.api.resilience import LLMError
+from aidevteam.api.routing import ModelRouter, RouteTarget, build_router, route_key
+from aidevteam.benchmarks.fake_llm_server import FakeLLMServer
+
+
+class FakeClient:
+    def __init__(self, model, latency=0.0, fail=False):
+        self.model = model
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def cached(self, system_prompt, user_prompt, max_tokens=2000):
+        return None
+
+    async def agenerate(self, system_prompt, user_prompt, max_tokens=2000, role=None, check_cache=True):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise LLMError(f"{self.model} is down")
+        return self.model
+
+    async def astream(self, system_prompt, user_prompt, max_tokens=2000, role=None, check_cache=True):
+        yield await self.agenerate(system_prompt, user_prompt, max_tokens)
+
+    async def aclose(self):
+        pass
+
+
+def test_route_key_normalises_role_names():
+    assert route_key("Product Owner") == "product_owner"
+    assert route_key("Senior Backend Developer") == "developer"
+    assert route_key("qa_engineer") == "qa_engineer"
+    assert route_key(None) == "default"
+
+
+def test_roles_use_their_own_route_or_default():
+    small, strong = FakeClient("small"), FakeClient("strong")
+    router = ModelRouter({
+        "default": [RouteTarget("p", small)],
+        "developer": [RouteTarget("p", strong)],
+    })
+    assert asyncio.run(router.agenerate("s", "u", role="developer")) == "strong"
+    assert asyncio.run(router.agenerate("s", "u", role="Product Owner")) == "small"
+
+
+def test_target_over_slo_is_passed_over_until_probed():
+    slow, fast = FakeClient("slow", latency=0.05), FakeClient("fast")
+    router = ModelRouter({"default": [RouteTarget("p", slow, slo_seconds=0.01), RouteTarget("p", fast)]},
+                         probe_interval=0.2)
+
+    async def run():
+        first = await router.agenerate("s", "u")
+        second = await router.agenerate("s", "u")
+        await asyncio.sleep(0.25)
+        probed = await router.agenerate("s", "u")
+        return first, second, probed
+
+    assert asyncio.run(run()) == ("slow", "fast", "slow")
+
+
+def test_failures_fall_over_to_the_next_target():
+    down, backup = FakeClient("down", fail=True), FakeClient("backup")
+    router = ModelRouter({"default": [RouteTarget("p", down, slo_seconds=5), RouteTarget("p", backup)]})
+
+    async def run():
+        return [chunk async for chunk in router.astream("s", "u")]
+
+    assert asyncio.run(run()) == ["backup"]
+    stats = router.stats()["default"]
+    assert stats[0]["failures"] == 1 and stats[0]["latency_ewma"] == 10
+    # The failed target is now over its SLO, so the next request skips it
+    assert asyncio.run(router.agenerate("s", "u")) == "backup"
+    assert down.calls == 1
+
+
+def test_streams_are_timed_to_their_first_chunk():
+    class TwoChunks(FakeClient):
+        async def astream(self, system_prompt, user_prompt, max_tokens=2000, role=None, check_cache=True):
+            yield "first"
+            await asyncio.sleep(self.latency)  # the provider keeps generating
+            yield "second"
+
+    router = ModelRouter({"default": [RouteTarget("p", TwoChunks("streaming", latency=0.01), slo_seconds=0.1)]})
+
+    async def slow_consumer():
+        async for _ in router.astream("s", "u"):
+            await asyncio.sleep(0.2)  # e.g. a slow WebSocket subscriber
+
+    asyncio.run(slow_consumer())
+    stats = router.stats()["default"][0]
+    assert stats["first_token_ewma"] < 0.1  # the consumer's time is not charged to the target
+    assert stats["latency_ewma"] is None  # and streams do not skew the completion latency
+    assert stats["calls"] == 1
+
+
+def test_local_provider_against_stand_in_server():
+    config = {
+        "providers": {"local": {"type": "local", "base_url": None}},
+        "routes": {"default": [{"provider": "local", "model": "stand-in", "slo_seconds": 5}]},
+    }
+    with FakeLLMServer(latency=0.01, response_text="hello from the local model") as fake:
+        config["providers"]["local"]["base_url"] = fake.base_url
+        router = build_router(config)
+        for targets in router.routes.values():
+            for target in targets:
+                target.client.cache = ResponseCache()
+
+        async def run():
+            text = await router.agenerate("s", "u", role="qa_engineer")
+            streamed = "".join([chunk async for chunk in router.astream("s", "other", role="qa_engineer")])
+            await router.aclose()
+            return text, streamed
+
+        assert asyncio.run(run()) == ("hello from the local model", "hello from the local model")
+    stats = router.stats()["default"][0]
+    assert stats["target"] == "local/stand-in"
+    assert stats["calls"] == 2 and stats["failures"] == 0
+
+
+if __name__ == "__main__":
+    test_route_key_normalises_role_names()
+    test_roles_use_their_own_route_or_default()
+    test_target_over_slo_is_passed_over_until_probed()
+    test_failures_fall_over_to_the_next_target()
+    test_streams_are_timed_to_their_first_chunk()
+    test_local_provider_against_stand_in_server()
+    print("Model routing tests passed.")
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import tempfile
+from typing import Optional
+
+from aidevteam.agents.scripts import sandbox as sandbox_module
+from aidevteam.agents.scripts.sandbox import (
+    TestSandbox, collect_tests, extract_python, get_qa_sandbox, namespaces_available, run_shell
+)
+from aidevteam.api import server
+from aidevteam.api.wire import strip_artifact_body
+
+CODE = "def add(a, b):\n    return a + b\n"
+TESTS = """import time
+from main import add
+
+
+def test_adds():
+    assert add(1, 2) == 3
+
+
+def test_wrong():
+    assert add(1, 1) == 3
+
+
+def test_hangs():
+    time.sleep(30)
+
+
+class TestAdd:
+    def test_zero(self):
+        assert add(0, 0) == 0
+"""
+
+
+def test_sandbox_reports_real_outcomes_and_caches_them():
+    sandbox = TestSandbox(workers=2, test_timeout=0.5)
+    files = {"main.py": CODE, "test_main.py": TESTS}
+    assert collect_tests(files) == ["test_main.py::test_adds", "test_main.py::test_wrong",
+                                    "test_main.py::test_hangs", "test_main.py::TestAdd::test_zero"]
+
+    first = sandbox.run(files)
+    outcomes = {test["id"]: test["outcome"] for test in first.tests}
+    assert outcomes == {"test_main.py::test_adds": "passed", "test_main.py::test_wrong": "failed",
+                        "test_main.py::test_hangs": "failed", "test_main.py::TestAdd::test_zero": "passed"}
+    assert first.summary() == "2/4 passed" and not first.passed and not first.cached
+    assert "timeout" in next(t["message"] for t in first.tests if t["id"].endswith("test_hangs"))
+
+    second = sandbox.run(files)
+    assert second.cached and second.summary() == "2/4 passed"
+    assert sandbox.runs == 1
+    assert sandbox.run({"main.py": CODE}).error == "No tests found"
+    sandbox.close()
+
+
+def test_shell_runs_without_secrets_and_is_killed_on_timeout():
+    os.environ["SANDBOX_TEST_SECRET"] = "s3cret"
+    try:
+        result = run_shell("echo ${SANDBOX_TEST_SECRET:-none}", timeout=5)
+    finally:
+        del os.environ["SANDBOX_TEST_SECRET"]
+    assert result.stdout.strip() == "none"
+    slow = run_shell("sleep 5", timeout=0.2)
+    assert slow.timed_out and slow.duration < 2
+
+
+def test_qa_sandbox_is_opt_in_and_requires_isolation():
+    saved = {key: os.environ.pop(key, None) for key in ("QA_SANDBOX", "QA_SANDBOX_ISOLATION")}
+    previous = sandbox_module._qa_sandbox
+    sandbox_module._qa_sandbox = None
+    try:
+        assert get_qa_sandbox() is None  # off by default
+        os.environ.update(QA_SANDBOX="1", QA_SANDBOX_ISOLATION="rlimits")
+        assert get_qa_sandbox() is None  # process limits alone are not an isolation layer
+        os.environ["QA_SANDBOX_ISOLATION"] = "container"
+        assert get_qa_sandbox().isolation == "container"
+    finally:
+        sandbox_module._qa_sandbox = previous
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+
+def test_namespaces_hide_the_server_and_the_network():
+    if not namespaces_available():
+        print("user namespaces unavailable; skipped")
+        return
+    probe = f"""
+import os, socket
+print(os.listdir({os.getcwd()!r}))
+print(len([p for p in os.listdir('/proc') if p.isdigit()]))
+try:
+    socket.create_connection(('1.1.1.1', 53), timeout=2)
+    print('network')
+except OSError:
+    print('no network')
+"""
+    result = run_shell([sys.executable, "-c", probe], cwd=tempfile.gettempdir(), timeout=10, isolation="namespaces")
+    assert result.returncode == 0, result.stderr
+    listing, processes, network = result.stdout.split("\n")[:3]
+    assert listing == "[]"  # the server's working directory (and its .env) is hidden
+    assert int(processes) <= 3  # only the sandboxed processes are visible
+    assert network == "no network"
+
+
+def test_extract_python_separates_code_and_tests():
+    answer = "Report\n```python\nfrom main import add\n\ndef test_add():\n    assert add(1, 2) == 3\n```\n"
+    assert extract_python(answer, tests=True).startswith("from main import add")
+    assert extract_python(answer) == ""
+    assert extract_python(CODE) == CODE.strip()
+    assert extract_python("Just prose, no code.") == ""
+
+
+def test_sprint_qa_phase_executes_generated_tests():
+    class CodingLLM:
+        async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000,
+                          role: Optional[str] = None):
+            if role == "developer":
+                yield f"```python\n{CODE}```"
+            elif role == "qa_engineer":
+                yield "# Test Report\n```python\nfrom main import add\n\ndef test_add():\n    assert add(2, 2) == 4\n```"
+            else:
+                yield "## Story 1: Add numbers\nAs a user I want to add numbers."
+
+    frames = []
+
+    async def record(session_id: str, payload: dict):
+        frames.append(payload)
+
+    sandbox = TestSandbox(workers=1)
+    send_json, get_sandbox = server.manager.send_json, server.get_qa_sandbox
+    server.manager.send_json, server.get_qa_sandbox = record, lambda: sandbox
+    try:
+        asyncio.run(server.run_sprint("qa-sandbox", "An adder", CodingLLM()))
+    finally:
+        server.manager.send_json, server.get_qa_sandbox = send_json, get_sandbox
+        sandbox.close()
+
+    report = next(f["data"] for f in frames if f.get("type") == "artifact" and f["data"]["title"] == "Test Report")
+    assert report["preview"] == "1/1 passed"
+    assert "PASS `test_main.py::test_add`" in report["content"]
+    # A lazy client never sees the final body: the text it rebuilds from the deltas must match it
+    assert "content" not in strip_artifact_body({"type": "artifact", "data": report})["data"]
+    rebuilt = "".join(f["data"]["delta"] for f in frames
+                      if f.get("type") == "artifact_delta" and f["data"]["id"] == report["id"])
+    assert rebuilt == report["content"]
+
+
+if __name__ == "__main__":
+    test_sandbox_reports_real_outcomes_and_caches_them()
+    test_shell_runs_without_secrets_and_is_killed_on_timeout()
+    test_qa_sandbox_is_opt_in_and_requires_isolation()
+    test_namespaces_hide_the_server_and_the_network()
+    test_extract_python_separates_code_and_tests()
+    test_sprint_qa_phase_executes_generated_tests()
+    print("QA sandbox tests passed.")
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from fastapi.testclient import TestClient
+
+from aidevteam.api import server
+from aidevteam.api.bus import InMemoryJobQueue
+from aidevteam.api.sessions import SessionStore
+from aidevteam.benchmarks.fake_llm_server import FAKE_RESPONSE
+
+
+class GatedLLM:
+    """Streams the fake response; every call after the first waits for `gate`."""
+
+    def __init__(self, gate: threading.Event):
+        self.gate = gate
+        self.calls = 0
+
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None):
+        self.calls += 1
+        if self.calls > 1:
+            assert await asyncio.to_thread(self.gate.wait, 10)
+        for word in FAKE_RESPONSE.split(" "):
+            yield word + " "
+
+
+def test_record_replays_events_and_prunes_deltas():
+    async def scenario():
+        sessions = SessionStore(retention=60)
+        finished = asyncio.Event()
+
+        async def sprint():
+            await finished.wait()
+
+        session = sessions.start("s1", "A health check API", sprint())
+        for chunk in ("# Sto", "ries"):
+            sessions.record("s1", {"type": "artifact_delta", "data": {"id": "stories", "delta": chunk}})
+        sessions.record("s1", {"type": "log", "data": {"message": "planning done"}})
+        sessions.record("s1", {"type": "artifact", "data": {"id": "stories", "content": "# Stories"}})
+        headless = sessions.record("elsewhere", {"type": "log", "data": {}})
+
+        finished.set()
+        await session.task
+        replay = session.events_since(1)
+        session.finished_at = time.time() - 120
+        sessions.prune()
+        return session, replay, headless, sessions.get("s1")
+
+    session, replay, headless, pruned = asyncio.run(scenario())
+
+    assert session.status == "complete"
+    assert session.last_seq == 4
+    # The final artifact supersedes its deltas in the log, so only seqs 3 and 4 replay
+    assert [(e["seq"], e["type"]) for e in session.events] == [(3, "log"), (4, "artifact")]
+    assert [e["seq"] for e in replay] == [3, 4]
+    assert "seq" not in headless
+    assert pruned is None
+
+
+def test_resume_after_disconnect_replays_every_missed_event():
+    gate = threading.Event()
+    llm = GatedLLM(gate)
+    saved = (server.sprint_store, server.sprint_sessions.store, server.get_async_llm_client, server.job_queue)
+    server.sprint_store = server.sprint_sessions.store = None
+    server.get_async_llm_client, server.job_queue = lambda: llm, InMemoryJobQueue()
+    try:
+        with TestClient(server.app) as client:
+            before = []
+            with client.websocket_connect("/ws/sprint/resumable") as ws:
+                ws.send_json({"goal": "A health check API"})
+                while not before or before[-1].get("type") != "artifact":
+                    before.append(ws.receive_json())
+            # The sprint keeps running without a subscriber
+            gate.set()
+
+            after = []
+            with client.websocket_connect("/ws/sprint/resumable") as ws:
+                ws.send_json({"resume": True, "last_seq": before[-1]["seq"]})
+                while not after or after[-1].get("type") != "complete":
+                    after.append(ws.receive_json())
+            session = server.sprint_sessions.get("resumable")
+    finally:
+        server.sprint_store, server.sprint_sessions.store, server.get_async_llm_client, server.job_queue = saved
+        server.sprint_sessions.sessions.pop("resumable", None)
+
+    seen = [e["seq"] for e in before + after]
+    # Nothing is delivered twice, and everything still in the log after the first socket was delivered
+    assert seen == sorted(set(seen))
+    assert all(e["seq"] > before[-1]["seq"] for e in after)
+    assert {e["seq"] for e in session.events if e["seq"] > before[-1]["seq"]} == {e["seq"] for e in after}
+    assert after[-1]["seq"] == session.last_seq
+    assert [e["data"]["title"] for e in before + after if e.get("type") == "artifact"] == [
+        "User Stories", "Technical Design", "main.py", "Test Report"
+    ]
+
+
+if __name__ == "__main__":
+    test_record_replays_events_and_prunes_deltas()
+    test_resume_after_disconnect_replays_every_missed_event()
+    print("Session tests passed.")
@@ -1,7 +1,7 @@
-from aidevteam.agents.state import SprintState
-from aidevteam.agents.scripts.planning import planning_workflow
-from aidevteam.agents.scripts.development import development_workflow
-from aidevteam.agents.scripts.retro import retro_workflow
+import asyncio
+from aidevteam.agents.state import SprintState, UserStory
+from aidevteam.agents.scripts.development import development_batch_workflow
+from aidevteam.agents.scripts.sprint import build_sprint_graph
 
 def run_sprint_0():
     """ Runs a full end-to-end simulation of the AI Scrum cycle. """
@@ -19,26 +19,10 @@ def run_sprint_0():
         "is_complete": False
     }
     
-    # 2. Phase 1: Planning
-    planning_update = planning_workflow(state)
-    state.update(planning_update)
-    state["current_story_id"] = state["backlog"][0].id
-    
-    # 3. Phase 2: Development & QA
-    dev_update = development_workflow(state)
-    # Merge artifacts instead of overwriting
-    state["artifacts"].update(dev_update.get("artifacts", {}))
-    # Update other fields
-    state["backlog"] = dev_update.get("backlog", state["backlog"])
-    state["messages"].extend(dev_update.get("messages", []))
-    
-    # 4. Phase 3: Retro & Reporting
-    retro_update = retro_workflow(state)
-    # Merge artifacts
-    state["artifacts"].update(retro_update.get("artifacts", {}))
-    # Update other fields
-    state["is_complete"] = retro_update.get("is_complete", state["is_complete"])
-    state["messages"].extend(retro_update.get("messages", []))
+    # 2. Planning -> Development & QA -> Retro & Reporting
+    # The graph orders the phases from their declared inputs/outputs and
+    # merges artifacts/messages through the SprintState reducers.
+    state = build_sprint_graph().run(state)
     
     print("\n=== SPRINT 0 COMPLETED ===")
     print(f"Goal: {state['sprint_goal']}")
@@ -47,11 +31,48 @@ def run_sprint_0():
     
     # Verify key results
     assert state["is_complete"] is True
+    assert state["current_story_id"] == "STORY-001"
+    assert "technical_design" in state["artifacts"]
     assert "source_code" in state["artifacts"]
     assert "test_report" in state["artifacts"]
     assert "final_sprint_report" in state["artifacts"]
+    assert len(state["messages"]) == 3
     
     return state
 
+def test_sprint_0():
+    run_sprint_0()
+
+def test_batch_development_runs_stories_concurrently():
+    """ Every TODO story of a 20-story backlog is developed at the same time. """
+    backlog = [UserStory(id=f"STORY-{i:03d}", title=f"Story {i}", description="Test") for i in range(20)]
+    backlog[3].status = "DONE"
+    
+    in_flight = peak = 0
+    
+    async def implement(story, state):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            in_flight -= 1
+        if story.id == "STORY-007":
+            raise RuntimeError("build failed")
+        return {"source_code": f"# {story.id}"}
+    
+    state: SprintState = {"backlog": backlog, "artifacts": {}, "messages": [], "blockers": []}
+    update = asyncio.run(development_batch_workflow(state, max_concurrency=20, implement=implement))
+    
+    # Every TODO story is in flight at once
+    assert peak == 19
+    assert len(update["artifacts"]) == 18
+    assert "source_code:STORY-000" in update["artifacts"]
+    assert update["blockers"] == ["STORY-007: build failed"]
+    statuses = {story.id: story.status for story in update["backlog"]}
+    assert statuses["STORY-007"] == "TODO"
+    assert all(status == "DONE" for story_id, status in statuses.items() if story_id != "STORY-007")
+
 if __name__ == "__main__":
     run_sprint_0()
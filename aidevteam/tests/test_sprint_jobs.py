@@ -0,0 +1,138 @@
+import asyncio
+import os
+import tempfile
+import time
+from typing import Optional
+
+from fastapi.testclient import TestClient
+
+from aidevteam.api import server
+from aidevteam.api.bus import InMemoryEventBus, InMemoryJobQueue, session_channel
+from aidevteam.api.store import SQLiteSprintStore
+from aidevteam.api.worker import SprintWorker
+from aidevteam.benchmarks.fake_llm_server import FAKE_RESPONSE
+
+
+class FakeLLM:
+    async def astream(self, system_prompt: str, user_prompt: str, max_tokens: int = 2000, role: Optional[str] = None):
+        for word in FAKE_RESPONSE.split(" "):
+            yield word + " "
+
+
+def without_sprint_store():
+    """Swap out the sprint store, job queue and LLM for in-memory ones; returns a restore function."""
+    saved = (server.sprint_store, server.sprint_sessions.store, server.get_async_llm_client, server.job_queue)
+    server.sprint_store = server.sprint_sessions.store = None
+    server.get_async_llm_client, server.job_queue = FakeLLM, InMemoryJobQueue()
+
+    def restore():
+        server.sprint_store, server.sprint_sessions.store, server.get_async_llm_client, server.job_queue = saved
+    return restore
+
+
+def test_headless_sprints_run_on_the_worker_pool():
+    restore = without_sprint_store()
+    try:
+        with TestClient(server.app) as client:
+            submitted = client.post("/sprints", json={"goal": "A health check API", "priority": 5})
+            assert submitted.status_code == 202
+            sprint_id = submitted.json()["id"]
+
+            deadline = time.monotonic() + 10
+            while client.get(f"/sprints/{sprint_id}").json()["status"] in ("queued", "running"):
+                assert time.monotonic() < deadline
+                time.sleep(0.02)
+            sprint = client.get(f"/sprints/{sprint_id}").json()
+            health = client.get("/health").json()
+    finally:
+        restore()
+
+    assert sprint["status"] == "complete"
+    assert [a["title"] for a in sprint["artifacts"]] == ["User Stories", "Technical Design", "main.py",
+                                                         "Test Report"]
+    assert sprint["artifacts"][0]["content_url"].startswith("/artifacts/")
+    assert health["execution"]["worker"]["completed"] >= 1
+
+
+def test_full_queue_sheds_submissions_with_retry_after():
+    restore = without_sprint_store()
+    limit, server.SPRINT_QUEUE_LIMIT = server.SPRINT_QUEUE_LIMIT, 0
+    try:
+        client = TestClient(server.app)
+        rejected = client.post("/sprints", json={"goal": "A health check API"})
+        invalid = client.post("/sprints", json={"goal": "", "priority": 1000})
+        missing = client.get("/sprints/nope")
+    finally:
+        server.SPRINT_QUEUE_LIMIT = limit
+        restore()
+
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert invalid.status_code == 422
+    assert missing.status_code == 404
+
+
+def test_job_that_cannot_start_is_marked_failed():
+    def broken_client():
+        raise ValueError("No LLM provider configured")
+
+    async def scenario():
+        await server.enqueue_sprint("unstartable", "A health check API")
+        subscription = await server.event_bus.subscribe(session_channel("unstartable"))
+        worker = SprintWorker(server.job_queue, server.start_sprint_job, fail=server.fail_sprint_job,
+                              poll_interval=0.05)
+        worker.start()
+        try:
+            return await asyncio.wait_for(subscription.__anext__(), 2)
+        finally:
+            await worker.stop()
+            await subscription.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSprintStore(os.path.join(tmp, "sprints.sqlite3"))
+        saved = (server.sprint_store, server.event_bus, server.job_queue, server.get_async_llm_client)
+        server.sprint_store, server.event_bus, server.job_queue = store, InMemoryEventBus(), InMemoryJobQueue()
+        server.get_async_llm_client = broken_client
+        try:
+            event = asyncio.run(scenario())
+            sprint = store.get_sprint("unstartable")
+            history = store.get_events("unstartable")
+        finally:
+            server.sprint_store, server.event_bus, server.job_queue, server.get_async_llm_client = saved
+            store.close()
+
+    assert "No LLM provider configured" in event["error"]
+    assert sprint["status"] == "failed"
+    assert history == [event]
+
+
+def test_queue_mode_rejects_a_sprint_that_is_already_queued():
+    restore = without_sprint_store()
+    saved, server.SPRINT_EXECUTION = server.SPRINT_EXECUTION, "queue"
+    try:
+        client = TestClient(server.app)  # no lifespan: nothing consumes the queue
+        with client.websocket_connect("/ws/sprint/twice") as ws:
+            ws.send_json({"goal": "A health check API", "priority": 7})
+            with client.websocket_connect("/ws/sprint/twice") as duplicate:
+                duplicate.send_json({"goal": "A health check API"})
+                rejected = duplicate.receive_json()
+            queued = client.get("/sprints/twice").json()
+            depth = asyncio.run(server.job_queue.size())
+            job = asyncio.run(server.job_queue.dequeue(1))
+    finally:
+        server.SPRINT_EXECUTION = saved
+        server.queued_sprints.pop("twice", None)
+        restore()
+
+    assert "already queued" in rejected["error"]
+    assert queued["status"] == "queued"
+    assert depth == 1
+    assert job["priority"] == 7
+
+
+if __name__ == "__main__":
+    test_headless_sprints_run_on_the_worker_pool()
+    test_full_queue_sheds_submissions_with_retry_after()
+    test_job_that_cannot_start_is_marked_failed()
+    test_queue_mode_rejects_a_sprint_that_is_already_queued()
+    print("Sprint job tests passed.")
@@ -0,0 +1,71 @@
+from aidevteam.agents.graph import apply_update, get_reducers
+from aidevteam.agents.state import SprintState, UserStory
+from aidevteam.agents.structures import ArtifactMap, Backlog, MessageLog
+
+
+def story(story_id, status="TODO"):
+    return UserStory(id=story_id, title=story_id, description="...", status=status)
+
+
+def test_message_log_appends_share_chunks_and_keep_old_views():
+    chunk_size = MessageLog.CHUNK_SIZE
+    MessageLog.CHUNK_SIZE = 4
+    try:
+        base = MessageLog(range(6))
+        tip = base.extend([6, 7])
+        branch = base.extend(["x"])  # base is no longer the newest view
+
+        assert list(base) == [0, 1, 2, 3, 4, 5]
+        assert list(tip) == [0, 1, 2, 3, 4, 5, 6, 7]
+        assert list(branch) == [0, 1, 2, 3, 4, 5, "x"]
+        assert tip._buffer.chunks[0] is base._buffer.chunks[0] is branch._buffer.chunks[0]
+        assert tip[-1] == 7 and tip[-3:] == [5, 6, 7] and tip[2:4] == [2, 3]
+        assert [] + base == base == list(range(6))
+    finally:
+        MessageLog.CHUNK_SIZE = chunk_size
+
+
+def test_artifact_map_is_copy_on_write():
+    first = ArtifactMap({"design": "v1"})
+    second = first | {"design": "v2", "tests": "ok"}
+    branch = first.merge({"notes": "n"})
+
+    assert dict(first) == {"design": "v1"}
+    assert dict(second) == {"design": "v2", "tests": "ok"}
+    assert dict(branch) == {"design": "v1", "notes": "n"}
+    assert "tests" not in first and len(second) == 2
+    assert list(second.keys()) == ["design", "tests"]
+
+
+def test_backlog_upserts_by_id_in_insertion_order():
+    backlog = Backlog([story("STORY-001"), story("STORY-002")])
+    updated = backlog.merge([story("STORY-002", "DONE"), story("STORY-003")])
+
+    assert [s.status for s in backlog] == ["TODO", "TODO"]
+    assert [(s.id, s.status) for s in updated] == [("STORY-001", "TODO"), ("STORY-002", "DONE"),
+                                                   ("STORY-003", "TODO")]
+    assert updated.get("STORY-001") is backlog.get("STORY-001")
+    assert "STORY-003" in updated and "STORY-003" not in backlog
+
+
+def test_sprint_state_reducers_accept_plain_lists_and_dicts():
+    reducers = get_reducers(SprintState)
+    state = {"messages": [], "artifacts": {}, "backlog": [story("STORY-001")]}
+    first = apply_update(state, {"messages": ["a"], "artifacts": {"x": "1"},
+                                 "backlog": [story("STORY-002")]}, reducers)
+    second = apply_update(first, {"messages": ["b"], "artifacts": {"x": "2"},
+                                  "backlog": Backlog.coerce(first["backlog"]).merge([story("STORY-001", "DONE")])},
+                          reducers)
+
+    assert first["messages"] == ["a"] and second["messages"] == ["a", "b"]
+    assert first["artifacts"]["x"] == "1" and second["artifacts"]["x"] == "2"
+    assert [s.status for s in first["backlog"]] == ["TODO", "TODO"]
+    assert [s.status for s in second["backlog"]] == ["DONE", "TODO"]
+
+
+if __name__ == "__main__":
+    test_message_log_appends_share_chunks_and_keep_old_views()
+    test_artifact_map_is_copy_on_write()
+    test_backlog_upserts_by_id_in_insertion_order()
+    test_sprint_state_reducers_accept_plain_lists_and_dicts()
+    print("State structure tests passed.")
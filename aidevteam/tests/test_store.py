@@ -0,0 +1,141 @@
+import os
+import tempfile
+import time
+
+from aidevteam.api.store import SprintStore, SQLiteSprintStore, extract_stories
+
+
+def artifact_event(seq, artifact_id, content):
+    return {"type": "artifact", "seq": seq,
+            "data": {"id": artifact_id, "title": "Design", "type": "design", "content": content}}
+
+
+def test_extract_stories_from_product_owner_markdown():
+    markdown = "# User Stories\n## Story 1: Login\nAs a user...\n### Story ID\nUS-1\n## STORY-003: Logout\n..."
+    stories = extract_stories(markdown)
+    assert [(s["id"], s["title"]) for s in stories] == [("STORY-001", "Story 1: Login"),
+                                                        ("STORY-003", "STORY-003: Logout")]
+    assert stories[0]["description"].startswith("As a user")
+
+
+def test_sprint_history_survives_reopen_and_dedupes_artifacts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sprints.sqlite3")
+        store = SQLiteSprintStore(path)
+        for sprint_id in ("s1", "s2"):
+            store.create_sprint(sprint_id, "A health check API")
+            event = artifact_event(1, f"{sprint_id}-design", "# Same design")
+            store.save_artifact(sprint_id, event["data"])
+            store.append_event(sprint_id, event)
+            store.append_event(sprint_id, {"type": "artifact_delta", "seq": 2, "data": {"id": "x", "delta": "#"}})
+            store.append_event(sprint_id, {"type": "complete", "seq": 3, "data": {"success": True}})
+            store.finish_sprint(sprint_id, "complete")
+        store.save_stories("s1", [{"id": "STORY-001", "title": "Login", "description": "...", "status": "TODO"}])
+        store.close()
+
+        store = SQLiteSprintStore(path)
+        sprint = store.get_sprint("s1")
+        assert sprint["status"] == "complete"
+        assert [s["id"] for s in sprint["stories"]] == ["STORY-001"]
+        assert sprint["artifacts"][0]["content_length"] == len("# Same design")
+        assert sprint["event_count"] == 2  # deltas are not persisted
+
+        events = store.get_events("s1")
+        assert [e["seq"] for e in events] == [1, 3]
+        assert events[0]["data"]["content"] == "# Same design"
+        assert store.get_events("s1", after_seq=1) == events[1:]
+        assert store.get_artifact("s2-design")[0] == "# Same design"
+
+        blobs = store._query("SELECT COUNT(*) AS n FROM blobs")[0]["n"]
+        assert blobs == 1
+        store.close()
+
+
+def test_list_sprints_paginates_newest_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSprintStore(os.path.join(tmp, "sprints.sqlite3"))
+        for i in range(5):
+            store.create_sprint(f"s{i}", f"goal {i}", created_at=1000.0 + i)
+
+        page, cursor = store.list_sprints(limit=2)
+        seen = [s["id"] for s in page]
+        while cursor:
+            page, cursor = store.list_sprints(limit=2, cursor=cursor)
+            seen += [s["id"] for s in page]
+        assert seen == ["s4", "s3", "s2", "s1", "s0"]
+        store.close()
+
+
+def test_running_sprints_are_marked_interrupted_on_startup():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sprints.sqlite3")
+        store = SQLiteSprintStore(path)
+        store.create_sprint("crashed", "goal")
+        store.close()
+
+        store = SQLiteSprintStore(path)
+        assert store.mark_interrupted() == 1
+        assert store.get_sprint("crashed")["status"] == "interrupted"
+        store.close()
+
+
+def test_only_idle_running_sprints_are_interrupted_with_a_shared_bus():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSprintStore(os.path.join(tmp, "sprints.sqlite3"))
+        store.create_sprint("dead", "goal", created_at=time.time() - 120)
+        store.create_sprint("alive", "goal", created_at=time.time() - 120)
+        store.append_event("alive", {"seq": 1, "type": "log"})
+        store.create_sprint("waiting", "goal", created_at=time.time() - 120, status="queued")
+
+        assert store.mark_interrupted(idle_seconds=60) == 1
+        assert [store.get_sprint(s)["status"] for s in ("dead", "alive", "waiting")] == \
+            ["interrupted", "running", "queued"]
+        store.close()
+
+
+def test_artifact_bodies_are_hashed_once_and_closed_stores_refuse_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSprintStore(os.path.join(tmp, "sprints.sqlite3"))
+        store.create_sprint("s1", "goal")
+        event = artifact_event(1, "s1-design", "# Design")
+        digest = store.save_artifact("s1", event["data"])
+        store.append_event("s1", event, content_hash=digest)
+        store.flush()
+        assert store.stats()["writes"] == 4  # sprint, blob, artifact, event: the blob is written once
+        assert store.get_events("s1")[0]["data"]["content"] == "# Design"
+
+        store.close()
+        try:
+            store.append_event("s1", {"type": "log", "seq": 2})
+        except RuntimeError as e:
+            assert "closed" in str(e)
+        else:
+            raise AssertionError("a closed store must not reopen implicitly")
+        store.open()
+        store.append_event("s1", {"type": "log", "seq": 2})
+        assert len(store.get_events("s1")) == 2
+        store.close()
+
+
+def test_incomplete_backends_fail_when_created():
+    class WriteOnlyStore(SprintStore):
+        def create_sprint(self, sprint_id, goal, created_at=None, status="running"):
+            pass
+
+    try:
+        WriteOnlyStore()
+    except TypeError as e:
+        assert "get_events" in str(e)
+    else:
+        raise AssertionError("a backend missing methods must not be instantiable")
+
+
+if __name__ == "__main__":
+    test_extract_stories_from_product_owner_markdown()
+    test_sprint_history_survives_reopen_and_dedupes_artifacts()
+    test_list_sprints_paginates_newest_first()
+    test_running_sprints_are_marked_interrupted_on_startup()
+    test_only_idle_running_sprints_are_interrupted_with_a_shared_bus()
+    test_artifact_bodies_are_hashed_once_and_closed_stores_refuse_writes()
+    test_incomplete_backends_fail_when_created()
+    print("Sprint store tests passed.")
@@ -0,0 +1,51 @@
+import asyncio
+
+from aidevteam.api import server
+
+
+async def tokens(chunks, pause=0.0):
+    for chunk in chunks:
+        if pause:
+            await asyncio.sleep(pause)
+        yield chunk
+
+
+def stream(chunks, min_chars, max_interval, pause=0.0):
+    """Run stream_artifact over `chunks`; returns (content, deltas sent to the client)."""
+    sent = []
+
+    async def record(session_id, payload):
+        sent.append(payload)
+
+    saved = server.manager.send_json, server.DELTA_MIN_CHARS, server.DELTA_MAX_INTERVAL
+    server.manager.send_json, server.DELTA_MIN_CHARS, server.DELTA_MAX_INTERVAL = record, min_chars, max_interval
+    try:
+        content = asyncio.run(server.stream_artifact("streaming", "a1", "main.py", "code", tokens(chunks, pause)))
+    finally:
+        server.manager.send_json, server.DELTA_MIN_CHARS, server.DELTA_MAX_INTERVAL = saved
+    assert all(p["type"] == "artifact_delta" and p["data"]["id"] == "a1" for p in sent)
+    return content, [p["data"]["delta"] for p in sent]
+
+
+def test_deltas_coalesce_until_min_chars_and_flush_the_rest():
+    chunks = ["def ", "add", "(a, ", "b):", "\n    ", "return ", "a + b", "\n"]
+    content, deltas = stream(chunks, min_chars=10, max_interval=60)
+
+    assert content == "".join(chunks)
+    assert "".join(deltas) == content
+    # The first token goes out at once, then frames of at least 10 chars, then the remainder
+    assert deltas == ["def ", "add(a, b):", "\n    return ", "a + b\n"]
+
+
+def test_slow_streams_flush_every_interval():
+    chunks = ["one ", "two ", "three"]
+    content, deltas = stream(chunks, min_chars=1000, max_interval=0.01, pause=0.02)
+
+    assert content == "one two three"
+    assert deltas == chunks
+
+
+if __name__ == "__main__":
+    test_deltas_coalesce_until_min_chars_and_flush_the_rest()
+    test_slow_streams_flush_every_interval()
+    print("Streaming tests passed.")
@@ -1,7 +1,8 @@
 import { motion, AnimatePresence } from 'framer-motion';
 import { X, FileCode, FileText, TestTube, Copy, Check } from 'lucide-react';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import type { Artifact } from '../types';
+import { fetchArtifactContent } from '../services/api';
 
 interface ArtifactModalProps {
     artifact: Artifact | null;
@@ -22,14 +23,26 @@ const typeLabels = {
 
 export function ArtifactModal({ artifact, onClose }: ArtifactModalProps) {
     const [copied, setCopied] = useState(false);
+    const [loadedContent, setLoadedContent] = useState<string | undefined>(undefined);
+
+    // Lazily fetch the artifact body when it was not sent over the WebSocket
+    useEffect(() => {
+        setLoadedContent(undefined);
+        if (artifact && !artifact.content && artifact.contentUrl) {
+            fetchArtifactContent(artifact.contentUrl)
+                .then(setLoadedContent)
+                .catch((e) => console.error('[Artifact] Failed to load content:', e));
+        }
+    }, [artifact]);
 
     if (!artifact) return null;
 
     const Icon = typeIcons[artifact.type];
+    const content = artifact.content ?? loadedContent;
 
     const handleCopy = async () => {
-        if (artifact.content) {
-            await navigator.clipboard.writeText(artifact.content);
+        if (content) {
+            await navigator.clipboard.writeText(content);
             setCopied(true);
             setTimeout(() => setCopied(false), 2000);
         }
@@ -61,7 +74,7 @@ export function ArtifactModal({ artifact, onClose }: ArtifactModalProps) {
                             </div>
                         </div>
                         <div className="flex items-center gap-2">
-                            {artifact.content && (
+                            {content && (
                                 <button
                                     onClick={handleCopy}
                                     className="p-2 hover:bg-white/10 rounded-lg transition text-white/60 hover:text-white"
@@ -81,10 +94,12 @@ export function ArtifactModal({ artifact, onClose }: ArtifactModalProps) {
 
                     {/* Content */}
                     <div className="p-4 overflow-y-auto flex-1">
-                        {artifact.content ? (
+                        {content ? (
                             <pre className="bg-black/40 rounded-lg p-4 text-sm font-mono text-white/80 whitespace-pre-wrap overflow-x-auto">
-                                {artifact.content}
+                                {content}
                             </pre>
+                        ) : artifact.contentUrl ? (
+                            <p className="text-white/50 text-center py-8">Loading content...</p>
                         ) : (
                             <p className="text-white/50 text-center py-8">No detailed content available.</p>
                         )}
@@ -3,14 +3,18 @@
  */
 
 const WS_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000';
+const API_URL = import.meta.env.VITE_API_URL || WS_URL.replace(/^ws/, 'http');
 
 export type MessageHandler = (data: SprintUpdate) => void;
 
 export interface SprintUpdate {
-    type: 'agent_update' | 'artifact' | 'log' | 'complete' | 'error';
+    type: 'agent_update' | 'artifact' | 'artifact_delta' | 'log' | 'usage' | 'complete' | 'error';
     data: Record<string, unknown>;
+    seq?: number;
 }
 
+const MAX_RECONNECT_ATTEMPTS = 5;
+
 export interface AgentUpdateData {
     agent_id: string;
     name: string;
@@ -23,10 +27,28 @@ export interface ArtifactData {
     title: string;
     type: 'design' | 'code' | 'test';
     preview: string;
-    content: string;
+    // Artifact bodies are fetched lazily: content_url replaces content
+    content?: string;
+    content_url?: string;
+    content_length?: number;
     timestamp: string;
 }
 
+export interface ArtifactDeltaData {
+    id: string;
+    title: string;
+    type: 'design' | 'code' | 'test';
+    delta: string;
+}
+
+export interface UsageData {
+    phase: string;
+    artifact_id: string;
+    input_tokens: number;
+    output_tokens: number;
+    compaction: Record<string, { original_tokens: number; tokens: number }>;
+}
+
 export interface LogData {
     id: string;
     agent: string;
@@ -40,6 +62,12 @@ export class SprintWebSocket {
     private onMessage: MessageHandler;
     private onError: (error: string) => void;
     private onClose: () => void;
+    // Highest event sequence number received, used to resume after a drop
+    private lastSeq = 0;
+    private started = false;
+    private completed = false;
+    private closedByClient = false;
+    private reconnectAttempts = 0;
 
     constructor(
         sessionId: string,
@@ -55,11 +83,13 @@ export class SprintWebSocket {
 
     connect(): Promise<void> {
         return new Promise((resolve, reject) => {
-            const url = `${WS_URL}/ws/sprint/${this.sessionId}`;
+            // lazy=1: artifact bodies are fetched over HTTP only when opened
+            const url = `${WS_URL}/ws/sprint/${this.sessionId}?lazy=1`;
             this.ws = new WebSocket(url);
 
             this.ws.onopen = () => {
                 console.log('[WebSocket] Connected to sprint server');
+                this.reconnectAttempts = 0;
                 resolve();
             };
 
@@ -72,6 +102,15 @@ export class SprintWebSocket {
                         return;
                     }
 
+                    if (data.seq !== undefined) {
+                        // Skip events already delivered before a reconnect
+                        if (data.seq <= this.lastSeq) return;
+                        this.lastSeq = data.seq;
+                    }
+                    if (data.type === 'complete') {
+                        this.completed = true;
+                    }
+
                     this.onMessage(data);
                 } catch (e) {
                     console.error('[WebSocket] Failed to parse message:', e);
@@ -80,19 +119,42 @@ export class SprintWebSocket {
 
             this.ws.onerror = (error) => {
                 console.error('[WebSocket] Error:', error);
-                this.onError('WebSocket connection error');
+                if (!this.started) {
+                    this.onError('WebSocket connection error');
+                }
                 reject(error);
             };
 
             this.ws.onclose = () => {
                 console.log('[WebSocket] Connection closed');
+                if (this.started && !this.completed && !this.closedByClient) {
+                    this.reconnect();
+                    return;
+                }
                 this.onClose();
             };
         });
     }
 
+    private reconnect(): void {
+        if (this.reconnectAttempts >= MAX_RECONNECT_ATTEMPTS) {
+            this.onError('Lost connection to the sprint server');
+            this.onClose();
+            return;
+        }
+        const delay = 500 * 2 ** this.reconnectAttempts;
+        this.reconnectAttempts += 1;
+        console.log(`[WebSocket] Resuming sprint from event ${this.lastSeq} in ${delay}ms`);
+        setTimeout(() => {
+            this.connect()
+                .then(() => this.ws?.send(JSON.stringify({ resume: true, last_seq: this.lastSeq })))
+                .catch(() => undefined);
+        }, delay);
+    }
+
     startSprint(goal: string): void {
         if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.started = true;
             this.ws.send(JSON.stringify({ goal }));
         } else {
             this.onError('WebSocket not connected');
@@ -101,12 +163,24 @@ export class SprintWebSocket {
 
     disconnect(): void {
         if (this.ws) {
+            this.closedByClient = true;
             this.ws.close();
             this.ws = null;
         }
     }
 }
 
+/**
+ * Fetch the body of a lazily-loaded artifact (served with immutable caching).
+ */
+export async function fetchArtifactContent(contentUrl: string): Promise<string> {
+    const response = await fetch(`${API_URL}${contentUrl}`);
+    if (!response.ok) {
+        throw new Error(`Failed to load artifact: ${response.status}`);
+    }
+    return response.text();
+}
+
 /**
  * Create a new WebSocket connection for a sprint session.
  */
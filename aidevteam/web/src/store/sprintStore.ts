@@ -16,10 +16,18 @@ interface ArtifactPayload {
     title: string;
     type: 'design' | 'code' | 'test';
     preview: string;
-    content: string;
+    content?: string;
+    content_url?: string;
     timestamp: string;
 }
 
+interface ArtifactDeltaPayload {
+    id: string;
+    title: string;
+    type: 'design' | 'code' | 'test';
+    delta: string;
+}
+
 interface LogPayload {
     id: string;
     agent: string;
@@ -91,18 +99,52 @@ export const useSprintStore = create<SprintStore>((set, get) => ({
                     }));
                     break;
                 }
+                case 'artifact_delta': {
+                    const data = update.data as unknown as ArtifactDeltaPayload;
+                    set((state) => {
+                        const existing = state.artifacts.find((a) => a.id === data.id);
+                        if (!existing) {
+                            return {
+                                artifacts: [...state.artifacts, {
+                                    id: data.id,
+                                    title: data.title,
+                                    type: data.type,
+                                    preview: 'Generating...',
+                                    content: data.delta,
+                                }],
+                            };
+                        }
+                        return {
+                            artifacts: state.artifacts.map((a) =>
+                                a.id === data.id
+                                    ? { ...a, content: (a.content || '') + data.delta }
+                                    : a
+                            ),
+                        };
+                    });
+                    break;
+                }
                 case 'artifact': {
                     const data = update.data as unknown as ArtifactPayload;
-                    set((state) => ({
-                        artifacts: [...state.artifacts, {
+                    // Replace the partial artifact built from artifact_delta frames,
+                    // keeping its streamed text when the body is sent lazily
+                    set((state) => {
+                        const existing = state.artifacts.find((a) => a.id === data.id);
+                        const artifact = {
                             id: data.id,
                             title: data.title,
                             type: data.type,
                             preview: data.preview,
-                            content: data.content,
+                            content: data.content ?? existing?.content,
+                            contentUrl: data.content_url,
                             timestamp: data.timestamp,
-                        }],
-                    }));
+                        };
+                        return {
+                            artifacts: existing
+                                ? state.artifacts.map((a) => (a.id === data.id ? artifact : a))
+                                : [...state.artifacts, artifact],
+                        };
+                    });
                     break;
                 }
                 case 'log': {
@@ -14,6 +14,8 @@ export interface Artifact {
     type: 'design' | 'code' | 'test';
     preview?: string;
     content?: string;
+    // Set when the body was not sent inline and must be fetched on demand
+    contentUrl?: string;
     timestamp?: string;
 }
 
@@ -4,6 +4,7 @@
 import JSZip from 'jszip';
 import { saveAs } from 'file-saver';
 import type { Artifact } from '../types';
+import { fetchArtifactContent } from '../services/api';
 
 /**
  * Get the file extension for an artifact type.
@@ -62,7 +63,9 @@ ${artifacts.map((a, i) => `${i + 1}. **${a.title}** (${a.type})`).join('\n')}
     for (const artifact of artifacts) {
         const ext = getExtension(artifact.type, artifact.title);
         const filename = sanitizeFilename(artifact.title) + ext;
-        const content = artifact.content || artifact.preview || '';
+        const body = artifact.content
+            || (artifact.contentUrl ? await fetchArtifactContent(artifact.contentUrl) : '');
+        const content = body || artifact.preview || '';
         folder.file(filename, content);
     }
 